@@ -1,12 +1,13 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 import os
 from dotenv import load_dotenv
 from typing import List
 import logging
-from database import get_db, engine, Base
+from database import get_async_db, dispose_async_engine, Base
+from services.metrics import RequestMetricsMiddleware, render_metrics
 
 # Load environment variables
 load_dotenv()
@@ -34,17 +35,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request latency, exposed on /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.on_event("shutdown")
+async def close_database_connections():
+    # Pooled async connections hold driver threads open until disposed
+    await dispose_async_engine()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
 # Database test endpoint
 @app.get("/test-db")
-async def test_db(db: Session = Depends(get_db)):
+async def test_db(db: AsyncSession = Depends(get_async_db)):
     try:
         # Try to execute a simple query
-        result = db.execute(text("SELECT 1"))
+        result = await db.execute(text("SELECT 1"))
         return {"status": "success", "message": "Database connection successful"}
     except Exception as e:
         logger.error(f"Database connection failed: {str(e)}")
@@ -0,0 +1,138 @@
+"""
+Request concurrency of async handlers with the sync vs the async database session
+
+Both endpoints are `async def` and run one query that takes --delay-ms
+inside SQLite (a registered sleep function stands in for a slow
+database). With the sync Session the query blocks the event loop, so
+concurrent requests are served one at a time; with AsyncSession they
+overlap up to the pool size.
+
+Runs locally against a throwaway SQLite file through aiosqlite:
+
+    python benchmarks/async_db.py --requests 100 --concurrency 20 --delay-ms 50
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+
+import database
+
+def _slow_query(ms):
+    time.sleep(ms / 1000)
+    return ms
+
+def _register_slow_function(dbapi_connection, connection_record):
+    dbapi_connection.create_function("slow_query", 1, _slow_query)
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_session(delay_ms: int, db=Depends(database.get_db)):
+        # The pre-async pattern: a blocking query inside an async handler
+        return {"result": db.execute(text("SELECT slow_query(:ms)"), {"ms": delay_ms}).scalar()}
+
+    @app.get("/async")
+    async def async_session(delay_ms: int, db=Depends(database.get_async_db)):
+        result = await db.execute(text("SELECT slow_query(:ms)"), {"ms": delay_ms})
+        return {"result": result.scalar()}
+
+    return app
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int, delay_ms: int) -> dict:
+    """
+    Fire requests with bounded concurrency while a ticker measures event loop stalls
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    stalls = []
+    done = asyncio.Event()
+
+    async def ticker():
+        interval = 0.005
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            stalls.append(time.perf_counter() - started - interval)
+
+    async def one(client):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, params={"delay_ms": delay_ms})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Warm the pool so connection setup is not measured
+        await asyncio.gather(*[one(client) for _ in range(concurrency)])
+        latencies.clear()
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await asyncio.gather(*[one(client) for _ in range(requests)])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await ticking
+
+    latencies.sort()
+    return {
+        "session": path.strip("/"),
+        "requests": requests,
+        "concurrency": concurrency,
+        "delay_ms": delay_ms,
+        "wall_seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "max_event_loop_stall_ms": round(max(stalls, default=0.0) * 1000, 1)
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--delay-ms", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if database.get_engine().dialect.name != "sqlite":
+        parser.error("The benchmark registers a SQLite function; point DATABASE_URL at SQLite or unset it")
+
+    event.listen(database.get_engine(), "connect", _register_slow_function)
+    event.listen(database.get_async_engine().sync_engine, "connect", _register_slow_function)
+
+    app = build_app()
+    try:
+        results = [
+            await run(app, path, args.requests, args.concurrency, args.delay_ms)
+            for path in ("/sync", "/async")
+        ]
+    finally:
+        await database.dispose_async_engine()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = list(results[0])
+    print("  ".join(f"{column:>24}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>24}" for column in columns))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Concurrent live-call capacity of the streaming silence/overtalk analyzer
+
+Synthetic two-channel calls (noise bursts for speech, with pauses and
+overlaps) are cut into --frame-ms frames and fed round-robin to N
+analyzers in one thread, the way one event loop serves N WebSockets.
+Reported per N: process CPU seconds per audio second, how many streams
+one core sustains in real time, and the p50/p99/max time to analyze one
+frame, which is what an event waits for on top of the frame itself.
+
+    python benchmarks/live_streams.py --streams 1 50 200 --seconds 60 --json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.live import create_live_analyzer
+
+def synthetic_call(seconds: float, sample_rate: int, seed: int) -> bytes:
+    """
+    Interleaved s16le stereo: alternating turns with gaps and occasional overlaps
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    channels = np.zeros((total, 2), dtype=np.float32)
+    position, speaker = 0.0, 0
+    while position < seconds:
+        turn = rng.uniform(1.0, 6.0)
+        start, end = int(position * sample_rate), int(min(position + turn, seconds) * sample_rate)
+        channels[start:end, speaker] = rng.standard_normal(end - start) * 0.2
+        # Next turn: sometimes overlapping, sometimes after a silence
+        position += turn + rng.choice([-0.8, 0.2, 1.5, 4.0])
+        speaker = 1 - speaker
+    return (channels * 32767).astype(np.int16).tobytes()
+
+def run(streams: int, seconds: float, sample_rate: int, frame_ms: int) -> dict:
+    frame_bytes = int(sample_rate * frame_ms / 1000) * 4
+    calls = [synthetic_call(seconds, sample_rate, seed) for seed in range(min(streams, 8))]
+    analyzers = [create_live_analyzer(sample_rate) for _ in range(streams)]
+
+    frame_times = []
+    events = 0
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for offset in range(0, len(calls[0]), frame_bytes):
+        for index, analyzer in enumerate(analyzers):
+            frame = calls[index % len(calls)][offset:offset + frame_bytes]
+            started = time.perf_counter()
+            events += len(analyzer.feed(frame))
+            frame_times.append(time.perf_counter() - started)
+    for analyzer in analyzers:
+        events += len(analyzer.close())
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    audio_seconds = seconds * streams
+    frame_times.sort()
+    return {
+        "streams": streams,
+        "sample_rate": sample_rate,
+        "frame_ms": frame_ms,
+        "audio_seconds": audio_seconds,
+        "events": events,
+        "wall_seconds": round(wall, 3),
+        "cpu_per_audio_second": round(cpu / audio_seconds, 6),
+        "realtime_streams_per_core": int(audio_seconds / cpu) if cpu else None,
+        "frame_p50_us": round(statistics.median(frame_times) * 1e6, 1),
+        "frame_p99_us": round(frame_times[int(len(frame_times) * 0.99) - 1] * 1e6, 1),
+        "frame_max_us": round(frame_times[-1] * 1e6, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--seconds", type=float, default=60.0, help="Audio per stream")
+    parser.add_argument("--sample-rate", type=int, default=8000)
+    parser.add_argument("--frame-ms", type=int, default=20, help="Audio per WebSocket message")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(n, args.seconds, args.sample_rate, args.frame_ms) for n in args.streams]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = list(results[0])
+    print("  ".join(f"{column:>26}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>26}" for column in columns))
+
+if __name__ == "__main__":
+    main()
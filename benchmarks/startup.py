@@ -0,0 +1,112 @@
+"""
+Cold-start cost of the API and worker entry modules
+
+Each module is imported in a fresh interpreter, several times, and the
+median import time and resident memory are reported together with any
+heavy ML libraries (torch, whisper, pyannote, transformers, librosa) the
+import pulled in and whether a database engine was created. Importing
+must not open a database connection, so DATABASE_URL defaults to an
+unused SQLite path.
+
+    python benchmarks/startup.py --runs 5 --json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["torch", "whisper", "pyannote", "transformers", "librosa"]
+
+# Entry points: the API app, the task module it imports for .delay(), the worker
+TARGETS = ["database", "tasks", "backend", "celery_worker"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+database = sys.modules.get("database")
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss_kb() / 1024,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+    "engine_created": bool(database and getattr(database, "_engine", None) is not None)
+}}))
+"""
+
+def probe(module: str, env: dict) -> dict:
+    """
+    Import one module in a new interpreter and return its measurements
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--modules", nargs="+", default=TARGETS)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/startup.db")
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+
+    results = []
+    for module in args.modules:
+        try:
+            runs = [probe(module, env) for _ in range(args.runs)]
+        except RuntimeError as e:
+            results.append({"module": module, "error": str(e)})
+            continue
+        results.append({
+            "module": module,
+            "import_seconds_median": round(statistics.median(run["seconds"] for run in runs), 3),
+            "import_seconds_max": round(max(run["seconds"] for run in runs), 3),
+            "rss_mb_median": round(statistics.median(run["rss_mb"] for run in runs), 1),
+            "heavy_modules": runs[-1]["heavy_modules"],
+            "engine_created": any(run["engine_created"] for run in runs)
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']:<16} ERROR {result['error'].splitlines()[-1]}")
+            continue
+        print(
+            f"{result['module']:<16} {result['import_seconds_median']:>7.3f}s "
+            f"(max {result['import_seconds_max']:.3f}s)  {result['rss_mb_median']:>7.1f} MB  "
+            f"heavy={','.join(result['heavy_modules']) or '-'}  engine={result['engine_created']}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Deterministic stand-ins for Whisper, pyannote and the sentiment model
+
+They answer from a SyntheticCall's ground truth (or a hash of the text),
+so the pipeline around them runs for real on CPU without torch or model
+downloads. An optional real-time factor makes each stub sleep in
+proportion to the audio, to model inference cost in end-to-end runs.
+"""
+import os
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audio import ensure_audio
+
+LABELS = ("POSITIVE", "NEGATIVE", "NEUTRAL")
+
+class StubTranscriber:
+    """
+    transcribe_long_form replacement: the scripted words, spread evenly over each turn
+    """
+    def __init__(self, call, realtime_factor: float = 0.0):
+        self.call = call
+        self.realtime_factor = realtime_factor
+
+    def __call__(self, audio, language: Optional[str] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        audio = ensure_audio(audio)
+        time.sleep(audio.duration * self.realtime_factor)
+
+        segments, words = [], []
+        for turn in self.call.turns:
+            tokens = turn["text"].split()
+            step = (turn["end"] - turn["start"]) / len(tokens)
+            for i, token in enumerate(tokens):
+                start = turn["start"] + i * step
+                words.append({"word": token, "start": start, "end": start + step})
+            segments.append({"start": turn["start"], "end": turn["end"], "text": turn["text"]})
+
+        elapsed = time.perf_counter() - started
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "words": words,
+            "language": language or "en",
+            "duration": audio.duration,
+            "processing_time": elapsed,
+            "audio_seconds_per_second": audio.duration / elapsed if elapsed > 0 else 0.0
+        }
+
+class StubDiarizer:
+    """
+    diarize_audio replacement: the scripted turns with pyannote-style labels
+    """
+    def __init__(self, call, realtime_factor: float = 0.0):
+        self.call = call
+        self.realtime_factor = realtime_factor
+
+    def __call__(self, audio, num_speakers: int = 2) -> List[Dict[str, Any]]:
+        audio = ensure_audio(audio)
+        time.sleep(audio.duration * self.realtime_factor)
+        return sorted(
+            (
+                {
+                    "speaker": turn["speaker"],
+                    "start_time": turn["start"],
+                    "end_time": turn["end"],
+                    "text": "",
+                    "confidence": 1.0
+                }
+                for turn in self.call.turns
+            ),
+            key=lambda segment: segment["start_time"]
+        )
+
+class StubSentimentPipeline:
+    """
+    transformers pipeline replacement: a label and score derived from a hash of the text
+    """
+    def __init__(self, seconds_per_text: float = 0.0):
+        self.seconds_per_text = seconds_per_text
+
+    def __call__(self, texts, batch_size: int = 1, truncation: bool = True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        time.sleep(len(texts) * self.seconds_per_text)
+        outputs = []
+        for text in texts:
+            digest = zlib.crc32(text.encode("utf-8"))
+            outputs.append({
+                "label": LABELS[digest % len(LABELS)],
+                "score": 0.5 + (digest % 500) / 1000
+            })
+        return outputs
+
+def install(call, realtime_factor: float = 0.0, stub_diarizer: bool = True):
+    """
+    Point the model services at stubs for this call; returns a function that restores them
+    Only the model calls are replaced, so chunking, alignment, caching and
+    persistence still run. stub_diarizer=False leaves diarization real, for
+    stereo calls that are split by channel without pyannote
+    """
+    from services.cache import ResultCache
+    from services.diarization import diarization_service
+    from services.sentiment import sentiment_service
+    from services.transcription import transcription_service
+
+    saved = (
+        transcription_service.__dict__.get("transcribe_long_form"),
+        diarization_service.__dict__.get("diarize_audio"),
+        sentiment_service.pipeline,
+        sentiment_service.cache
+    )
+
+    transcription_service.transcribe_long_form = StubTranscriber(call, realtime_factor)
+    if stub_diarizer:
+        diarization_service.diarize_audio = StubDiarizer(call, realtime_factor)
+    sentiment_service.pipeline = StubSentimentPipeline()
+    # Local-only, so a configured shared cache is neither read nor filled
+    sentiment_service.cache = ResultCache("sentiment-benchmark")
+
+    def restore():
+        for service, name, value in (
+            (transcription_service, "transcribe_long_form", saved[0]),
+            (diarization_service, "diarize_audio", saved[1])
+        ):
+            if value is None:
+                service.__dict__.pop(name, None)
+            else:
+                setattr(service, name, value)
+        sentiment_service.pipeline = saved[2]
+        sentiment_service.cache = saved[3]
+
+    return restore
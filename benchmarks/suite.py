@@ -0,0 +1,411 @@
+"""
+Offline benchmark suite for the analysis services
+
+Runs on CPU with no model downloads: calls come from the synthetic
+generator (benchmarks/synthetic.py) and Whisper, pyannote and the
+sentiment model are replaced by deterministic stubs (benchmarks/stubs.py).
+Each benchmark also checks its result against the generated ground
+truth, so a speed-up that breaks the analysis shows up as a failure.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --quick --baseline results.json --tolerance 0.25
+
+Results are JSON. With --baseline, medians slower than the baseline by
+more than --tolerance are reported as regressions, and the exit status
+is non-zero on a regression or a failed check.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+WORK_DIR = tempfile.mkdtemp(prefix="benchmark-")
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{WORK_DIR}/benchmark.db"
+
+import database
+import models
+from benchmarks import stubs
+from benchmarks.synthetic import generate_call, SyntheticCall
+from services.audio import DecodedAudio, audio_service
+from services.diarization import diarization_service
+from services.events import InMemoryBroker, progress_service
+from services.overtalk import overtalk_service
+from services.persistence import replace_segments
+from services.sentiment import sentiment_service
+from services.silence_analysis import silence_analysis_service
+
+# Sizes per mode: full runs for release comparisons, quick ones for a smoke check
+SIZES = {
+    "full": {"repeat": 5, "silence_seconds": 1800, "overtalk_seconds": 4 * 3600,
+             "summary_segments": 100000, "persist_segments": 5000, "call_seconds": 600,
+             "stereo_seconds": 2400},
+    "quick": {"repeat": 3, "silence_seconds": 300, "overtalk_seconds": 3600,
+              "summary_segments": 20000, "persist_segments": 1000, "call_seconds": 120,
+              "stereo_seconds": 300},
+}
+
+# Silence boundaries are found to within one RMS frame at each end
+FRAME_TOLERANCE = 2 * silence_analysis_service.frame_duration
+
+# Share of 10 ms steps on which channel diarization must agree with the script
+MIN_SPEECH_AGREEMENT = 0.98
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Time repeat runs of func; returns the timings and the last result
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return {
+        "seconds": {
+            "median": statistics.median(timings),
+            "min": min(timings),
+            "max": max(timings)
+        },
+        "result": result
+    }
+
+def report(name: str, params: Dict[str, Any], timed: Dict[str, Any], throughput: Dict[str, float], checks: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "params": params,
+        "seconds": {key: round(value, 6) for key, value in timed["seconds"].items()},
+        "throughput": {key: round(value, 1) for key, value in throughput.items()},
+        "checks": checks,
+        "passed": all(check["ok"] for check in checks.values())
+    }
+
+def check_close(actual: float, expected: float, tolerance: float) -> Dict[str, Any]:
+    return {
+        "actual": round(actual, 3),
+        "expected": round(expected, 3),
+        "tolerance": round(tolerance, 3),
+        "ok": abs(actual - expected) <= tolerance
+    }
+
+def check_equal(actual: Any, expected: Any) -> Dict[str, Any]:
+    return {"actual": actual, "expected": expected, "ok": actual == expected}
+
+def silence_checks(call: SyntheticCall, hold_time: float, dead_air_time: float) -> Dict[str, Any]:
+    tolerance = FRAME_TOLERANCE * max(1, len(call.silences))
+    return {
+        "hold_time": check_close(hold_time, call.expected_hold_time, tolerance),
+        "dead_air_time": check_close(dead_air_time, call.expected_dead_air_time, tolerance)
+    }
+
+def bench_detect_silence(sizes: Dict[str, Any]) -> Dict[str, Any]:
+    call = generate_call(sizes["silence_seconds"], seed=1)
+    audio, segments = call.decoded(), call.segments()
+    timed = measure(lambda: silence_analysis_service.detect_silence(audio, segments), sizes["repeat"])
+    hold_time, dead_air_time = timed["result"]
+    return report(
+        "detect_silence",
+        {"audio_seconds": call.duration, "silences": len(call.silences)},
+        timed,
+        {"audio_seconds_per_second": call.duration / timed["seconds"]["median"]},
+        silence_checks(call, hold_time, dead_air_time)
+    )
+
+def bench_detect_overtalk(sizes: Dict[str, Any]) -> Dict[str, Any]:
+    call = generate_call(sizes["overtalk_seconds"], seed=2, render=False)
+    segments = call.segments()
+    timed = measure(lambda: overtalk_service.detect_overtalk(segments), sizes["repeat"])
+    return report(
+        "detect_overtalk",
+        {"segments": len(segments), "overlaps": call.expected_overtalk_count},
+        timed,
+        {"segments_per_second": len(segments) / timed["seconds"]["median"]},
+        {"overtalk_count": check_equal(timed["result"], call.expected_overtalk_count)}
+    )
+
+def bench_sentiment_summary(sizes: Dict[str, Any]) -> Dict[str, Any]:
+    count = sizes["summary_segments"]
+    rng = np.random.default_rng(3)
+    labels = rng.choice(["positive", "negative", "neutral"], size=count)
+    confidences = rng.uniform(0.5, 1.0, size=count)
+    segments = [
+        {"sentiment": str(label), "confidence": float(confidence)}
+        for label, confidence in zip(labels, confidences)
+    ]
+    expected = {label: int(np.sum(labels == label)) for label in ("positive", "negative", "neutral")}
+
+    timed = measure(lambda: sentiment_service.get_sentiment_summary(segments), sizes["repeat"])
+    summary = timed["result"]
+    return report(
+        "get_sentiment_summary",
+        {"segments": count},
+        timed,
+        {"segments_per_second": count / timed["seconds"]["median"]},
+        {
+            "distribution": check_equal(summary["sentiment_distribution"], expected),
+            "average_confidence": check_close(summary["average_confidence"], float(confidences.mean()), 1e-6)
+        }
+    )
+
+def _speech_mask(spans, channel_of: Dict[str, int], duration: float, step: float = 0.01) -> np.ndarray:
+    mask = np.zeros((2, int(duration / step) + 1), dtype=bool)
+    for speaker, start, end in spans:
+        mask[channel_of[speaker], int(start / step):int(end / step)] = True
+    return mask
+
+def bench_diarize_channels(sizes: Dict[str, Any]) -> Dict[str, Any]:
+    call = generate_call(sizes["stereo_seconds"], seed=5)
+    audio = call.decoded(stereo=True)
+    timed = measure(lambda: diarization_service.diarize_audio(audio), sizes["repeat"])
+    segments = timed["result"]
+
+    # The generator puts SPEAKER_00 on the left channel
+    expected = _speech_mask(call.speech_spans(), {"SPEAKER_00": 0, "SPEAKER_01": 1}, call.duration)
+    found = _speech_mask(
+        [(segment["speaker"], segment["start_time"], segment["end_time"]) for segment in segments],
+        {"CHANNEL_0": 0, "CHANNEL_1": 1},
+        call.duration
+    )
+    agreement = float(np.mean(expected == found))
+    agent_label = f"CHANNEL_{diarization_service.agent_channel}"
+    agent_types = {segment["speaker_type"] for segment in segments if segment["speaker"] == agent_label}
+    return report(
+        "diarize_channels",
+        {"audio_seconds": call.duration, "turns": len(call.turns)},
+        timed,
+        {"audio_seconds_per_second": call.duration / timed["seconds"]["median"]},
+        {
+            "speech_agreement": {
+                "actual": round(agreement, 4),
+                "minimum": MIN_SPEECH_AGREEMENT,
+                "ok": agreement >= MIN_SPEECH_AGREEMENT
+            },
+            "agent_channel_types": check_equal(sorted(agent_types), ["agent"])
+        }
+    )
+
+def _new_call(db, audio_path: str = "") -> models.Call:
+    call = models.Call(
+        audio_path=audio_path,
+        agent_id="benchmark-agent",
+        language="en",
+        processing_status="pending"
+    )
+    db.add(call)
+    db.commit()
+    return call
+
+def bench_persist_segments(sizes: Dict[str, Any]) -> Dict[str, Any]:
+    count = sizes["persist_segments"]
+    segments = [
+        {
+            "speaker": f"SPEAKER_0{i % 2}",
+            "speaker_type": "agent" if i % 2 == 0 else "customer",
+            "start_time": i * 2.0,
+            "end_time": i * 2.0 + 1.8,
+            "text": "thank you for calling how can I help",
+            "sentiment": "neutral",
+            "confidence": 0.9
+        }
+        for i in range(count)
+    ]
+
+    db = database.SessionLocal()
+    try:
+        call = _new_call(db)
+
+        def write():
+            # Replacing is the worker's path on retries and reprocessing
+            written = replace_segments(db, call.id, segments)
+            db.commit()
+            return written
+
+        timed = measure(write, sizes["repeat"])
+        stored = db.query(models.Segment).filter(models.Segment.call_id == call.id).count()
+    finally:
+        db.close()
+
+    return report(
+        "persist_segments",
+        {"segments": count, "dialect": database.get_engine().dialect.name},
+        timed,
+        {"segments_per_second": count / timed["seconds"]["median"]},
+        {"rows": check_equal(stored, count)}
+    )
+
+def _wave_decoder(file_path: str, mmap_dir: Optional[str] = None, keep_channels: bool = False) -> DecodedAudio:
+    """
+    Decode the generator's 16-bit WAV without ffmpeg
+    """
+    import wave
+
+    with wave.open(file_path, "rb") as f:
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").reshape(-1, f.getnchannels())
+        rate = f.getframerate()
+    channels = pcm if keep_channels and pcm.shape[1] == 2 else None
+    return DecodedAudio(pcm.mean(axis=1).astype(np.float32) / 32768.0, rate, file_path, channels)
+
+def bench_process_call(sizes: Dict[str, Any], realtime_factor: float, stereo: bool = False) -> Dict[str, Any]:
+    """
+    The whole task on a mono recording, or with stereo=True on one speaker
+    per channel, where diarization runs for real by channel
+    """
+    from tasks import process_call
+
+    call_audio = generate_call(sizes["call_seconds"], seed=4)
+    path = os.path.join(WORK_DIR, "stereo.wav" if stereo else "call.wav")
+    call_audio.write_wav(path, stereo=stereo)
+
+    decoder = "ffmpeg" if shutil.which("ffmpeg") else "wave"
+    restore = stubs.install(call_audio, realtime_factor, stub_diarizer=not stereo)
+    if decoder == "wave":
+        audio_service.load_audio = _wave_decoder
+    # Progress events stay in process instead of needing Redis
+    progress_service.set_broker(InMemoryBroker())
+
+    db = database.SessionLocal()
+    try:
+        def run():
+            # Every run starts cold, as a new recording would
+            sentiment_service.cache.clear()
+            call = _new_call(db, path)
+            process_call.run(str(call.id))
+            return call.id
+
+        timed = measure(run, sizes["repeat"])
+        db.expire_all()
+        call = db.get(models.Call, timed["result"])
+        stored = db.query(models.Segment).filter(models.Segment.call_id == call.id).count()
+    finally:
+        db.close()
+        restore()
+        audio_service.__dict__.pop("load_audio", None)
+
+    checks = {
+        "status": check_equal(call.processing_status, "completed"),
+        "overtalk_count": check_equal(call.overtalk_count, call_audio.expected_overtalk_count)
+    }
+    if not stereo:
+        # Channel turns split at dead air, so only the scripted turns map one to one
+        checks["segments"] = check_equal(stored, len(call_audio.turns))
+    checks.update(silence_checks(call_audio, call.hold_time or 0.0, call.dead_air_time or 0.0))
+    return report(
+        "process_call_stereo" if stereo else "process_call",
+        {"audio_seconds": call_audio.duration, "decoder": decoder, "model_realtime_factor": realtime_factor},
+        timed,
+        {"audio_seconds_per_second": call_audio.duration / timed["seconds"]["median"]},
+        checks
+    )
+
+BENCHMARKS = {
+    "detect_silence": bench_detect_silence,
+    "detect_overtalk": bench_detect_overtalk,
+    "get_sentiment_summary": bench_sentiment_summary,
+    "persist_segments": bench_persist_segments,
+    "diarize_channels": bench_diarize_channels,
+    "process_call": bench_process_call,
+    "process_call_stereo": lambda sizes, realtime_factor: bench_process_call(sizes, realtime_factor, stereo=True),
+}
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Benchmarks whose median got slower than the baseline's by more than tolerance
+    """
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None or before["params"] != result["params"]:
+            # Different sizes are not comparable
+            continue
+        ratio = result["seconds"]["median"] / before["seconds"]["median"]
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "name": result["name"],
+                "baseline_median": before["seconds"]["median"],
+                "median": result["seconds"]["median"],
+                "slowdown": round(ratio, 3)
+            })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats")
+    parser.add_argument("--repeat", type=int, help="Override the number of timed runs")
+    parser.add_argument("--model-rtf", type=float, default=0.0,
+                        help="Seconds the stub models sleep per second of audio in process_call")
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    sizes = dict(SIZES["quick" if args.quick else "full"])
+    if args.repeat:
+        sizes["repeat"] = args.repeat
+
+    database.Base.metadata.create_all(database.get_engine())
+
+    results = []
+    try:
+        for name in args.only or list(BENCHMARKS):
+            if name.startswith("process_call"):
+                results.append(BENCHMARKS[name](sizes, args.model_rtf))
+            else:
+                results.append(BENCHMARKS[name](sizes))
+            print(f"{name}: {results[-1]['seconds']['median']:.4f}s median", file=sys.stderr)
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    output = {"environment": environment(), "mode": "quick" if args.quick else "full", "results": results}
+    if args.baseline:
+        with open(args.baseline) as f:
+            output["regressions"] = compare(results, json.load(f), args.tolerance)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = [result["name"] for result in results if not result["passed"]]
+    if failed or output.get("regressions"):
+        for name in failed:
+            print(f"FAILED check: {name}", file=sys.stderr)
+        for regression in output.get("regressions", []):
+            print(f"REGRESSION: {regression['name']} {regression['slowdown']}x slower", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Synthetic two-speaker calls with known ground truth
+
+A call is scripted as alternating agent/customer turns separated by
+short gaps, holds (silence between turns), dead air (a pause inside
+one speaker's turn) and overtalk (the next speaker starts before the
+current one finishes). Speech is a harmonic tone per speaker under a
+syllable-rate envelope plus a little noise; silence is a noise floor
+well below the silence threshold. Everything is seeded, so the same
+arguments always give the same samples and the same truth.
+
+    from benchmarks.synthetic import generate_call
+    call = generate_call(duration=300, seed=1)
+    call.decoded(), call.segments(), call.expected_hold_time
+"""
+import os
+import sys
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audio import DecodedAudio, SAMPLE_RATE
+
+SPEAKERS = ("SPEAKER_00", "SPEAKER_01")
+SPEAKER_TYPES = {"SPEAKER_00": "agent", "SPEAKER_01": "customer"}
+FUNDAMENTALS = {"SPEAKER_00": 140.0, "SPEAKER_01": 225.0}  # Hz
+
+VOCABULARY = (
+    "thank you for calling how can I help today account number please "
+    "hold while I check that is not what I expected great sorry about "
+    "the delay could you repeat the order arrived damaged refund billing "
+    "address confirm perfect terrible excellent frustrated appreciate"
+).split()
+
+class SyntheticCall:
+    """
+    Generated audio together with the turns, silences and overlaps it was built from
+    """
+    def __init__(
+        self,
+        duration: float,
+        sample_rate: int,
+        turns: List[Dict[str, Any]],
+        silences: List[Dict[str, Any]],
+        overlaps: List[Dict[str, Any]],
+        channels: Optional[np.ndarray] = None
+    ):
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.turns = turns
+        self.silences = silences
+        self.overlaps = overlaps
+        self.channels = channels  # (2, samples) float32, one speaker per channel
+
+    @property
+    def samples(self) -> np.ndarray:
+        """Mono downmix, the way the pipeline decodes a recording"""
+        return np.clip(self.channels.sum(axis=0), -1.0, 1.0).astype(np.float32)
+
+    def decoded(self, stereo: bool = False) -> DecodedAudio:
+        """
+        The call as the pipeline decodes it, optionally keeping one speaker per channel
+        """
+        channels = None
+        if stereo:
+            channels = (np.clip(self.channels.T, -1.0, 1.0) * 32767).astype(np.int16)
+        return DecodedAudio(self.samples, self.sample_rate, channels=channels)
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """
+        Ground-truth turns in the shape diarization and alignment produce
+        """
+        return [
+            {
+                "speaker": turn["speaker"],
+                "speaker_type": SPEAKER_TYPES[turn["speaker"]],
+                "start_time": turn["start"],
+                "end_time": turn["end"],
+                "text": turn["text"],
+                "confidence": 1.0
+            }
+            for turn in self.turns
+        ]
+
+    def speech_spans(self) -> List[Tuple[str, float, float]]:
+        """
+        (speaker, start, end) of every stretch of speech: the turns minus their dead air
+        """
+        dead_air = [s for s in self.silences if s["type"] == "dead_air"]
+        spans = []
+        for turn in self.turns:
+            start = turn["start"]
+            for silence in dead_air:
+                if turn["start"] < silence["start"] < turn["end"]:
+                    spans.append((turn["speaker"], start, silence["start"]))
+                    start = silence["end"]
+            spans.append((turn["speaker"], start, turn["end"]))
+        return spans
+
+    @property
+    def expected_hold_time(self) -> float:
+        return sum(s["end"] - s["start"] for s in self.silences if s["type"] == "hold")
+
+    @property
+    def expected_dead_air_time(self) -> float:
+        return sum(s["end"] - s["start"] for s in self.silences if s["type"] == "dead_air")
+
+    @property
+    def expected_overtalk_count(self) -> int:
+        return len(self.overlaps)
+
+    def write_wav(self, path: str, stereo: bool = False):
+        """
+        Write 16-bit PCM, mono or with one speaker per channel
+        """
+        data = self.channels.T if stereo else self.samples[:, None]
+        pcm = (np.clip(data, -1.0, 1.0) * 32767).astype("<i2")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(pcm.shape[1])
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(pcm.tobytes())
+
+def _script(
+    duration: float,
+    rng: np.random.Generator,
+    min_silence: float,
+    min_overlap: float
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]], List[List[Tuple[float, float]]]]:
+    """
+    Turns, silences and overlaps of a call, plus the voiced spans of each turn
+    """
+    turns, silences, overlaps, voiced = [], [], [], []
+    position, speaker = 0.5, 0
+    overlapped_start = 0.0  # how much of this turn's start the previous speaker covers
+    while True:
+        length = rng.uniform(2.0, 8.0)
+        # Dead air: the speaker stops mid-turn and picks up again
+        pause = rng.uniform(min_silence + 0.5, 4.0) if length > 4.0 and rng.random() < 0.15 else 0.0
+        if position + length + pause > duration - 0.5:
+            break
+
+        spans = [(position, position + length)]
+        if pause:
+            split = position + length / 2
+            spans = [(position, split), (split + pause, position + length + pause)]
+            silences.append({"start": split, "end": split + pause, "type": "dead_air"})
+            length += pause
+
+        words = rng.choice(VOCABULARY, size=max(1, int(length * 2.2)))
+        turns.append({
+            "speaker": SPEAKERS[speaker],
+            "start": position,
+            "end": position + length,
+            "text": " ".join(words)
+        })
+        voiced.append(spans)
+        end = position + length
+
+        gap_kind = rng.choice(["gap", "hold", "overlap"], p=[0.6, 0.2, 0.2])
+        overlap = rng.uniform(min_overlap + 0.2, 1.5)
+        if gap_kind == "hold":
+            gap = rng.uniform(min_silence + 0.5, 8.0)
+            silences.append({"start": end, "end": end + gap, "type": "hold"})
+        elif gap_kind == "overlap" and length - overlapped_start - overlap > 0.5:
+            # Kept clear of the overlap at the turn's start so the two stay separate
+            gap = -overlap
+            overlaps.append({"start": end + gap, "end": end, "interrupter": SPEAKERS[1 - speaker]})
+        else:
+            # Too short to count as silence
+            gap = rng.uniform(0.1, min_silence * 0.6)
+        overlapped_start = max(0.0, -gap)
+        position = end + gap
+        speaker = 1 - speaker
+
+    # Gaps scripted after the last turn never happened; what follows it is one trailing hold
+    last_end = turns[-1]["end"] if turns else 0.0
+    silences = [silence for silence in silences if silence["start"] < last_end]
+    overlaps = [overlap for overlap in overlaps if overlap["end"] < last_end]
+    if duration - last_end >= min_silence:
+        silences.append({"start": last_end, "end": duration, "type": "hold"})
+
+    return turns, silences, overlaps, voiced
+
+def generate_call(
+    duration: float = 300.0,
+    seed: int = 0,
+    sample_rate: int = SAMPLE_RATE,
+    render: bool = True,
+    min_silence: float = 1.0,
+    min_overlap: float = 0.5
+) -> SyntheticCall:
+    """
+    Script and (unless render=False) synthesize a call of about duration seconds
+    min_silence and min_overlap should match the analysis thresholds, so
+    every scripted silence and overlap is one the analysis must report
+    """
+    rng = np.random.default_rng(seed)
+    turns, silences, overlaps, voiced = _script(duration, rng, min_silence, min_overlap)
+    if not render:
+        return SyntheticCall(duration, sample_rate, turns, silences, overlaps)
+
+    total = int(duration * sample_rate)
+    # Noise floor around -70 dBFS, far below the -40 dBFS silence threshold
+    channels = (rng.standard_normal((2, total)) * 3e-4).astype(np.float32)
+    for turn, spans in zip(turns, voiced):
+        channel = SPEAKERS.index(turn["speaker"])
+        f0 = FUNDAMENTALS[turn["speaker"]]
+        for start, end in spans:
+            a, b = int(start * sample_rate), int(end * sample_rate)
+            t = np.arange(b - a, dtype=np.float32) / sample_rate
+            tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in (1, 2, 3))
+            # Syllable-rate envelope that never drops into the silence range
+            envelope = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 2.0 * t))
+            channels[channel, a:b] += (0.08 * envelope * tone).astype(np.float32)
+            channels[channel, a:b] += (rng.standard_normal(b - a) * 0.01).astype(np.float32)
+
+    return SyntheticCall(duration, sample_rate, turns, silences, overlaps, channels)
@@ -1,7 +1,16 @@
 import os
+import gc
 import logging
+import threading
 from celery import Celery
-from celery.signals import after_setup_logger, after_setup_task_logger
+from celery.signals import (
+    after_setup_logger,
+    after_setup_task_logger,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown
+)
 import platform
 
 # Configure logging
@@ -15,7 +24,8 @@ logger = logging.getLogger(__name__)
 celery = Celery(
     "tasks",
     broker=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
-    backend=os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    backend=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    include=["tasks"]
 )
 
 # Windows-specific configuration
@@ -51,6 +61,10 @@ celery.conf.update(
             'exchange': 'processing',
             'routing_key': 'processing'
         }
+    },
+    # Model-heavy work goes to workers consuming the processing queue
+    task_routes={
+        'tasks.process_call': {'queue': 'processing'}
     }
 )
 
@@ -78,5 +92,130 @@ def setup_task_loggers(logger, *args, **kwargs):
     fh.setFormatter(formatter)
     logger.addHandler(fh)
 
+def _memory_usage() -> dict:
+    """
+    Resident, proportional and shared memory of this process in MB
+    Shared pages are the model weights inherited copy-on-write from the parent
+    """
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    usage[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    except OSError:
+        # Not Linux: only the peak resident size is available
+        import resource
+        return {'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+    return {
+        'rss': usage.get('Rss', 0.0),
+        'pss': usage.get('Pss', 0.0),
+        'shared': usage.get('Shared_Clean', 0.0) + usage.get('Shared_Dirty', 0.0),
+        'private': usage.get('Private_Clean', 0.0) + usage.get('Private_Dirty', 0.0)
+    }
+
+def _format_memory(usage: dict) -> str:
+    return ', '.join(f"{key}={value:.0f}MB" for key, value in usage.items())
+
+# Services whose weights preload_models loaded in the parent
+_preloaded = {}
+
+# Warm-up of the preloaded models in this pool child, if one was started
+_warm_up_thread = None
+
+@worker_init.connect
+def preload_models(sender=None, **kwargs):
+    """
+    Opt-in warm start: load the model weights in the parent before the pool forks
+    Every child, including those recycled by worker_max_tasks_per_child,
+    then shares the weights copy-on-write instead of reloading them.
+    No inference runs here: it would start torch's thread pools, which do
+    not survive fork; each child warms up in warm_up_child instead
+    """
+    if os.getenv('PRELOAD_MODELS', 'false').lower() != 'true':
+        return
+
+    from services.transcription import transcription_service
+    from services.diarization import diarization_service
+    from services.sentiment import sentiment_service
+
+    services = {
+        'transcription': transcription_service,
+        'diarization': diarization_service,
+        'sentiment': sentiment_service
+    }
+    selected = os.getenv('PRELOAD_MODEL_LIST', ','.join(services)).split(',')
+
+    for name in (name.strip() for name in selected):
+        service = services.get(name)
+        if service is None:
+            logger.warning(f"Unknown model to preload: {name}")
+            continue
+        if service.device != 'cpu':
+            # CUDA contexts do not survive fork
+            logger.warning(f"Skipping preload of {name} model on {service.device}")
+            continue
+        try:
+            if hasattr(service, 'load_model'):
+                service.load_model()
+            else:
+                service.load_pipeline()
+            _preloaded[name] = service
+        except Exception as e:
+            logger.error(f"Error preloading {name} model: {str(e)}")
+
+    # Keep the garbage collector from touching (and un-sharing) the loaded objects
+    gc.freeze()
+    logger.info(f"Models preloaded in parent: {_format_memory(_memory_usage())}")
+
+def _warm_up_preloaded():
+    """Run one inference per preloaded model so the child's first real call is fast"""
+    for name, service in _preloaded.items():
+        try:
+            service.warm_up()
+        except Exception as e:
+            logger.error(f"Error warming up {name} model in worker child: {str(e)}")
+    logger.info(f"Worker child {os.getpid()} warmed up: {_format_memory(_memory_usage())}")
+
+@worker_process_init.connect
+def warm_up_child(**kwargs):
+    """
+    Start warming up the preloaded models in a freshly forked child
+    The warm-up runs on a background thread: a child that has not reported
+    to the pool within worker_proc_alive_timeout (4 s) is killed, and
+    inference on CPU takes far longer than that
+    """
+    global _warm_up_thread
+    if os.getenv('PRELOAD_MODELS', 'false').lower() != 'true':
+        return
+
+    logger.info(f"Worker child {os.getpid()} started: {_format_memory(_memory_usage())}")
+    if _preloaded and os.getenv('PRELOAD_WARMUP', 'true').lower() == 'true':
+        _warm_up_thread = threading.Thread(target=_warm_up_preloaded, name="model-warm-up", daemon=True)
+        _warm_up_thread.start()
+
+@task_prerun.connect
+def wait_for_warm_up(**kwargs):
+    """Hold a child's first task until its warm-up is over, so the two never run inference at once"""
+    if _warm_up_thread is not None:
+        _warm_up_thread.join()
+
+@worker_init.connect
+def start_metrics_server(sender=None, **kwargs):
+    """Expose stage and queue metrics when WORKER_METRICS_PORT is set"""
+    from services.metrics import metrics_service
+    try:
+        metrics_service.start_worker_server()
+    except Exception as e:
+        logger.error(f"Error starting worker metrics server: {str(e)}")
+
+@worker_process_shutdown.connect
+def release_child_metrics(pid=None, **kwargs):
+    """Let the multiprocess collector forget a recycled pool child"""
+    from services.metrics import metrics_service
+    metrics_service.mark_process_dead(pid or os.getpid())
+
 if __name__ == '__main__':
     celery.start() 
\ No newline at end of file
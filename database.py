@@ -1,7 +1,12 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Optional
 import os
+import threading
 from dotenv import load_dotenv
 import logging
 
@@ -15,40 +20,137 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Get database URL from environment variables
+# Get database URL from environment variables; checked when the first engine is built
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    logger.error("DATABASE_URL environment variable is not set")
-    raise ValueError("DATABASE_URL environment variable is not set")
-
-logger.info(f"Attempting to connect to database with URL: {DATABASE_URL}")
-
-try:
-    # Create SQLAlchemy engine
-    engine = create_engine(
-        DATABASE_URL,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30,
-        pool_recycle=1800,
-        echo=True  # Enable SQL query logging
-    )
-    
-    # Test the connection
-    with engine.connect() as connection:
-        result = connection.execute(text("SELECT 1"))
-        logger.info("Database connection test successful")
-    
-    # Create session factory
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    
-    # Create base class for models
-    Base = declarative_base()
-    
-    logger.info("Database connection configured successfully")
-except Exception as e:
-    logger.error(f"Error configuring database connection: {str(e)}")
-    raise
+
+# Async drivers for the API; Celery workers keep the sync engine
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Create base class for models
+Base = declarative_base()
+
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+
+def _database_url() -> str:
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL environment variable is not set")
+        raise ValueError("DATABASE_URL environment variable is not set")
+    return DATABASE_URL
+
+def get_async_database_url(url: str) -> str:
+    """
+    Async counterpart of a database URL, e.g. postgresql:// -> postgresql+asyncpg://
+    ASYNC_DATABASE_URL overrides the derived URL
+    """
+    override = os.getenv("ASYNC_DATABASE_URL")
+    if override:
+        return override
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}; set ASYNC_DATABASE_URL")
+    if parsed.drivername == driver:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def _engine_options() -> dict:
+    """
+    Pool and logging settings shared by the sync and async engines
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+        "echo": os.getenv("DB_ECHO", "false").lower() == "true"  # log every SQL statement
+    }
+
+def get_engine() -> Engine:
+    """
+    Sync engine used by Celery tasks, created on first use
+    Building an engine does not connect; the pool connects on the first query
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = _database_url()
+                try:
+                    _engine = create_engine(url, **_engine_options())
+                    logger.info(f"Database engine configured for {make_url(url).render_as_string(hide_password=True)}")
+                except Exception as e:
+                    logger.error(f"Error configuring database connection: {str(e)}")
+                    raise
+    return _engine
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Async engine used by the API, created on first use
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                url = get_async_database_url(_database_url())
+                options = _engine_options()
+                if make_url(url).get_backend_name() == "sqlite":
+                    # aiosqlite defaults to NullPool; pool connections (each owns a thread) instead
+                    options["poolclass"] = AsyncAdaptedQueuePool
+                try:
+                    _async_engine = create_async_engine(url, **options)
+                except Exception as e:
+                    logger.error(f"Error configuring async database connection: {str(e)}")
+                    raise
+    return _async_engine
+
+def check_connection():
+    """
+    Run SELECT 1 on the sync engine; raises if the database is unreachable
+    """
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
+    logger.info("Database connection test successful")
+
+async def dispose_async_engine():
+    """
+    Close pooled async connections, if the async engine was ever created
+    """
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to get_engine() when the first session is made"""
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+class _LazyAsyncSessionmaker(async_sessionmaker):
+    """async_sessionmaker that binds to get_async_engine() when the first session is made"""
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_async_engine())
+        return super().__call__(**local_kw)
+
+# Create session factories; importing this module opens no connection
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+# Objects stay usable after commit: async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = _LazyAsyncSessionmaker(autoflush=False, expire_on_commit=False)
+
+def __getattr__(name: str):
+    # `from database import engine` keeps working but builds the engine on access
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Dependency to get DB session
 def get_db():
@@ -60,4 +162,14 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session for request handlers
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {str(e)}")
+            await db.rollback()
+            raise
@@ -1,6 +1,6 @@
 import logging
-from database import engine, Base
-from models import CallRecording, Transcription, SilenceAnalysis, OvertalkAnalysis
+from database import get_engine, Base
+from models import CallRecording, Transcription, SilenceAnalysis, OvertalkAnalysis, Call, Segment, StageArtifact, UploadSession, UploadPart, AgentDailyStats
 
 # Configure logging
 logging.basicConfig(
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 def init_db():
     try:
         # Create all tables
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=get_engine())
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {str(e)}")
@@ -1,8 +1,93 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Float, Text, ForeignKey, Boolean, Uuid, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+import uuid
 from database import Base
 
+class Call(Base):
+    __tablename__ = "calls"
+    __table_args__ = (
+        # Keyset pagination over (created_at, id), overall and per agent
+        Index("ix_calls_created_at_id", "created_at", "id"),
+        Index("ix_calls_agent_created_at_id", "agent_id", "created_at", "id"),
+    )
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    agent_id = Column(String(100), index=True, nullable=False)
+    customer_id = Column(String(100), index=True)
+    language = Column(String(10), default="en")
+    audio_path = Column(String(512))
+    content_hash = Column(String(64), index=True)  # sha256 of the uploaded audio
+    duplicate_of = Column(Uuid, ForeignKey("calls.id"))  # call whose analysis was reused
+    processing_status = Column(String(50), default="pending", index=True)  # pending, processing, completed, failed
+    error_message = Column(Text)
+    transcription = Column(Text)
+    duration = Column(Float)
+    hold_time = Column(Float, default=0.0)
+    dead_air_time = Column(Float, default=0.0)
+    silence_segments = Column(JSON)  # [{start, end, type}] with type hold or dead_air
+    overtalk_count = Column(Integer, default=0)
+    overtalk_segments = Column(JSON)  # [{start, end, interrupter}] for each overtalk interval
+    sentiment_summary = Column(JSON)  # segment counts per sentiment and average confidence
+    in_rollup = Column(Boolean, default=False, nullable=False)  # counted in agent_daily_stats
+    is_deleted = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationship
+    segments = relationship(
+        "Segment",
+        back_populates="call",
+        order_by="Segment.start_time",
+        cascade="all, delete-orphan"
+    )
+
+class Segment(Base):
+    __tablename__ = "segments"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    call_id = Column(Uuid, ForeignKey("calls.id", ondelete="CASCADE"), index=True, nullable=False)
+    speaker = Column(String(50))
+    speaker_type = Column(String(20))  # agent, customer, unknown
+    start_time = Column(Float, nullable=False)
+    end_time = Column(Float, nullable=False)
+    text = Column(Text)
+    sentiment = Column(String(20))
+    confidence = Column(Float)
+
+    # Relationship
+    call = relationship("Call", back_populates="segments")
+
+class StageArtifact(Base):
+    __tablename__ = "stage_artifacts"
+    __table_args__ = (
+        UniqueConstraint("call_id", "stage", "version", name="uq_stage_artifact"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(Uuid, ForeignKey("calls.id", ondelete="CASCADE"), index=True, nullable=False)
+    stage = Column(String(50), nullable=False)
+    version = Column(String(64), nullable=False)  # hash of the stage's and its inputs' model versions
+    payload = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class AgentDailyStats(Base):
+    """Per-agent, per-day totals maintained incrementally as calls complete or are deleted"""
+    __tablename__ = "agent_daily_stats"
+
+    agent_id = Column(String(100), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    call_count = Column(Integer, default=0, nullable=False)
+    total_duration = Column(Float, default=0.0, nullable=False)
+    total_hold_time = Column(Float, default=0.0, nullable=False)
+    total_dead_air_time = Column(Float, default=0.0, nullable=False)
+    total_overtalk_count = Column(Integer, default=0, nullable=False)
+    total_overtalk_duration = Column(Float, default=0.0, nullable=False)
+    positive_segments = Column(Integer, default=0, nullable=False)
+    negative_segments = Column(Integer, default=0, nullable=False)
+    neutral_segments = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class CallRecording(Base):
     __tablename__ = "call_recordings"
 
@@ -54,4 +139,37 @@ class OvertalkAnalysis(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship
-    recording = relationship("CallRecording", back_populates="overtalk_analysis") 
\ No newline at end of file
+    recording = relationship("CallRecording", back_populates="overtalk_analysis") 
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    filename = Column(String(255), nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    file_path = Column(String(512), nullable=False)  # preallocated file the parts are written into
+    agent_id = Column(String(100), nullable=False)
+    customer_id = Column(String(100))
+    language = Column(String(10), default="en")
+    status = Column(String(50), default="open")  # open, finalizing, finalized
+    call_id = Column(Uuid, ForeignKey("calls.id"))
+    finalizing_at = Column(DateTime(timezone=True))  # when the current finalize claimed the session
+    claimed_call_id = Column(Uuid)  # call that finalize creates; a reclaimed finalize reuses it
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationship
+    parts = relationship("UploadPart", back_populates="session", cascade="all, delete-orphan")
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Uuid, ForeignKey("upload_sessions.id", ondelete="CASCADE"), index=True, nullable=False)
+    start = Column(BigInteger, nullable=False)  # inclusive byte offset
+    end = Column(BigInteger, nullable=False)  # exclusive byte offset
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    written_at = Column(DateTime(timezone=True))  # None while the part's bytes are still arriving
+
+    # Relationship
+    session = relationship("UploadSession", back_populates="parts")
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+import logging
+
+from ..database import get_async_db
+from ..schemas import AgentStats, ErrorResponse
+from ..services.analytics import get_daily_stats, get_agent_summary
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/analytics/agents/daily", response_model=List[AgentStats], responses={400: {"model": ErrorResponse}})
+async def get_agent_daily_stats(
+    agent_id: Optional[str] = Query(None, description="Filter by agent ID"),
+    start_date: Optional[date] = Query(None, description="First day to include (UTC)"),
+    end_date: Optional[date] = Query(None, description="Last day to include (UTC)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        if start_date and end_date and start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date is after end_date")
+
+        return await db.run_sync(get_daily_stats, agent_id, start_date, end_date)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving daily agent stats: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while retrieving daily agent stats"
+        )
+
+@router.get("/analytics/agents", response_model=List[AgentStats], responses={400: {"model": ErrorResponse}})
+async def get_agent_stats(
+    agent_id: Optional[str] = Query(None, description="Filter by agent ID"),
+    start_date: Optional[date] = Query(None, description="First day to include (UTC)"),
+    end_date: Optional[date] = Query(None, description="Last day to include (UTC)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        if start_date and end_date and start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date is after end_date")
+
+        return await db.run_sync(get_agent_summary, agent_id, start_date, end_date)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving agent stats: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while retrieving agent stats"
+        )
@@ -0,0 +1,209 @@
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from celery import group
+import os
+import time
+import uuid
+from collections import defaultdict
+from typing import List, Optional, Dict, Any
+import logging
+
+from ..database import get_async_db
+from ..models import Call
+from ..schemas import BatchItemStatus, BatchUploadResponse, ErrorResponse
+from ..services.storage import save_audio_file
+from ..services.ingest import (
+    extract_archive, parse_manifest, discard_entries, plan_calls, batch_ingest_service, AUDIO_EXTENSIONS
+)
+from ..services.persistence import find_analyzed_duplicates, link_duplicate
+from ..tasks import process_call
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+async def _save_files(files: List[UploadFile]) -> List[Dict[str, Any]]:
+    """
+    Store individually uploaded files, hashing each as it streams
+    """
+    entries = []
+    for file in files:
+        if not file.filename.lower().endswith(AUDIO_EXTENSIONS):
+            entries.append({
+                "filename": file.filename,
+                "error": "Invalid file type. Only WAV, MP3, and OGG files are supported."
+            })
+            continue
+
+        call_id = uuid.uuid4()
+        try:
+            file_path, content_hash = await save_audio_file(file, call_id)
+        except Exception as e:
+            entries.append({"filename": file.filename, "error": str(e)})
+            continue
+
+        entries.append({
+            "filename": file.filename,
+            "call_id": call_id,
+            "file_path": file_path,
+            "content_hash": content_hash
+        })
+    return entries
+
+@router.post("/upload/batch", response_model=BatchUploadResponse, responses={400: {"model": ErrorResponse}})
+async def upload_batch(
+    files: List[UploadFile] = File([]),
+    archive: Optional[UploadFile] = File(None),
+    manifest: Optional[UploadFile] = File(None),
+    agent_id: Optional[str] = Form(None),
+    customer_id: Optional[str] = Form(None),
+    language: str = Form("en"),
+    force_reprocess: bool = Form(False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ingest many recordings in one request, as separate file parts and/or a
+    zip or tar archive
+    Per-file agent_id, customer_id and language come from a manifest (a
+    manifest part, or manifest.json / manifest.csv inside the archive),
+    falling back to the form fields. Identical files in the batch share one
+    call. All calls are inserted in one transaction and enqueued as a
+    single Celery group.
+    """
+    entries = []
+    committed = False
+    try:
+        if not files and not archive:
+            raise HTTPException(
+                status_code=400,
+                detail="Provide audio files, an archive, or both"
+            )
+
+        try:
+            batch_ingest_service.check_item_count(len(files))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        metadata = {}
+        if manifest is not None:
+            limit = batch_ingest_service.max_manifest_size
+            content = await manifest.read(limit + 1)
+            if len(content) > limit:
+                raise HTTPException(status_code=400, detail=f"Manifest exceeds {limit} bytes")
+            try:
+                metadata.update(parse_manifest(content, manifest.filename))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        entries.extend(await _save_files(files))
+
+        if archive is not None:
+            try:
+                # Extraction is disk-bound; keep it off the event loop
+                extracted = await run_in_threadpool(
+                    extract_archive, archive.file, archive.filename, len(files)
+                )
+            except (ValueError, OSError, EOFError) as e:
+                raise HTTPException(status_code=400, detail=f"Could not read archive: {str(e)}")
+            entries.extend(extracted["entries"])
+            # An explicit manifest part wins over one inside the archive
+            metadata = {**extracted["manifest"], **metadata}
+
+        items = []
+        calls = []
+        # Items per call id; a file repeated in the batch shares its first copy's call
+        by_id = defaultdict(list)
+        for entry, plan in zip(entries, plan_calls(entries, metadata, agent_id, customer_id, language)):
+            item = BatchItemStatus(
+                filename=plan["filename"],
+                status=plan["status"],
+                message=plan["message"]
+            )
+            items.append(item)
+
+            if plan["call"] is None:
+                # Rejected files and repeated copies do not become calls
+                if entry.get("file_path") and os.path.exists(entry["file_path"]):
+                    os.remove(entry["file_path"])
+                if plan["same_as"] is not None:
+                    item.call_id = item.duplicate_of = plan["same_as"]
+                    by_id[plan["same_as"]].append(item)
+                continue
+
+            call = Call(**plan["call"], processing_status="pending")
+            calls.append(call)
+            item.call_id = call.id
+            by_id[call.id].append(item)
+
+        db.add_all(calls)
+        # Sessions do not autoflush; linked segments reference these rows
+        await db.flush()
+
+        # One IN query finds every recording that was analyzed before
+        duplicates = {} if force_reprocess else await db.run_sync(
+            find_analyzed_duplicates, [call.content_hash for call in calls]
+        )
+        queued = []
+        orphaned = []
+        for call in calls:
+            existing = duplicates.get(call.content_hash)
+            if existing is None:
+                queued.append(call)
+                continue
+            orphaned.append(call.audio_path)
+            await db.run_sync(link_duplicate, call, existing)
+            for item in by_id[call.id]:
+                item.status = "completed"
+                item.duplicate_of = existing.id
+                item.message = f"Duplicate of call {existing.id}; existing analysis reused"
+
+        # A single commit for the whole batch
+        await db.commit()
+        committed = True
+
+        for file_path in orphaned:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        if queued:
+            try:
+                enqueued_at = time.time()
+                batch = group(process_call.s(str(call.id), enqueued_at=enqueued_at) for call in queued)
+                await run_in_threadpool(batch.apply_async)
+            except Exception as e:
+                logger.error(f"Error enqueueing batch of {len(queued)} calls: {str(e)}")
+                for call in queued:
+                    call.processing_status = "failed"
+                    call.error_message = f"Could not enqueue processing: {str(e)}"
+                    for item in by_id[call.id]:
+                        item.status = "failed"
+                        item.message = call.error_message
+                await db.commit()
+
+        repeated = sum(len(by_id[call.id]) - 1 for call in calls)
+        logger.info(
+            f"Batch ingest: {len(items)} items, {len(queued)} queued, "
+            f"{len(orphaned)} duplicates, {repeated} repeated within the batch"
+        )
+
+        return BatchUploadResponse(
+            total=len(items),
+            accepted=len(calls),
+            duplicates=len(orphaned) + repeated,
+            rejected=sum(item.status == "rejected" for item in items),
+            items=items
+        )
+
+    except HTTPException:
+        if not committed:
+            discard_entries(entries)
+        raise
+    except Exception as e:
+        if not committed:
+            await db.rollback()
+            discard_entries(entries)
+        logger.error(f"Unexpected error during batch upload: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred during batch upload"
+        )
@@ -1,29 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
 from typing import List, Optional
 from datetime import datetime, timedelta
 import logging
+import uuid
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models import Call
-from ..schemas import CallBase, ErrorResponse
+from ..schemas import CallBase, CallListItem, CallPage, SegmentBase, ErrorResponse
+from ..services.analytics import remove_call_from_rollups
+from ..services.persistence import CALL_PAGE_ORDER, calls_after_cursor, encode_cursor
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/calls/{call_id}", response_model=CallBase, responses={404: {"model": ErrorResponse}})
 async def get_call(
-    call_id: str,
-    db: Session = Depends(get_db)
+    call_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        call = db.query(Call).filter(Call.id == call_id).first()
+        # Segments are serialized with the call; async sessions cannot lazy-load them
+        call = await db.get(Call, call_id, options=[selectinload(Call.segments)])
         if not call:
             raise HTTPException(
                 status_code=404,
                 detail=f"Call with ID {call_id} not found"
             )
         return call
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving call {call_id}: {str(e)}")
         raise HTTPException(
@@ -31,31 +39,118 @@ async def get_call(
             detail="An error occurred while retrieving the call"
         )
 
-@router.get("/calls", response_model=List[CallBase])
+LIST_FIELDS = {
+    "agent_id",
+    "customer_id",
+    "duration",
+    "hold_time",
+    "dead_air_time",
+    "silence_segments",
+    "overtalk_count",
+    "overtalk_segments",
+    "transcription",
+    "audio_path",
+    "processing_status",
+    "error_message",
+    "language",
+    "segments"
+}
+# Without fields=, list views skip the transcription text and the segments
+DEFAULT_LIST_FIELDS = LIST_FIELDS - {
+    "transcription", "segments", "silence_segments", "overtalk_segments", "error_message"
+}
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return sorted(DEFAULT_LIST_FIELDS)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - LIST_FIELDS - {"id", "created_at"}
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return sorted(requested & LIST_FIELDS)
+
+@router.get(
+    "/calls",
+    response_model=CallPage,
+    response_model_exclude_unset=True,
+    responses={400: {"model": ErrorResponse}}
+)
 async def get_calls(
     agent_id: Optional[str] = Query(None, description="Filter by agent ID"),
     start_date: Optional[datetime] = Query(None, description="Start date for filtering"),
     end_date: Optional[datetime] = Query(None, description="End date for filtering"),
     status: Optional[str] = Query(None, description="Filter by processing status"),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of calls per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id and created_at are always included"),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """
+    List calls newest first, one page at a time
+    Pages are keyed on (created_at, id), so each page is an index range scan
+    however deep it is; segments are loaded in one batched query per page
+    """
     try:
-        query = db.query(Call)
-        
+        selected = _parse_fields(fields)
+        with_segments = "segments" in selected
+        columns = [getattr(Call, name) for name in selected if name != "segments"]
+
+        if with_segments:
+            # Entities are needed for the relationship; load only the selected columns
+            query = select(Call).options(
+                load_only(Call.id, Call.created_at, *columns),
+                selectinload(Call.segments)
+            )
+        else:
+            query = select(Call.id, Call.created_at, *columns)
+
         if agent_id:
-            query = query.filter(Call.agent_id == agent_id)
+            query = query.where(Call.agent_id == agent_id)
         
         if start_date:
-            query = query.filter(Call.created_at >= start_date)
+            query = query.where(Call.created_at >= start_date)
         
         if end_date:
-            query = query.filter(Call.created_at <= end_date)
+            query = query.where(Call.created_at <= end_date)
         
         if status:
-            query = query.filter(Call.processing_status == status)
-        
-        return query.order_by(Call.created_at.desc()).all()
+            query = query.where(Call.processing_status == status)
+
+        if cursor:
+            try:
+                query = query.where(calls_after_cursor(cursor))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        # One extra row tells whether there is a next page
+        query = query.order_by(*CALL_PAGE_ORDER).limit(limit + 1)
+        result = await db.execute(query)
+        rows = result.scalars().all() if with_segments else result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        items = []
+        for row in rows:
+            values = {"id": row.id, "created_at": row.created_at}
+            values.update({name: getattr(row, name) for name in selected if name != "segments"})
+            if with_segments:
+                values["segments"] = [
+                    SegmentBase.model_validate(segment, from_attributes=True)
+                    for segment in row.segments
+                ]
+            items.append(CallListItem(**values))
+
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        return CallPage(items=items, next_cursor=next_cursor)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving calls: {str(e)}")
         raise HTTPException(
@@ -65,20 +160,22 @@ async def get_calls(
 
 @router.delete("/calls/{call_id}", responses={404: {"model": ErrorResponse}})
 async def delete_call(
-    call_id: str,
-    db: Session = Depends(get_db)
+    call_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        call = db.query(Call).filter(Call.id == call_id).first()
+        call = await db.get(Call, call_id)
         if not call:
             raise HTTPException(
                 status_code=404,
                 detail=f"Call with ID {call_id} not found"
             )
         
-        # Soft delete
+        # Soft delete, taking the call out of the daily rollups
+        if not call.is_deleted:
+            await db.run_sync(remove_call_from_rollups, call)
         call.is_deleted = True
-        db.commit()
+        await db.commit()
         
         return {"message": f"Call {call_id} marked as deleted"}
     
@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional
+import uuid
+import time
+import logging
+
+from ..database import get_async_db, AsyncSessionLocal
+from ..models import Call
+from ..schemas import ErrorResponse
+from ..services.events import (
+    SSE_HEADERS,
+    TERMINAL_STATUSES,
+    agent_channel,
+    call_channel,
+    format_event,
+    relay,
+    subscribe
+)
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def _snapshot(call_id: uuid.UUID, agent_id: Optional[str], status: str, message: Optional[str]) -> Dict[str, Any]:
+    return {
+        "call_id": str(call_id),
+        "agent_id": agent_id,
+        "status": status,
+        "stage": None,
+        "stages_done": None,
+        "stages_total": None,
+        "percent": 100.0 if status == "completed" else None,
+        "message": message,
+        "timestamp": time.time()
+    }
+
+async def _read_status(db: AsyncSession, call_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    row = (await db.execute(
+        select(Call.agent_id, Call.processing_status, Call.error_message)
+        .where(Call.id == call_id, Call.is_deleted == False)
+    )).first()
+    if row is None:
+        return None
+    return _snapshot(call_id, row.agent_id, row.processing_status, row.error_message)
+
+async def _stream(
+    request: Request,
+    channels: List[str],
+    first: Optional[Dict[str, Any]] = None,
+    call_id: Optional[uuid.UUID] = None
+) -> AsyncIterator[str]:
+    """
+    Relay events from the broker until a call reaches a terminal status or the client leaves
+    Per-call streams (call_id set) end on completed/failed; agent streams run until disconnect
+    """
+    async with subscribe(channels) as subscription:
+        if call_id is not None:
+            yield format_event(first)
+            # The call may have moved on between the snapshot and the subscription
+            async with AsyncSessionLocal() as db:
+                current = await _read_status(db, call_id)
+            if current is None or current["status"] in TERMINAL_STATUSES:
+                if current is not None and current["status"] != first["status"]:
+                    yield format_event(current)
+                return
+
+        async for message in relay(subscription, request.is_disconnected, call_id is not None):
+            yield message
+
+@router.get("/events/calls/{call_id}", responses={404: {"model": ErrorResponse}})
+async def stream_call_progress(
+    call_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Server-sent progress events for one call; starts with its current status
+    """
+    try:
+        snapshot = await _read_status(db, call_id)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail="Call not found")
+        # Do not hold a pooled connection for the lifetime of the stream
+        await db.close()
+
+        if snapshot["status"] in TERMINAL_STATUSES:
+            async def finished():
+                yield format_event(snapshot)
+            return StreamingResponse(finished(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+        return StreamingResponse(
+            _stream(request, [call_channel(str(call_id))], snapshot, call_id),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error opening progress stream for call {call_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while opening the progress stream"
+        )
+
+@router.get("/events/agents/{agent_id}")
+async def stream_agent_progress(agent_id: str, request: Request):
+    """
+    Server-sent progress events for every call of an agent
+    """
+    return StreamingResponse(
+        _stream(request, [agent_channel(agent_id)]),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
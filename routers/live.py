@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from typing import Optional
+import logging
+
+from ..services.live import create_live_analyzer, live_analysis_service
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.websocket("/live/calls")
+async def live_call(
+    websocket: WebSocket,
+    sample_rate: int = Query(16000, description="Sample rate of the PCM frames"),
+    agent_channel: Optional[int] = Query(None, description="Channel carrying the agent (0 or 1); defaults to AGENT_CHANNEL")
+):
+    """
+    Live call analysis: send interleaved s16le stereo PCM as binary messages,
+    receive silence and overtalk events as JSON; send the text "stop" to end
+    the call and receive the closing events and a summary
+
+    Events (times in seconds from the start of the stream):
+    - silence_alert / overtalk_alert: still going after the alert threshold
+    - silence: start, end, duration, silence_type; "dead_air" when the same
+      speaker talks on both sides of it, "hold" otherwise (including before
+      the first and after the last speech), the rule batch processing uses
+    - overtalk: start, end, duration, interrupter
+    - summary: hold_time, dead_air_time, overtalk_count,
+      total_overtalk_duration, interruptions
+    """
+    try:
+        analyzer = create_live_analyzer(sample_rate, agent_channel)
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+
+    max_bytes = live_analysis_service.max_frame_bytes(sample_rate)
+    await websocket.accept()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            if message.get("bytes") is not None:
+                if len(message["bytes"]) > max_bytes:
+                    await websocket.close(
+                        code=status.WS_1009_MESSAGE_TOO_BIG,
+                        reason=f"Frames are limited to {max_bytes} bytes"
+                    )
+                    return
+                # Analysis of one frame takes microseconds; run it inline to keep latency low
+                for event in analyzer.feed(message["bytes"]):
+                    await websocket.send_json(event)
+
+            elif (message.get("text") or "").strip().lower() == "stop":
+                for event in analyzer.close():
+                    await websocket.send_json(event)
+                await websocket.close()
+                return
+
+    except WebSocketDisconnect:
+        logger.info(f"Live call disconnected after {analyzer.position:.1f}s")
+    except Exception as e:
+        logger.error(f"Error analyzing live call: {str(e)}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
@@ -0,0 +1,311 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
+import logging
+import uuid
+
+from ..database import get_async_db
+from ..models import Call, UploadSession
+from ..schemas import CallResponse, ErrorResponse, UploadSessionCreate, UploadSessionStatus
+from ..services.storage import storage_service, parse_content_range, UploadTooLargeError
+from ..services.uploads import (
+    abandon_part,
+    claim_finalize,
+    complete_finalize,
+    finish_part,
+    received_ranges,
+    release_finalize,
+    start_part,
+    wait_for_parts
+)
+from .upload import link_or_enqueue
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+async def _status(db: AsyncSession, session: UploadSession) -> UploadSessionStatus:
+    ranges = await db.run_sync(received_ranges, session.id)
+    # Contiguous bytes from the start of the file: where a client resumes
+    received_offset = ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+    return UploadSessionStatus(
+        session_id=session.id,
+        status=session.status,
+        total_size=session.total_size,
+        received_offset=received_offset,
+        received_ranges=ranges,
+        call_id=session.call_id
+    )
+
+async def _finalized(db: AsyncSession, session: UploadSession) -> CallResponse:
+    """
+    Response for a session that was finalized before: the call created then
+    """
+    call = await db.get(Call, session.call_id)
+    return CallResponse(
+        message="Upload already finalized",
+        call_id=session.call_id,
+        status=call.processing_status if call else "unknown"
+    )
+
+async def _recover_finalize(
+    db: AsyncSession,
+    session: UploadSession,
+    call_id: uuid.UUID,
+    claimed_at: datetime,
+    completed: bool,
+    file_path: Optional[str],
+    error: Exception
+):
+    """
+    Clean up after a finalize that failed partway
+    If this attempt's commit went through, only enqueueing failed and the
+    call is marked failed; if it still holds the claim, the session is
+    reopened and the file moved back. A finalize that took the session
+    over meanwhile is left alone
+    """
+    try:
+        await db.rollback()
+        await db.refresh(session)
+        if session.status == "finalized":
+            call = await db.get(Call, call_id) if completed else None
+            if call:
+                call.processing_status = "failed"
+                call.error_message = f"Could not enqueue processing: {str(error)}"
+        elif await db.run_sync(release_finalize, session.id, claimed_at):
+            if file_path:
+                await storage_service.reopen_upload(file_path, session.file_path)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Error recovering upload session {session.id}: {str(e)}")
+
+async def _get_session(db: AsyncSession, session_id: uuid.UUID) -> UploadSession:
+    session = await db.get(UploadSession, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Upload session {session_id} not found"
+        )
+    return session
+
+@router.post("/uploads", response_model=UploadSessionStatus, responses={400: {"model": ErrorResponse}, 413: {"model": ErrorResponse}})
+async def create_upload_session(
+    payload: UploadSessionCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        # Validate file type before a single byte is sent
+        if not payload.filename.lower().endswith(('.wav', '.mp3', '.ogg')):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid file type. Only WAV, MP3, and OGG files are supported."
+            )
+
+        session_id = uuid.uuid4()
+        extension = payload.filename.split('.')[-1]
+        file_path = storage_service.create_upload_target(session_id, extension, payload.total_size)
+
+        session = UploadSession(
+            id=session_id,
+            filename=payload.filename,
+            total_size=payload.total_size,
+            file_path=file_path,
+            agent_id=payload.agent_id,
+            customer_id=payload.customer_id,
+            language=payload.language
+        )
+        db.add(session)
+        await db.commit()
+
+        return await _status(db, session)
+
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating upload session: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while creating the upload session"
+        )
+
+@router.put("/uploads/{session_id}", response_model=UploadSessionStatus, responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def upload_range(
+    session_id: uuid.UUID,
+    request: Request,
+    content_range: str = Header(..., description="bytes <start>-<end>/<total>, end inclusive"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        session = await _get_session(db, session_id)
+        if session.status != "open":
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload session {session_id} is already {session.status}"
+            )
+
+        try:
+            start, length = parse_content_range(content_range, session.total_size)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Re-check the status as the part is recorded; finalize waits for recorded parts
+        part = await db.run_sync(start_part, session.id, start, start + length)
+        await db.commit()
+        if part is None:
+            await db.refresh(session)
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload session {session_id} is already {session.status}"
+            )
+
+        try:
+            # Write the body straight into place in the preallocated file
+            await storage_service.write_range(
+                session.file_path,
+                start,
+                length,
+                request.stream()
+            )
+        except Exception as e:
+            await db.run_sync(abandon_part, part)
+            await db.commit()
+            if isinstance(e, ValueError):
+                raise HTTPException(status_code=400, detail=str(e))
+            raise
+
+        # The part counts as received only once all of its bytes are on disk
+        await db.run_sync(finish_part, part)
+        await db.commit()
+
+        return await _status(db, session)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading range for session {session_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while uploading the range"
+        )
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionStatus, responses={404: {"model": ErrorResponse}})
+async def get_upload_session(
+    session_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await _status(db, await _get_session(db, session_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving upload session {session_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while retrieving the upload session"
+        )
+
+@router.post("/uploads/{session_id}/finalize", response_model=CallResponse, responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def finalize_upload_session(
+    session_id: uuid.UUID,
+    force_reprocess: bool = Query(False, description="Process even if identical audio was analyzed before"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Turn a complete upload into a call
+    The session is claimed with a conditional update first, so of two
+    concurrent requests only one moves the file, and no part can start
+    after it; parts already being written are waited for. If a later step
+    fails the file is moved back and the session can be finalized again;
+    a claim left behind by a finalize that died is taken over once it is
+    older than UPLOAD_FINALIZE_TIMEOUT_SECONDS
+    """
+    try:
+        session = await _get_session(db, session_id)
+
+        # Finalizing twice returns the call created the first time
+        if session.status == "finalized":
+            return await _finalized(db, session)
+
+        # Parts still being written may complete the upload; they are waited for below
+        ranges = await db.run_sync(received_ranges, session.id, True)
+        if ranges != [[0, session.total_size]]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete; received ranges: {ranges}"
+            )
+
+        claim = await db.run_sync(claim_finalize, session.id)
+        await db.commit()
+        if claim is None:
+            await db.refresh(session)
+            if session.status == "finalized":
+                return await _finalized(db, session)
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload session {session_id} is already {session.status}"
+            )
+        claimed_at, call_id = claim
+
+        if not await wait_for_parts(db, session.id):
+            await db.run_sync(release_finalize, session.id, claimed_at)
+            await db.commit()
+            raise HTTPException(
+                status_code=409,
+                detail="Parts of the upload are still being written; finalize again once they finish"
+            )
+        ranges = await db.run_sync(received_ranges, session.id)
+        if ranges != [[0, session.total_size]]:
+            await db.run_sync(release_finalize, session.id, claimed_at)
+            await db.commit()
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete; received ranges: {ranges}"
+            )
+
+        extension = session.filename.split('.')[-1]
+        file_path = None
+        completed = False
+        try:
+            file_path, content_hash = await storage_service.finalize_upload(
+                session.file_path,
+                call_id,
+                extension
+            )
+
+            call = Call(
+                id=call_id,
+                agent_id=session.agent_id,
+                customer_id=session.customer_id,
+                language=session.language,
+                audio_path=file_path
+            )
+            db.add(call)
+            await db.flush()
+            completed = await db.run_sync(complete_finalize, session.id, claimed_at, call_id)
+            if not completed:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload session {session_id} was taken over by another finalize"
+                )
+            await db.refresh(session)
+
+            # Processing is only enqueued now that the whole file is present
+            return await link_or_enqueue(db, call, file_path, content_hash, force_reprocess)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            await _recover_finalize(db, session, call_id, claimed_at, completed, file_path, e)
+            raise
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error finalizing upload session {session_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while finalizing the upload"
+        )
@@ -1,28 +1,77 @@
 from fastapi import APIRouter, UploadFile, Form, Depends, HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 import shutil
 import os
+import time
 import uuid
 from typing import Optional
 import logging
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models import Call
 from ..schemas import CallCreate, CallResponse, ErrorResponse
-from ..services.storage import save_audio_file
+from ..services.storage import save_audio_file, UploadTooLargeError
+from ..services.persistence import find_analyzed_duplicate, link_duplicate
 from ..tasks import process_call
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/upload", response_model=CallResponse, responses={400: {"model": ErrorResponse}})
+async def link_or_enqueue(
+    db: AsyncSession,
+    call: Call,
+    file_path: str,
+    content_hash: str,
+    force_reprocess: bool = False
+) -> CallResponse:
+    """
+    Finish an upload whose audio is stored
+    Identical audio that was already analyzed is reused instead of
+    enqueueing work; otherwise the call is queued for processing
+    """
+    call.content_hash = content_hash
+
+    # The ORM helpers are shared with the Celery tasks; run them on the session's sync facade
+    existing = None if force_reprocess else await db.run_sync(
+        find_analyzed_duplicate, content_hash, call.id
+    )
+    if existing:
+        await db.run_sync(link_duplicate, call, existing)
+        await db.commit()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        logger.info(f"Call {call.id} is a duplicate of {existing.id}")
+
+        return CallResponse(
+            message=f"Duplicate of call {existing.id}; existing analysis reused",
+            call_id=call.id,
+            status="completed"
+        )
+
+    # Update call record with file path
+    call.audio_path = file_path
+    call.processing_status = "pending"
+    await db.commit()
+
+    # Trigger background processing; publishing to the broker is blocking I/O
+    await run_in_threadpool(process_call.delay, str(call.id), enqueued_at=time.time())
+
+    return CallResponse(
+        message="File uploaded successfully",
+        call_id=call.id,
+        status="pending"
+    )
+
+@router.post("/upload", response_model=CallResponse, responses={400: {"model": ErrorResponse}, 413: {"model": ErrorResponse}})
 async def upload_file(
     file: UploadFile,
     agent_id: str = Form(...),
     customer_id: Optional[str] = Form(None),
     language: str = Form("en"),
-    db: Session = Depends(get_db)
+    force_reprocess: bool = Form(False),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Validate file type
@@ -44,31 +93,26 @@ async def upload_file(
             audio_path=f"audio/{call_id}.{file.filename.split('.')[-1]}"
         )
         db.add(call)
-        db.commit()
+        await db.commit()
 
         try:
-            # Save the uploaded file
-            file_path = await save_audio_file(file, call_id)
-            
-            # Update call record with file path
-            call.audio_path = file_path
-            call.processing_status = "pending"
-            db.commit()
+            # Save the uploaded file, hashing it as it streams
+            file_path, content_hash = await save_audio_file(file, call_id)
 
-            # Trigger background processing
-            process_call.delay(str(call_id))
+            return await link_or_enqueue(db, call, file_path, content_hash, force_reprocess)
 
-            return CallResponse(
-                message="File uploaded successfully",
-                call_id=call_id,
-                status="pending"
-            )
+        except UploadTooLargeError as e:
+            call.processing_status = "failed"
+            call.error_message = str(e)
+            await db.commit()
+            logger.warning(f"Rejected upload for call {call_id}: {str(e)}")
+            raise HTTPException(status_code=413, detail=str(e))
 
         except Exception as e:
             # If file saving fails, update call status
             call.processing_status = "failed"
             call.error_message = str(e)
-            db.commit()
+            await db.commit()
             logger.error(f"Error processing file: {str(e)}")
             raise HTTPException(
                 status_code=500,
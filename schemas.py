@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Dict
+from datetime import datetime, date
 import uuid
 
 class SegmentBase(BaseModel):
@@ -18,6 +18,16 @@ class SegmentBase(BaseModel):
             raise ValueError('Time values cannot be negative')
         return v
 
+class SilenceSegment(BaseModel):
+    start: float
+    end: float
+    type: str  # hold, dead_air
+
+class OvertalkSegment(BaseModel):
+    start: float
+    end: float
+    interrupter: str  # speaker whose turn started the overlap
+
 class CallBase(BaseModel):
     id: uuid.UUID
     agent_id: str
@@ -26,7 +36,9 @@ class CallBase(BaseModel):
     duration: Optional[float] = None
     hold_time: float = 0.0
     dead_air_time: float = 0.0
+    silence_segments: Optional[List[SilenceSegment]] = None
     overtalk_count: int = 0
+    overtalk_segments: Optional[List[OvertalkSegment]] = None
     transcription: Optional[str] = None
     audio_path: str
     processing_status: str
@@ -58,4 +70,75 @@ class CallResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     error: str
-    details: Optional[str] = None 
\ No newline at end of file
+    details: Optional[str] = None 
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int = Field(..., gt=0)
+    agent_id: str
+    customer_id: Optional[str] = None
+    language: str = "en"
+
+class UploadSessionStatus(BaseModel):
+    session_id: uuid.UUID
+    status: str
+    total_size: int
+    received_offset: int
+    received_ranges: List[List[int]] = []
+    call_id: Optional[uuid.UUID] = None
+
+class BatchItemStatus(BaseModel):
+    filename: str
+    call_id: Optional[uuid.UUID] = None
+    status: str  # pending, completed (duplicate reused), rejected
+    message: Optional[str] = None
+    duplicate_of: Optional[uuid.UUID] = None  # earlier call, or the call a file repeated in the batch shares
+
+class BatchUploadResponse(BaseModel):
+    total: int
+    accepted: int
+    duplicates: int
+    rejected: int
+    items: List[BatchItemStatus] = []
+
+class CallListItem(BaseModel):
+    """Call in a list view; only the requested fields are set"""
+    id: uuid.UUID
+    created_at: datetime
+    agent_id: Optional[str] = None
+    customer_id: Optional[str] = None
+    duration: Optional[float] = None
+    hold_time: Optional[float] = None
+    dead_air_time: Optional[float] = None
+    silence_segments: Optional[List[SilenceSegment]] = None
+    overtalk_count: Optional[int] = None
+    overtalk_segments: Optional[List[OvertalkSegment]] = None
+    transcription: Optional[str] = None
+    audio_path: Optional[str] = None
+    processing_status: Optional[str] = None
+    error_message: Optional[str] = None
+    language: Optional[str] = None
+    segments: Optional[List[SegmentBase]] = None
+
+    class Config:
+        orm_mode = True
+
+class CallPage(BaseModel):
+    items: List[CallListItem] = []
+    next_cursor: Optional[str] = None  # pass back as cursor= to get the next page
+
+class AgentStats(BaseModel):
+    agent_id: str
+    day: Optional[date] = None  # None for totals over a date range
+    call_count: int
+    total_duration: float
+    average_duration: float
+    total_hold_time: float
+    average_hold_time: float
+    total_dead_air_time: float
+    average_dead_air_time: float
+    total_overtalk_count: int
+    average_overtalk_count: float
+    total_overtalk_duration: float
+    average_overtalk_duration: float
+    sentiment_distribution: Dict[str, int]
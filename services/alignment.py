@@ -0,0 +1,115 @@
+import heapq
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class AlignmentService:
+    def align_words(
+        self,
+        words: List[Dict[str, Any]],
+        segments: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Copies of the diarization segments, each with the transcript words it covers as text
+        Words and turns are walked in a single sweep over both timelines; a
+        heap keyed by end time holds the turns active at the current word, so
+        each turn is pushed and popped once however long the turns around it
+        """
+        try:
+            # Fill copies so the caller's diarization result is left as it was
+            segments = [dict(segment) for segment in segments]
+            turns = sorted(segments, key=lambda x: x["start_time"])
+            if not turns:
+                return segments
+
+            assigned = [[] for _ in turns]
+            active = []  # (end_time, index) of turns started but not ended
+            next_turn = 0
+            last_ended = None
+
+            for word in sorted(words, key=lambda x: x["start"]):
+                midpoint = (word["start"] + word["end"]) / 2
+
+                while next_turn < len(turns) and turns[next_turn]["start_time"] <= midpoint:
+                    heapq.heappush(active, (turns[next_turn]["end_time"], next_turn))
+                    next_turn += 1
+                # Turns that ended before this word cannot match any later word
+                while active and active[0][0] <= midpoint:
+                    last_ended = heapq.heappop(active)[1]
+
+                assigned[self._best_turn(turns, active, last_ended, next_turn, word, midpoint)].append(word["word"])
+
+            for turn, turn_words in zip(turns, assigned):
+                turn["text"] = " ".join(turn_words)
+
+            return segments
+
+        except Exception as e:
+            logger.error(f"Error aligning words to segments: {str(e)}")
+            raise
+
+    def _best_turn(
+        self,
+        turns: List[Dict[str, Any]],
+        active: List[Tuple[float, int]],
+        last_ended: Optional[int],
+        next_turn: int,
+        word: Dict[str, Any],
+        midpoint: float
+    ) -> int:
+        """
+        Pick the turn for a word among the turns active at its midpoint
+        Prefers the largest overlap, then the shorter turn (an interjection inside
+        a long turn); words in gaps go to the nearer of the turn that ended
+        last and the next one to start
+        """
+        if active:
+            def rank(i: int) -> tuple:
+                turn = turns[i]
+                overlap = min(word["end"], turn["end_time"]) - max(word["start"], turn["start_time"])
+                return (overlap, turn["start_time"] - turn["end_time"], -i)
+
+            return max((i for _, i in active), key=rank)
+
+        candidates = [i for i in (last_ended, next_turn) if i is not None and i < len(turns)]
+        return min(
+            candidates,
+            key=lambda i: max(
+                turns[i]["start_time"] - midpoint,
+                midpoint - turns[i]["end_time"],
+                0.0
+            )
+        )
+
+    def get_speaker_text(
+        self,
+        segments: List[Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Concatenate the aligned text of each speaker in time order
+        """
+        try:
+            speaker_text = {}
+            for segment in sorted(segments, key=lambda x: x["start_time"]):
+                if segment["text"]:
+                    speaker_text.setdefault(segment["speaker"], []).append(segment["text"])
+
+            return {
+                speaker: " ".join(texts)
+                for speaker, texts in speaker_text.items()
+            }
+
+        except Exception as e:
+            logger.error(f"Error building speaker text: {str(e)}")
+            raise
+
+# Create a singleton instance
+alignment_service = AlignmentService()
+
+# Export functions for use in tasks
+def align_words(words: List[Dict[str, Any]], segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return alignment_service.align_words(words, segments)
+
+def get_speaker_text(segments: List[Dict[str, Any]]) -> Dict[str, str]:
+    return alignment_service.get_speaker_text(segments)
@@ -0,0 +1,277 @@
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Dict, Any, Optional
+from sqlalchemy import func, delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Call, AgentDailyStats
+
+logger = logging.getLogger(__name__)
+
+# Columns of agent_daily_stats that are running totals
+TOTAL_COLUMNS = [
+    "call_count",
+    "total_duration",
+    "total_hold_time",
+    "total_dead_air_time",
+    "total_overtalk_count",
+    "total_overtalk_duration",
+    "positive_segments",
+    "negative_segments",
+    "neutral_segments"
+]
+
+class AnalyticsService:
+    def _call_day(self, call: Call) -> date:
+        """
+        Rollup day of a call: its creation date in UTC
+        """
+        created_at = call.created_at or datetime.now(timezone.utc)
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc)
+        return created_at.date()
+
+    def _call_totals(self, call: Call) -> Dict[str, Any]:
+        """
+        A single call's contribution to its agent's daily totals
+        """
+        distribution = (call.sentiment_summary or {}).get("sentiment_distribution", {})
+        return {
+            "call_count": 1,
+            "total_duration": call.duration or 0.0,
+            "total_hold_time": call.hold_time or 0.0,
+            "total_dead_air_time": call.dead_air_time or 0.0,
+            "total_overtalk_count": call.overtalk_count or 0,
+            "total_overtalk_duration": sum(
+                segment["end"] - segment["start"] for segment in call.overtalk_segments or []
+            ),
+            "positive_segments": distribution.get("positive", 0),
+            "negative_segments": distribution.get("negative", 0),
+            "neutral_segments": distribution.get("neutral", 0)
+        }
+
+    def record_call(self, db: Session, call: Call):
+        """
+        Add a completed call to its agent's daily rollup in the current transaction
+        Does nothing if the call is already counted
+        """
+        try:
+            if call.in_rollup:
+                return
+            self._apply(db, call.agent_id, self._call_day(call), self._call_totals(call))
+            call.in_rollup = True
+
+        except Exception as e:
+            logger.error(f"Error adding call {call.id} to rollups: {str(e)}")
+            raise
+
+    def remove_call(self, db: Session, call: Call):
+        """
+        Subtract a call from its agent's daily rollup in the current transaction
+        Must run before the call's results are overwritten; does nothing if
+        the call is not counted
+        """
+        try:
+            if not call.in_rollup:
+                return
+            totals = {column: -value for column, value in self._call_totals(call).items()}
+            self._apply(db, call.agent_id, self._call_day(call), totals)
+            call.in_rollup = False
+
+        except Exception as e:
+            logger.error(f"Error removing call {call.id} from rollups: {str(e)}")
+            raise
+
+    def _apply(self, db: Session, agent_id: str, day: date, totals: Dict[str, Any]):
+        """
+        Add deltas to one (agent, day) row, creating it if needed
+        A single atomic upsert on PostgreSQL and SQLite, so concurrent
+        workers completing calls for the same agent never lose an update
+        """
+        table = AgentDailyStats.__table__
+        dialect = db.get_bind().dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = dialect_insert(table).values(agent_id=agent_id, day=day, **totals)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.agent_id, table.c.day],
+                set_={
+                    **{column: table.c[column] + stmt.excluded[column] for column in totals},
+                    "updated_at": func.now()
+                }
+            )
+            db.execute(stmt)
+            return
+
+        row = db.query(AgentDailyStats).filter(
+            AgentDailyStats.agent_id == agent_id,
+            AgentDailyStats.day == day
+        ).with_for_update().first()
+        if row is None:
+            db.add(AgentDailyStats(agent_id=agent_id, day=day, **totals))
+            db.flush()
+        else:
+            for column, value in totals.items():
+                setattr(row, column, getattr(row, column) + value)
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Recompute every rollup row from the calls table, e.g. after a backfill
+        Counts completed calls that are not deleted, whether deleted through
+        the API or by retention cleanup, which both subtract from the rollups
+        Streams the calls; commits nothing. Returns the number of rows written
+        """
+        try:
+            rows: Dict[tuple, Dict[str, Any]] = {}
+            calls = db.query(Call).filter(
+                Call.processing_status == "completed",
+                Call.is_deleted == False
+            ).yield_per(1000)
+            for call in calls:
+                key = (call.agent_id, self._call_day(call))
+                row = rows.setdefault(key, {column: 0 for column in TOTAL_COLUMNS})
+                for column, value in self._call_totals(call).items():
+                    row[column] += value
+
+            db.execute(delete(AgentDailyStats))
+            db.query(Call).update({Call.in_rollup: False}, synchronize_session=False)
+            db.query(Call).filter(
+                Call.processing_status == "completed",
+                Call.is_deleted == False
+            ).update({Call.in_rollup: True}, synchronize_session=False)
+            if rows:
+                db.execute(insert(AgentDailyStats), [
+                    {"agent_id": agent_id, "day": day, **totals}
+                    for (agent_id, day), totals in rows.items()
+                ])
+
+            logger.info(f"Rebuilt {len(rows)} agent daily rollup rows")
+            return len(rows)
+
+        except Exception as e:
+            logger.error(f"Error rebuilding rollups: {str(e)}")
+            raise
+
+    def get_daily_stats(
+        self,
+        db: Session,
+        agent_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Per-agent, per-day rollups in a date range, newest day first
+        Reads one row per agent and day, never the calls themselves
+        """
+        try:
+            query = db.query(AgentDailyStats).filter(AgentDailyStats.call_count > 0)
+            if agent_id:
+                query = query.filter(AgentDailyStats.agent_id == agent_id)
+            if start_date:
+                query = query.filter(AgentDailyStats.day >= start_date)
+            if end_date:
+                query = query.filter(AgentDailyStats.day <= end_date)
+
+            rows = query.order_by(AgentDailyStats.day.desc(), AgentDailyStats.agent_id).all()
+            return [
+                self._summarize(
+                    row.agent_id,
+                    {column: getattr(row, column) for column in TOTAL_COLUMNS},
+                    day=row.day
+                )
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Error retrieving daily stats: {str(e)}")
+            raise
+
+    def get_agent_summary(
+        self,
+        db: Session,
+        agent_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Per-agent totals and averages over a date range, summed from the daily rollups
+        """
+        try:
+            query = db.query(
+                AgentDailyStats.agent_id,
+                *[func.sum(getattr(AgentDailyStats, column)).label(column) for column in TOTAL_COLUMNS]
+            )
+            if agent_id:
+                query = query.filter(AgentDailyStats.agent_id == agent_id)
+            if start_date:
+                query = query.filter(AgentDailyStats.day >= start_date)
+            if end_date:
+                query = query.filter(AgentDailyStats.day <= end_date)
+
+            rows = query.group_by(AgentDailyStats.agent_id).order_by(AgentDailyStats.agent_id).all()
+            return [
+                self._summarize(row.agent_id, {column: getattr(row, column) or 0 for column in TOTAL_COLUMNS})
+                for row in rows
+                if row.call_count
+            ]
+
+        except Exception as e:
+            logger.error(f"Error retrieving agent summary: {str(e)}")
+            raise
+
+    def _summarize(self, agent_id: str, totals: Dict[str, Any], day: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Totals plus per-call averages and the sentiment distribution
+        """
+        count = totals["call_count"]
+        return {
+            "agent_id": agent_id,
+            "day": day,
+            "call_count": count,
+            "total_duration": totals["total_duration"],
+            "average_duration": totals["total_duration"] / count if count else 0.0,
+            "total_hold_time": totals["total_hold_time"],
+            "average_hold_time": totals["total_hold_time"] / count if count else 0.0,
+            "total_dead_air_time": totals["total_dead_air_time"],
+            "average_dead_air_time": totals["total_dead_air_time"] / count if count else 0.0,
+            "total_overtalk_count": totals["total_overtalk_count"],
+            "average_overtalk_count": totals["total_overtalk_count"] / count if count else 0.0,
+            "total_overtalk_duration": totals["total_overtalk_duration"],
+            "average_overtalk_duration": totals["total_overtalk_duration"] / count if count else 0.0,
+            "sentiment_distribution": {
+                "positive": totals["positive_segments"],
+                "negative": totals["negative_segments"],
+                "neutral": totals["neutral_segments"]
+            }
+        }
+
+# Create a singleton instance
+analytics_service = AnalyticsService()
+
+# Export functions for use in tasks and routers
+def add_call_to_rollups(db: Session, call: Call):
+    return analytics_service.record_call(db, call)
+
+def remove_call_from_rollups(db: Session, call: Call):
+    return analytics_service.remove_call(db, call)
+
+def rebuild_rollups(db: Session) -> int:
+    return analytics_service.rebuild(db)
+
+def get_daily_stats(
+    db: Session,
+    agent_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    return analytics_service.get_daily_stats(db, agent_id, start_date, end_date)
+
+def get_agent_summary(
+    db: Session,
+    agent_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    return analytics_service.get_agent_summary(db, agent_id, start_date, end_date)
@@ -0,0 +1,240 @@
+import os
+import struct
+import logging
+import subprocess
+import tempfile
+from typing import Optional, Tuple, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Hz, what Whisper and pyannote both expect
+
+
+class DecodedAudio:
+    """
+    A recording decoded once: 16 kHz mono float32 samples in [-1, 1]
+    The samples are either an in-memory array or a read-only memory map.
+    Stereo sources can also keep their two channels as 16-bit PCM, one
+    column per channel, for channel-aware diarization
+    """
+    def __init__(
+        self,
+        samples: np.ndarray,
+        sample_rate: int = SAMPLE_RATE,
+        file_path: Optional[str] = None,
+        channels: Optional[np.ndarray] = None
+    ):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.file_path = file_path
+        self.channels = channels  # (samples, 2) int16, or None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds"""
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def is_stereo(self) -> bool:
+        return self.channels is not None
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class AudioService:
+    def __init__(self):
+        self.sample_rate = SAMPLE_RATE
+        self.chunk_size = 1 << 20  # bytes read from ffmpeg at a time
+
+    def load_audio(
+        self,
+        file_path: str,
+        mmap_dir: Optional[str] = None,
+        keep_channels: bool = False
+    ) -> DecodedAudio:
+        """
+        Decode an audio file with a single ffmpeg run
+        If mmap_dir is given the samples are spilled to disk and memory-mapped
+        With keep_channels, a stereo source also keeps its two channels;
+        mono sources (including identical left and right) do not
+        Returns a DecodedAudio shared by every processing stage
+        """
+        try:
+            if keep_channels:
+                # Keep the source's own layout rather than forcing -ac 2, which
+                # would upmix mono at -3 dB; the WAV header says which we got
+                output = ["-af", "aformat=channel_layouts=mono|stereo", "-f", "wav"]
+            else:
+                output = ["-ac", "1", "-f", "s16le"]
+            cmd = [
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0",
+                "-i", file_path,
+                *output,
+                "-acodec", "pcm_s16le",
+                "-ar", str(self.sample_rate),
+                "-"
+            ]
+
+            # stderr goes to a file: a pipe nobody reads while stdout is being
+            # drained fills up and blocks ffmpeg
+            with tempfile.TemporaryFile() as stderr:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+                try:
+                    # No header means ffmpeg failed before decoding; the exit code below reports it
+                    n_channels = (self._read_wav_header(process.stdout) or 1) if keep_channels else 1
+                    blocks = self._read_chunks(process, n_channels)
+                    if mmap_dir:
+                        samples, channels = self._read_to_memmap(blocks, mmap_dir, n_channels)
+                    else:
+                        samples, channels = self._read_to_array(blocks, n_channels)
+                    process.wait()
+                finally:
+                    if process.poll() is None:
+                        process.kill()
+                        process.wait()
+                    process.stdout.close()
+
+                if process.returncode != 0:
+                    stderr.seek(0)
+                    raise RuntimeError(
+                        f"Failed to decode audio: {stderr.read().decode(errors='ignore')}"
+                    )
+
+            # Dual mono carries no speaker separation
+            if channels is not None and np.array_equal(channels[:, 0], channels[:, 1]):
+                channels = None
+
+            audio = DecodedAudio(samples, self.sample_rate, file_path, channels)
+            logger.info(
+                f"Decoded {file_path}: {audio.duration:.1f}s, "
+                f"{'stereo' if audio.is_stereo else 'mono'}"
+            )
+            return audio
+
+        except Exception as e:
+            logger.error(f"Error decoding audio: {str(e)}")
+            raise
+
+    def _read_wav_header(self, stream) -> Optional[int]:
+        """
+        Channel count from the WAV header ffmpeg writes, leaving the stream at the first sample
+        ffmpeg cannot seek back on a pipe, so the size fields are placeholders
+        and only the chunk layout is relied on
+        """
+        if stream.read(12)[8:] != b"WAVE":
+            return None
+        channels = None
+        while True:
+            header = stream.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = header[:4], struct.unpack("<I", header[4:])[0]
+            if chunk_id == b"data":
+                return channels
+            # Chunks are padded to an even length
+            body = stream.read(size + size % 2)
+            if chunk_id == b"fmt " and len(body) >= 4:
+                channels = struct.unpack("<H", body[2:4])[0]
+
+    def _read_chunks(self, process: subprocess.Popen, n_channels: int = 1):
+        """
+        Yield (frames, n_channels) int16 blocks from the ffmpeg stdout pipe
+        """
+        frame_bytes = 2 * n_channels
+        remainder = b""
+        while True:
+            data = process.stdout.read(self.chunk_size)
+            if not data:
+                break
+            data = remainder + data
+            usable = len(data) - (len(data) % frame_bytes)
+            remainder = data[usable:]
+            yield np.frombuffer(data[:usable], np.int16).reshape(-1, n_channels)
+
+    def _downmix(self, block: np.ndarray) -> np.ndarray:
+        """
+        Mono float32 in [-1, 1] from an int16 block
+        """
+        if block.shape[1] == 1:
+            return block[:, 0].astype(np.float32) / 32768.0
+        return block.mean(axis=1, dtype=np.float32) / 32768.0
+
+    def _read_to_array(self, blocks, n_channels: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Collect the decoded blocks into one contiguous array (plus the channels)
+        """
+        mono, stereo = [], []
+        for block in blocks:
+            mono.append(self._downmix(block))
+            if n_channels == 2:
+                stereo.append(block)
+        if not mono:
+            return np.zeros(0, dtype=np.float32), None
+        return np.concatenate(mono), np.concatenate(stereo) if stereo else None
+
+    def _read_to_memmap(self, blocks, mmap_dir: str, n_channels: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Write the decoded blocks to scratch files and memory-map them
+        """
+        os.makedirs(mmap_dir, exist_ok=True)
+        mono_file = tempfile.NamedTemporaryFile(dir=mmap_dir, suffix=".f32", delete=False)
+        stereo_file = (
+            tempfile.NamedTemporaryFile(dir=mmap_dir, suffix=".s16", delete=False)
+            if n_channels == 2 else None
+        )
+        total = 0
+        try:
+            for block in blocks:
+                mono_file.write(self._downmix(block).tobytes())
+                if stereo_file is not None:
+                    stereo_file.write(block.tobytes())
+                total += len(block)
+        finally:
+            mono_file.close()
+            if stereo_file is not None:
+                stereo_file.close()
+
+        samples = self._map(mono_file.name, np.float32, (total,))
+        channels = None
+        if stereo_file is not None:
+            channels = self._map(stereo_file.name, np.int16, (total, 2))
+        if samples is None:
+            return np.zeros(0, dtype=np.float32), None
+        return samples, channels
+
+    def _map(self, path: str, dtype, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """
+        Memory-map a scratch file read-only and unlink it; None if it is empty
+        """
+        if shape[0] == 0:
+            os.remove(path)
+            return None
+
+        mapped = np.memmap(path, dtype=dtype, mode="r", shape=shape)
+        # The mapping keeps the data reachable; the directory entry is not needed
+        try:
+            os.remove(path)
+        except OSError:
+            # Windows refuses to unlink a mapped file; leave it to mmap_dir cleanup
+            logger.warning(f"Could not unlink memory-mapped audio file: {path}")
+        return mapped
+
+    def ensure_audio(self, audio: Union[str, DecodedAudio]) -> DecodedAudio:
+        """
+        Accept either a file path or already decoded audio
+        """
+        if isinstance(audio, DecodedAudio):
+            return audio
+        return self.load_audio(audio)
+
+# Create a singleton instance
+audio_service = AudioService()
+
+# Export functions for use in tasks and services
+def load_audio(file_path: str, mmap_dir: Optional[str] = None, keep_channels: bool = False) -> DecodedAudio:
+    return audio_service.load_audio(file_path, mmap_dir, keep_channels)
+
+def ensure_audio(audio: Union[str, DecodedAudio]) -> DecodedAudio:
+    return audio_service.ensure_audio(audio)
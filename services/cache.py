@@ -0,0 +1,170 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from .metrics import count_cache_event, set_cache_entries
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Two-tier cache for model results
+    Tier one is a bounded in-process LRU, tier two an optional shared
+    Redis-compatible store so every Celery worker benefits from each result
+    Counters are also exported to Prometheus, labelled with the namespace
+    """
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int = 10000,
+        redis_url: Optional[str] = None,
+        ttl: int = 7 * 24 * 3600
+    ):
+        self.namespace = namespace
+        self.max_size = max_size
+        self.redis_url = redis_url
+        self.ttl = ttl  # seconds a shared entry lives
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_errors = 0
+
+    def _get_redis(self):
+        """
+        Lazily connect to the shared tier, if one is configured
+        """
+        if self.redis_url and self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _count(self, event: str, amount: int = 1):
+        """
+        Add to one of the counters and its Prometheus twin; call with the lock held
+        """
+        if amount:
+            setattr(self, event, getattr(self, event) + amount)
+            count_cache_event(self.namespace, event, amount)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys, local tier first and then the shared tier
+        Returns a dict with only the keys that were found
+        """
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                if key in self._local:
+                    self._local.move_to_end(key)
+                    found[key] = self._local[key]
+                else:
+                    missing.append(key)
+            self._count("hits", len(found))
+
+        if missing and self.redis_url:
+            try:
+                values = self._get_redis().mget(
+                    [self._shared_key(key) for key in missing]
+                )
+                shared = {
+                    key: json.loads(value)
+                    for key, value in zip(missing, values)
+                    if value is not None
+                }
+                self._set_local(shared)
+                found.update(shared)
+                missing = [key for key in missing if key not in shared]
+                with self._lock:
+                    self._count("shared_hits", len(shared))
+            except Exception as e:
+                # The shared tier is best-effort; fall back to computing
+                logger.warning(f"Shared cache lookup failed: {str(e)}")
+                with self._lock:
+                    self._count("shared_errors")
+
+        with self._lock:
+            self._count("misses", len(missing))
+
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[str, Any]):
+        """
+        Store results in both tiers
+        """
+        if not items:
+            return
+
+        self._set_local(items)
+
+        if self.redis_url:
+            try:
+                pipe = self._get_redis().pipeline(transaction=False)
+                for key, value in items.items():
+                    pipe.setex(self._shared_key(key), self.ttl, json.dumps(value))
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Shared cache write failed: {str(e)}")
+                with self._lock:
+                    self._count("shared_errors")
+
+    def set(self, key: str, value: Any):
+        self.set_many({key: value})
+
+    def _set_local(self, items: Dict[str, Any]):
+        """
+        Insert into the LRU, evicting the least recently used entries
+        """
+        with self._lock:
+            for key, value in items.items():
+                self._local[key] = value
+                self._local.move_to_end(key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+                self._count("evictions")
+            set_cache_entries(self.namespace, len(self._local))
+
+    def clear(self):
+        """
+        Drop the local tier and reset the counters
+        The Prometheus counters keep counting; only the entries gauge drops
+        """
+        with self._lock:
+            self._local.clear()
+            set_cache_entries(self.namespace, 0)
+            self.hits = self.shared_hits = self.misses = 0
+            self.evictions = self.shared_errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit, miss and eviction counters for this process
+        """
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "size": len(self._local),
+                "max_size": self.max_size,
+                "shared": bool(self.redis_url),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "shared_errors": self.shared_errors,
+                "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,61 @@
+import logging
+import uuid
+from typing import Any, Tuple
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import StageArtifact
+
+logger = logging.getLogger(__name__)
+
+class CheckpointStore:
+    """
+    Stage outputs of one call persisted as versioned artifacts
+    Each operation uses its own short session, so stages running on
+    different threads can save concurrently
+    """
+    def __init__(self, call_id: uuid.UUID):
+        self.call_id = call_id
+
+    def load(self, stage: str, version: str) -> Tuple[bool, Any]:
+        """
+        Returns (True, payload) if the artifact exists, otherwise (False, None)
+        """
+        db = SessionLocal()
+        try:
+            artifact = db.query(StageArtifact).filter(
+                StageArtifact.call_id == self.call_id,
+                StageArtifact.stage == stage,
+                StageArtifact.version == version
+            ).first()
+            if artifact is None:
+                return False, None
+            return True, artifact.payload
+        finally:
+            db.close()
+
+    def save(self, stage: str, version: str, payload: Any):
+        """
+        Persist a stage output; an artifact saved by an earlier attempt wins
+        """
+        db = SessionLocal()
+        try:
+            db.add(StageArtifact(
+                call_id=self.call_id,
+                stage=stage,
+                version=version,
+                payload=payload
+            ))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        finally:
+            db.close()
+
+    def clear(self, db: Session):
+        """
+        Drop all artifacts of the call in the caller's transaction
+        """
+        db.execute(delete(StageArtifact).where(StageArtifact.call_id == self.call_id))
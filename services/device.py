@@ -0,0 +1,18 @@
+import os
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def resolve_device() -> str:
+    """
+    Device the models run on: MODEL_DEVICE if set, otherwise CUDA when available
+    torch is only imported the first time this is called, not when services are imported
+    """
+    device = os.getenv("MODEL_DEVICE")
+    if not device:
+        import torch
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    logger.info(f"Using device: {device}")
+    return device
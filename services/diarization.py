@@ -1,18 +1,49 @@
 import os
 import logging
-from typing import List, Dict, Any
-import torch
-from pyannote.audio import Pipeline
-from pyannote.audio.pipelines.speaker_diarization import SpeakerDiarization
+from typing import List, Dict, Any, Union
 import numpy as np
 
+from .audio import DecodedAudio, SAMPLE_RATE, ensure_audio, load_audio
+from .device import resolve_device
+from .silence_analysis import frame_rms_db, find_runs
+
 logger = logging.getLogger(__name__)
 
+FULL_SCALE_DB = 20 * np.log10(32768)  # frame_rms_db of int16 samples, relative to full scale
+
 class DiarizationService:
     def __init__(self):
         self.pipeline = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Using device: {self.device}")
+        self.model_name = "pyannote/speaker-diarization"
+        # "auto" splits stereo recordings by channel and runs pyannote on mono;
+        # "pyannote" always runs the model
+        self.channel_mode = os.getenv("DIARIZATION_CHANNEL_MODE", "auto")
+        self.agent_channel = int(os.getenv("AGENT_CHANNEL", "0"))  # 0 = left, 1 = right
+        self.channel_threshold = float(os.getenv("CHANNEL_VAD_THRESHOLD_DB", "-40"))  # dBFS
+        self.channel_bleed_margin = float(os.getenv("CHANNEL_VAD_BLEED_MARGIN_DB", "15"))
+        self.channel_frame_duration = 0.032  # seconds per RMS frame
+        self.channel_hangover = 0.3  # seconds; shorter pauses stay inside a turn
+        self.min_turn_duration = 0.2  # seconds
+
+    @property
+    def splits_channels(self) -> bool:
+        """Whether stereo recordings are diarized by channel"""
+        return self.channel_mode == "auto"
+
+    @property
+    def version(self) -> str:
+        """Identifies the settings a diarization result depends on, for checkpoints"""
+        if not self.splits_channels:
+            return self.model_name
+        return (
+            f"{self.model_name}:channels-{self.agent_channel}:{self.channel_threshold}dB:"
+            f"{self.channel_bleed_margin}dB:{self.channel_hangover}s:{self.min_turn_duration}s"
+        )
+
+    @property
+    def device(self) -> str:
+        """Torch device for the pipeline, looked up when first needed"""
+        return resolve_device()
 
     def load_pipeline(self):
         """
@@ -20,9 +51,12 @@ class DiarizationService:
         """
         try:
             if not self.pipeline:
+                # pyannote pulls in torch and lightning; only workers get here
+                from pyannote.audio import Pipeline
+
                 logger.info("Loading speaker diarization pipeline")
                 self.pipeline = Pipeline.from_pretrained(
-                    "pyannote/speaker-diarization",
+                    self.model_name,
                     use_auth_token=os.getenv("HUGGINGFACE_TOKEN"),
                     device=self.device
                 )
@@ -31,22 +65,48 @@ class DiarizationService:
             logger.error(f"Error loading pipeline: {str(e)}")
             raise
 
+    def warm_up(self):
+        """
+        Load the pipeline and run it once on a short clip
+        """
+        try:
+            self.load_pipeline()
+            noise = np.random.default_rng(0).normal(0, 0.01, 2 * SAMPLE_RATE)
+            self.diarize_audio(DecodedAudio(noise.astype(np.float32)))
+            logger.info("Diarization pipeline warmed up")
+        except Exception as e:
+            logger.error(f"Error warming up diarization pipeline: {str(e)}")
+            raise
+
     def diarize_audio(
         self,
-        file_path: str,
+        audio: Union[str, DecodedAudio],
         num_speakers: int = 2
     ) -> List[Dict[str, Any]]:
         """
-        Perform speaker diarization on an audio file
+        Perform speaker diarization on an audio file or already decoded audio
+        Two-speaker stereo recordings are split by channel; everything else
+        goes through pyannote
         Returns a list of segments with speaker information
         """
         try:
+            if isinstance(audio, str):
+                audio = load_audio(audio, keep_channels=self.splits_channels)
+            if self.splits_channels and audio.is_stereo and num_speakers == 2:
+                return self.diarize_channels(audio)
+
+            import torch
+
             if not self.pipeline:
                 self.load_pipeline()
 
-            # Apply the pipeline to the audio file
+            # Hand pyannote the in-memory waveform so it does not decode the file again
+            audio = ensure_audio(audio)
+            waveform = torch.from_numpy(np.asarray(audio.samples)).unsqueeze(0)
+
+            # Apply the pipeline to the audio
             diarization = self.pipeline(
-                file_path,
+                {"waveform": waveform, "sample_rate": audio.sample_rate},
                 num_speakers=num_speakers
             )
 
@@ -71,6 +131,64 @@ class DiarizationService:
             logger.error(f"Error performing diarization: {str(e)}")
             raise
 
+    def diarize_channels(self, audio: DecodedAudio) -> List[Dict[str, Any]]:
+        """
+        Speaker turns of a stereo recording with one party per channel
+        A frame is speech on a channel when it is above the threshold and not
+        more than the bleed margin below the other channel, so echo and
+        crosstalk leaking across do not count as the other party speaking.
+        Pauses shorter than the hangover are bridged and shorter turns dropped
+        """
+        try:
+            frame_length = max(1, int(round(self.channel_frame_duration * audio.sample_rate)))
+            frame_seconds = frame_length / audio.sample_rate
+
+            # About a minute at a time, so only one block is ever converted to float
+            step = frame_length * int(60 / frame_seconds)
+            blocks = [np.zeros((0, 2))]
+            for offset in range(0, len(audio.channels), step):
+                block = audio.channels[offset:offset + step]
+                blocks.append(np.stack(
+                    [frame_rms_db(block[:, channel], frame_length) for channel in (0, 1)],
+                    axis=1
+                ))
+            levels = np.concatenate(blocks) - FULL_SCALE_DB
+
+            voiced = (
+                (levels >= self.channel_threshold)
+                & (levels >= levels[:, ::-1] - self.channel_bleed_margin)
+            )
+
+            max_gap = int(round(self.channel_hangover / frame_seconds))
+            min_frames = int(round(self.min_turn_duration / frame_seconds))
+            segments = []
+            for channel in (0, 1):
+                starts, ends = find_runs(voiced[:, channel])
+                # Merge runs separated by pauses no longer than the hangover
+                keep = starts[1:] - ends[:-1] > max_gap
+                starts = np.concatenate([starts[:1], starts[1:][keep]])
+                ends = np.concatenate([ends[:-1][keep], ends[-1:]])
+                long_enough = ends - starts >= min_frames
+
+                speaker_type = "agent" if channel == self.agent_channel else "customer"
+                for start, end in zip(starts[long_enough], ends[long_enough]):
+                    segments.append({
+                        "speaker": f"CHANNEL_{channel}",
+                        "speaker_type": speaker_type,
+                        "start_time": float(start * frame_seconds),
+                        "end_time": float(end * frame_seconds),
+                        "text": "",  # Will be filled by transcription
+                        "confidence": 1.0
+                    })
+
+            segments.sort(key=lambda x: x["start_time"])
+            logger.info(f"Diarized {audio.duration:.1f}s of stereo audio by channel: {len(segments)} turns")
+            return segments
+
+        except Exception as e:
+            logger.error(f"Error performing channel diarization: {str(e)}")
+            raise
+
     def assign_speaker_types(
         self,
         segments: List[Dict[str, Any]],
@@ -78,11 +196,15 @@ class DiarizationService:
     ) -> List[Dict[str, Any]]:
         """
         Assign speaker types (agent/customer) based on the agent_id
+        Types already set from the channel map are kept
         """
         try:
-            # Get unique speakers
-            speakers = list(set(seg["speaker"] for seg in segments))
-            
+            if segments and all(seg.get("speaker_type") for seg in segments):
+                return segments
+
+            # Unique speakers in order of first appearance (segments are sorted by start)
+            speakers = list(dict.fromkeys(seg["speaker"] for seg in segments))
+
             # If we have exactly 2 speakers, assign types
             if len(speakers) == 2:
                 # Assume the first speaker is the agent
@@ -108,8 +230,8 @@ class DiarizationService:
 diarization_service = DiarizationService()
 
 # Export the diarize_audio function for use in tasks
-def diarize_audio(file_path: str, num_speakers: int = 2) -> List[Dict[str, Any]]:
-    return diarization_service.diarize_audio(file_path, num_speakers)
+def diarize_audio(audio: Union[str, DecodedAudio], num_speakers: int = 2) -> List[Dict[str, Any]]:
+    return diarization_service.diarize_audio(audio, num_speakers)
 
 def assign_speaker_types(segments: List[Dict[str, Any]], agent_id: str) -> List[Dict[str, Any]]:
     return diarization_service.assign_speaker_types(segments, agent_id) 
\ No newline at end of file
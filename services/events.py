@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a call's stream ends
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Disable proxy buffering so events reach the client as they are sent
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Comment line; keeps proxies and load balancers from closing an idle stream
+KEEPALIVE = ": keepalive\n\n"
+
+def call_channel(call_id: str) -> str:
+    return f"progress:call:{call_id}"
+
+def agent_channel(agent_id: str) -> str:
+    return f"progress:agent:{agent_id}"
+
+class _MemorySubscription:
+    def __init__(self, queue: asyncio.Queue):
+        self._queue = queue
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Next event, or None if nothing arrived within timeout seconds
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class InMemoryBroker:
+    """
+    In-process stand-in for Redis pub/sub, for tests and single-process setups
+    (e.g. Celery with task_always_eager); publish is safe from any thread
+    """
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    def _offer(self, queue: asyncio.Queue, event: Dict[str, Any]):
+        # A subscriber that stopped reading loses events rather than growing without bound
+        if not queue.full():
+            queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, channels: List[str]) -> AsyncIterator[_MemorySubscription]:
+        entry = (asyncio.get_running_loop(), asyncio.Queue(self.max_queue))
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(entry)
+        try:
+            yield _MemorySubscription(entry[1])
+        finally:
+            with self._lock:
+                for channel in channels:
+                    self._subscribers[channel].discard(entry)
+                    if not self._subscribers[channel]:
+                        del self._subscribers[channel]
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Next event, or None if nothing arrived within timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if message and message["type"] == "message":
+                return json.loads(message["data"])
+
+class RedisBroker:
+    """
+    Redis pub/sub: Celery workers publish, every API process fans out to its clients
+    """
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def _sync_client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import redis
+                    # Short timeouts: progress must never stall processing
+                    self._client = redis.Redis.from_url(
+                        self.url,
+                        socket_timeout=2,
+                        socket_connect_timeout=2
+                    )
+        return self._client
+
+    def publish(self, channel: str, event: Dict[str, Any]):
+        self._sync_client().publish(channel, json.dumps(event, default=str))
+
+    @asynccontextmanager
+    async def subscribe(self, channels: List[str]) -> AsyncIterator[_RedisSubscription]:
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(*channels)
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+class ProgressService:
+    def __init__(self):
+        self.backend = os.getenv("EVENTS_BROKER", "redis").lower()  # redis or memory
+        self.redis_url = os.getenv("EVENTS_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.heartbeat_interval = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+        self._broker = None
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            if self.backend == "memory":
+                self._broker = InMemoryBroker()
+            else:
+                self._broker = RedisBroker(self.redis_url)
+        return self._broker
+
+    def set_broker(self, broker):
+        """
+        Swap the broker, e.g. for an InMemoryBroker in tests
+        """
+        self._broker = broker
+
+    def publish_progress(
+        self,
+        call_id: str,
+        agent_id: Optional[str],
+        status: str,
+        stage: Optional[str] = None,
+        stages_done: Optional[int] = None,
+        stages_total: Optional[int] = None,
+        message: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Publish a progress event on the call's channel and its agent's channel
+        Best effort: a broker outage is logged and never fails processing
+        """
+        event = {
+            "call_id": str(call_id),
+            "agent_id": agent_id,
+            "status": status,
+            "stage": stage,
+            "stages_done": stages_done,
+            "stages_total": stages_total,
+            "percent": (
+                round(100 * stages_done / stages_total, 1)
+                if stages_done is not None and stages_total else
+                (100.0 if status == "completed" else None)
+            ),
+            "message": message,
+            "timestamp": time.time()
+        }
+        channels = [call_channel(str(call_id))]
+        if agent_id:
+            channels.append(agent_channel(agent_id))
+        try:
+            for channel in channels:
+                self.broker.publish(channel, event)
+        except Exception as e:
+            logger.warning(f"Could not publish progress for call {call_id}: {str(e)}")
+        return event
+
+    def format_event(self, event: Dict[str, Any]) -> str:
+        """
+        One progress event as a server-sent event
+        """
+        return f"event: progress\ndata: {json.dumps(event, default=str)}\n\n"
+
+    async def relay(
+        self,
+        subscription,
+        is_disconnected: Callable[[], Awaitable[bool]],
+        stop_on_terminal: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Format events from a subscription as SSE until the client leaves
+        Sends a keepalive after each heartbeat_interval without events; with
+        stop_on_terminal the stream also ends after a completed/failed event
+        """
+        while True:
+            event = await subscription.get(self.heartbeat_interval)
+            if await is_disconnected():
+                return
+            if event is None:
+                yield KEEPALIVE
+                continue
+            yield self.format_event(event)
+            if stop_on_terminal and event.get("status") in TERMINAL_STATUSES:
+                return
+
+# Create a singleton instance
+progress_service = ProgressService()
+
+# Export functions for use in tasks and routers
+def publish_progress(
+    call_id: str,
+    agent_id: Optional[str],
+    status: str,
+    stage: Optional[str] = None,
+    stages_done: Optional[int] = None,
+    stages_total: Optional[int] = None,
+    message: Optional[str] = None
+) -> Dict[str, Any]:
+    return progress_service.publish_progress(
+        call_id, agent_id, status, stage, stages_done, stages_total, message
+    )
+
+def subscribe(channels: List[str]):
+    return progress_service.broker.subscribe(channels)
+
+def format_event(event: Dict[str, Any]) -> str:
+    return progress_service.format_event(event)
+
+def relay(
+    subscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    stop_on_terminal: bool = False
+) -> AsyncIterator[str]:
+    return progress_service.relay(subscription, is_disconnected, stop_on_terminal)
@@ -0,0 +1,294 @@
+import io
+import os
+import csv
+import json
+import uuid
+import logging
+import tarfile
+import zipfile
+import posixpath
+from collections import Counter
+from typing import List, Dict, Any, Optional, BinaryIO
+
+from .storage import storage_service
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.ogg')
+MANIFEST_NAMES = ('manifest.json', 'manifest.csv')
+MANIFEST_FIELDS = ('agent_id', 'customer_id', 'language')
+
+def member_path(name: str) -> str:
+    """
+    Normalized path of a file inside an archive or manifest, e.g. ./a\\b.wav -> a/b.wav
+    """
+    return posixpath.normpath(name.strip().replace("\\", "/")).lstrip("/")
+
+class BatchIngestService:
+    def __init__(self):
+        self.max_items = int(os.getenv("MAX_BATCH_ITEMS", "5000"))
+        self.max_manifest_size = 16 << 20  # bytes
+
+    def parse_manifest(self, content: bytes, name: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Parse a JSON or CSV manifest into per-file metadata keyed by file name
+        JSON may be a list of objects with a filename key or an object keyed
+        by file name; CSV needs a header row with a filename column. A file
+        name may be a path inside the archive, to tell apart files with the
+        same name in different folders
+        """
+        try:
+            if name.lower().endswith('.csv'):
+                reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+                records = list(reader)
+            else:
+                data = json.loads(content)
+                if isinstance(data, dict):
+                    records = [dict(meta, filename=filename) for filename, meta in data.items()]
+                else:
+                    records = data
+
+            manifest = {}
+            for record in records:
+                filename = member_path(record.get("filename") or "")
+                if filename in ("", "."):
+                    raise ValueError("Every manifest entry needs a filename")
+                if filename in manifest:
+                    raise ValueError(f"Duplicate entry for {filename}")
+                manifest[filename] = {
+                    field: record[field]
+                    for field in MANIFEST_FIELDS
+                    if record.get(field) not in (None, "")
+                }
+            return manifest
+
+        except Exception as e:
+            logger.error(f"Error parsing manifest {name}: {str(e)}")
+            raise ValueError(f"Invalid manifest {name}: {str(e)}")
+
+    def match_metadata(
+        self,
+        entries: List[Dict[str, Any]],
+        metadata: Dict[str, Dict[str, Any]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Manifest metadata for each entry, by its path in the archive or else its bare name
+        A bare name shared by files in different folders matches none of them (None);
+        an entry the manifest does not mention gets {}, and manifest entries
+        without a file are ignored
+        """
+        basenames = Counter(posixpath.basename(member_path(entry["filename"])) for entry in entries)
+        matched = []
+        for entry in entries:
+            path = member_path(entry["filename"])
+            basename = posixpath.basename(path)
+            if path in metadata:
+                matched.append(metadata[path])
+            elif basename in metadata and basenames[basename] > 1:
+                matched.append(None)
+            else:
+                matched.append(metadata.get(basename, {}))
+        return matched
+
+    def plan_calls(
+        self,
+        entries: List[Dict[str, Any]],
+        metadata: Dict[str, Dict[str, Any]],
+        agent_id: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        language: str = "en"
+    ) -> List[Dict[str, Any]]:
+        """
+        Decide what each stored entry of a batch becomes, without touching the database
+        Manifest metadata wins over the form fields. A file identical (by
+        content_hash) to an earlier accepted file of the batch shares that
+        file's call instead of getting its own. Returns one plan per entry:
+        {filename, status, message, call, same_as} where call holds the new
+        Call's fields, same_as the id of the call a duplicate shares, and
+        status is "pending" or "rejected"
+        """
+        plans = []
+        first_copies = {}  # content_hash -> plan of the call created for it
+        for entry, meta in zip(entries, self.match_metadata(entries, metadata)):
+            plan = {
+                "filename": entry["filename"],
+                "status": "rejected",
+                "message": None,
+                "call": None,
+                "same_as": None
+            }
+            plans.append(plan)
+
+            if "error" in entry:
+                plan["message"] = entry["error"]
+                continue
+            if meta is None:
+                plan["message"] = "Several files share this name; key the manifest by path in the archive"
+                continue
+            item_agent_id = meta.get("agent_id") or agent_id
+            if not item_agent_id:
+                plan["message"] = "No agent_id in the manifest or the form"
+                continue
+
+            first = first_copies.get(entry["content_hash"])
+            plan["status"] = "pending"
+            if first is not None:
+                plan["same_as"] = first["call"]["id"]
+                plan["message"] = f"Same recording as {first['filename']} in this batch; shares its call"
+                continue
+
+            plan["call"] = {
+                "id": entry["call_id"],
+                "agent_id": item_agent_id,
+                "customer_id": meta.get("customer_id") or customer_id,
+                "language": meta.get("language") or language,
+                "audio_path": entry["file_path"],
+                "content_hash": entry["content_hash"]
+            }
+            first_copies[entry["content_hash"]] = plan
+        return plans
+
+    def check_item_count(self, count: int):
+        """
+        Reject a batch with more than max_items files in total
+        """
+        if count > self.max_items:
+            raise ValueError(f"Batch exceeds the maximum of {self.max_items} items")
+
+    def extract_archive(self, source: BinaryIO, archive_name: str, existing_items: int = 0) -> Dict[str, Any]:
+        """
+        Stream the members of a zip or tar archive straight into audio storage
+        Members are copied one chunk at a time and never held in memory; a
+        manifest.json / manifest.csv at any position in the archive is parsed.
+        existing_items (files already in the batch) count towards max_items.
+        If the archive fails partway, the files stored so far are removed.
+        Blocking; run it in the threadpool from the event loop
+        Returns {"entries": [...], "manifest": {...}} where each entry is
+        {filename, call_id, file_path, content_hash, size} or {filename, error};
+        filename is the member's path inside the archive
+        """
+        result = {"entries": [], "manifest": {}}
+        try:
+            name = archive_name.lower()
+            if name.endswith('.zip'):
+                self._extract_zip(source, result, existing_items)
+            elif name.endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')):
+                self._extract_tar(source, result, existing_items)
+            else:
+                raise ValueError("Unsupported archive type. Use zip or tar (optionally compressed).")
+            return result
+
+        except Exception as e:
+            logger.error(f"Error extracting archive {archive_name}: {str(e)}")
+            self.discard_entries(result["entries"])
+            if isinstance(e, (tarfile.TarError, zipfile.BadZipFile)):
+                raise ValueError(f"Corrupt archive: {str(e)}") from e
+            raise
+
+    def discard_entries(self, entries: List[Dict[str, Any]]):
+        """
+        Remove the stored files of entries that will not become calls
+        """
+        for entry in entries:
+            file_path = entry.get("file_path")
+            try:
+                if file_path and os.path.exists(file_path):
+                    os.remove(file_path)
+            except OSError as e:
+                logger.warning(f"Could not remove {file_path}: {str(e)}")
+
+    def _extract_zip(self, source: BinaryIO, result: Dict[str, Any], existing_items: int):
+        # The zip directory lives at the end of the file, so the (spooled) upload is read by seeking
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    self._take_member(info.filename, member, info.file_size, result, existing_items)
+
+    def _extract_tar(self, source: BinaryIO, result: Dict[str, Any], existing_items: int):
+        # Stream mode reads members strictly in order without seeking
+        with tarfile.open(fileobj=source, mode="r|*") as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                member = archive.extractfile(info)
+                self._take_member(info.name, member, info.size, result, existing_items)
+
+    def _take_member(
+        self,
+        member_name: str,
+        member: BinaryIO,
+        size: int,
+        result: Dict[str, Any],
+        existing_items: int
+    ):
+        """
+        Store one archive member as audio, or parse it as the manifest
+        Member names are only used as labels, never as paths on disk
+        """
+        path = member_path(member_name)
+        basename = posixpath.basename(path)
+        lowered = basename.lower()
+
+        if lowered in MANIFEST_NAMES:
+            # The declared size can lie; never read more than the limit
+            content = member.read(self.max_manifest_size + 1)
+            if size > self.max_manifest_size or len(content) > self.max_manifest_size:
+                raise ValueError(f"Manifest {member_name} is too large")
+            result["manifest"].update(self.parse_manifest(content, lowered))
+            return
+
+        # Skip metadata files that archivers add, e.g. __MACOSX/._name
+        if basename.startswith('.') or '__MACOSX' in member_name:
+            return
+
+        self.check_item_count(existing_items + len(result["entries"]) + 1)
+
+        if not lowered.endswith(AUDIO_EXTENSIONS):
+            result["entries"].append({
+                "filename": path,
+                "error": "Invalid file type. Only WAV, MP3, and OGG files are supported."
+            })
+            return
+
+        call_id = uuid.uuid4()
+        try:
+            file_path, content_hash, written = storage_service.save_stream(
+                member,
+                call_id,
+                basename.split('.')[-1]
+            )
+        except Exception as e:
+            result["entries"].append({"filename": path, "error": str(e)})
+            return
+
+        result["entries"].append({
+            "filename": path,
+            "call_id": call_id,
+            "file_path": file_path,
+            "content_hash": content_hash,
+            "size": written
+        })
+
+# Create a singleton instance
+batch_ingest_service = BatchIngestService()
+
+# Export functions for use in routers
+def parse_manifest(content: bytes, name: str) -> Dict[str, Dict[str, Any]]:
+    return batch_ingest_service.parse_manifest(content, name)
+
+def extract_archive(source: BinaryIO, archive_name: str, existing_items: int = 0) -> Dict[str, Any]:
+    return batch_ingest_service.extract_archive(source, archive_name, existing_items)
+
+def discard_entries(entries: List[Dict[str, Any]]):
+    batch_ingest_service.discard_entries(entries)
+
+def plan_calls(
+    entries: List[Dict[str, Any]],
+    metadata: Dict[str, Dict[str, Any]],
+    agent_id: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    language: str = "en"
+) -> List[Dict[str, Any]]:
+    return batch_ingest_service.plan_calls(entries, metadata, agent_id, customer_id, language)
@@ -0,0 +1,278 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+from .silence_analysis import frame_rms_db, silence_analysis_service, SilenceTracker
+from .overtalk import overtalk_service
+
+logger = logging.getLogger(__name__)
+
+SPEAKERS = ("agent", "customer")
+
+class LiveCallAnalyzer:
+    """
+    Silence and overtalk detection on a live two-channel call
+    Fed interleaved 16-bit PCM (one channel per speaker) in frames of any
+    size; returns events as soon as the frame that triggers them arrives.
+    Carried state is a partial RMS frame plus a few counters per stream
+    """
+    def __init__(
+        self,
+        sample_rate: int,
+        agent_channel: int,
+        frame_duration: float,
+        silence_threshold: float,
+        min_silence_len: float,
+        min_overlap_duration: float,
+        hangover: float,
+        silence_alert: float
+    ):
+        self.sample_rate = sample_rate
+        self.silence_threshold = silence_threshold  # dBFS
+        self.silence_alert = silence_alert  # seconds
+        # Channel order of the labels in SPEAKERS
+        self.channel_order = [agent_channel, 1 - agent_channel]
+
+        self.silence = SilenceTracker(sample_rate, frame_duration, silence_threshold, min_silence_len)
+        self.frame_length = self.silence.frame_length
+        self.frame_seconds = self.silence.frame_seconds
+        self.overtalk = overtalk_service.create_tracker(self.frame_seconds, SPEAKERS)
+        self.hangover_frames = int(round(hangover / self.frame_seconds))
+
+        self._remainder = np.zeros((0, 2), dtype=np.int16)
+        self._odd_byte = b""
+        # Absolute frame index of each speaker's latest voiced frame
+        self._last_voiced = np.full(2, -(1 << 40), dtype=np.int64)
+        self._speaker_before_silence = None
+        self._silence_alerted = None
+        self._overtalk_alerted = None
+
+        self.hold_time = 0.0
+        self.dead_air_time = 0.0
+        self.overtalk_count = 0
+        self.total_overtalk_duration = 0.0
+        self.interruptions = {speaker: 0 for speaker in SPEAKERS}
+
+    @property
+    def position(self) -> float:
+        """Seconds of audio analyzed so far"""
+        return self.silence.frames_seen * self.frame_seconds
+
+    def feed(self, pcm: bytes) -> List[Dict[str, Any]]:
+        """
+        Analyze the next chunk of interleaved s16le stereo PCM
+        """
+        pcm = self._odd_byte + pcm
+        usable = len(pcm) - len(pcm) % 4
+        self._odd_byte = pcm[usable:]
+        samples = np.frombuffer(pcm[:usable], dtype=np.int16).reshape(-1, 2)
+
+        if len(self._remainder):
+            samples = np.concatenate([self._remainder, samples])
+        n_frames = len(samples) // self.frame_length
+        self._remainder = samples[n_frames * self.frame_length:].copy()
+        if not n_frames:
+            return []
+
+        block = samples[:n_frames * self.frame_length].astype(np.float32) / 32768.0
+        voiced = np.stack([
+            frame_rms_db(block[:, channel], self.frame_length) >= self.silence_threshold
+            for channel in self.channel_order
+        ])
+        return self._analyze(voiced)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        End of call: close open intervals and report totals
+        """
+        events = []
+        for start, end in self.silence.flush():
+            # Nobody spoke after it, so it cannot sit inside a turn
+            events.append(self._silence_event(start, end, "hold"))
+        for interval in self.overtalk.flush():
+            events.append(self._overtalk_event(interval))
+        events.append(self.summary())
+        return events
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "type": "summary",
+            "duration": self.position,
+            "hold_time": self.hold_time,
+            "dead_air_time": self.dead_air_time,
+            "overtalk_count": self.overtalk_count,
+            "total_overtalk_duration": self.total_overtalk_duration,
+            "interruptions": dict(self.interruptions)
+        }
+
+    def _analyze(self, voiced: np.ndarray) -> List[Dict[str, Any]]:
+        base = self.silence.frames_seen
+        frames = base + np.arange(voiced.shape[1])
+
+        # Keep a speaker active through short pauses between words
+        last_voiced = np.maximum.accumulate(
+            np.where(voiced, frames, self._last_voiced[:, None]),
+            axis=1
+        )
+        previous_voiced = np.concatenate([self._last_voiced[:, None], last_voiced[:, :-1]], axis=1)
+        self._last_voiced = last_voiced[:, -1].copy()
+        active = frames - last_voiced <= self.hangover_frames
+
+        events = []
+        for start, end in self.silence.feed_frames(~voiced.any(axis=0)):
+            events.append(self._silence_event(
+                start,
+                end,
+                self._classify(start, end, base, voiced, previous_voiced)
+            ))
+
+        # Remember who spoke last before a silence that is still going on
+        open_frame = self._frame(self.silence.open_since)
+        if open_frame is not None and open_frame >= base:
+            self._speaker_before_silence = self._latest_speaker(open_frame, base, previous_voiced)
+
+        for interval in self.overtalk.feed(active):
+            events.append(self._overtalk_event(interval))
+
+        events.extend(self._alerts())
+        return events
+
+    def _frame(self, seconds: Optional[float]) -> Optional[int]:
+        return None if seconds is None else int(round(seconds / self.frame_seconds))
+
+    def _latest_speaker(self, frame: int, base: int, previous_voiced: np.ndarray) -> Optional[str]:
+        """
+        Speaker voiced most recently before a frame of the current block
+        """
+        latest = previous_voiced[:, frame - base]
+        if latest.max() < 0:
+            return None
+        return SPEAKERS[int(np.argmax(latest))]
+
+    def _classify(
+        self,
+        start: float,
+        end: float,
+        base: int,
+        voiced: np.ndarray,
+        previous_voiced: np.ndarray
+    ) -> str:
+        """
+        Dead air if the same speaker talks on both sides of the silence, hold otherwise
+        This is classify_silence's rule; its other case, a silence inside a
+        turn, cannot arise here since live turns end after the hangover
+        """
+        start_frame = self._frame(start)
+        if start_frame >= base:
+            before = self._latest_speaker(start_frame, base, previous_voiced)
+        else:
+            before = self._speaker_before_silence
+        self._speaker_before_silence = None
+
+        # A silence closes on the first voiced frame after it, which is in this block
+        speaking = voiced[:, self._frame(end) - base]
+        after = {SPEAKERS[i] for i in np.flatnonzero(speaking)}
+        return "dead_air" if before in after else "hold"
+
+    def _alerts(self) -> List[Dict[str, Any]]:
+        """
+        Alert once per silence or overtalk that has lasted past its threshold and is still going
+        """
+        alerts = []
+        position = self.position
+
+        since = self.silence.open_since
+        if since is not None and since != self._silence_alerted and position - since >= self.silence_alert:
+            self._silence_alerted = since
+            alerts.append({
+                "type": "silence_alert",
+                "start": since,
+                "duration": position - since,
+                "position": position
+            })
+
+        since = self.overtalk.open_since
+        if (
+            since is not None and since != self._overtalk_alerted
+            and position - since >= self.overtalk.min_overlap_duration
+        ):
+            self._overtalk_alerted = since
+            alerts.append({
+                "type": "overtalk_alert",
+                "start": since,
+                "duration": position - since,
+                "interrupter": self.overtalk.open_interrupter,
+                "position": position
+            })
+        return alerts
+
+    def _silence_event(self, start: float, end: float, kind: str) -> Dict[str, Any]:
+        if kind == "dead_air":
+            self.dead_air_time += end - start
+        else:
+            self.hold_time += end - start
+        return {
+            "type": "silence",
+            "start": start,
+            "end": end,
+            "duration": end - start,
+            "silence_type": kind,
+            "position": self.position
+        }
+
+    def _overtalk_event(self, interval: Dict[str, Any]) -> Dict[str, Any]:
+        duration = interval["end"] - interval["start"]
+        self.overtalk_count += 1
+        self.total_overtalk_duration += duration
+        if interval["interrupter"] in self.interruptions:
+            self.interruptions[interval["interrupter"]] += 1
+        return {"type": "overtalk", **interval, "duration": duration, "position": self.position}
+
+class LiveAnalysisService:
+    def __init__(self):
+        self.agent_channel = int(os.getenv("AGENT_CHANNEL", "0"))  # 0 = left, 1 = right
+        self.hangover = float(os.getenv("LIVE_HANGOVER_SECONDS", "0.3"))
+        self.silence_alert = float(os.getenv("LIVE_SILENCE_ALERT_SECONDS", "5"))
+        self.max_frame_seconds = float(os.getenv("LIVE_MAX_FRAME_SECONDS", "1"))
+        self.sample_rates: Tuple[int, ...] = (8000, 16000, 44100, 48000)
+
+    def create_analyzer(
+        self,
+        sample_rate: int,
+        agent_channel: Optional[int] = None
+    ) -> LiveCallAnalyzer:
+        """
+        New analyzer for one live call, using the batch services' thresholds
+        """
+        if sample_rate not in self.sample_rates:
+            raise ValueError(f"Unsupported sample rate {sample_rate}")
+        if agent_channel is None:
+            agent_channel = self.agent_channel
+        if agent_channel not in (0, 1):
+            raise ValueError("agent_channel must be 0 or 1")
+
+        silence = silence_analysis_service
+        return LiveCallAnalyzer(
+            sample_rate,
+            agent_channel,
+            silence.frame_duration,
+            silence.silence_threshold,
+            silence.min_silence_len,
+            overtalk_service.min_overlap_duration,
+            self.hangover,
+            self.silence_alert
+        )
+
+    def max_frame_bytes(self, sample_rate: int) -> int:
+        """
+        Largest accepted PCM message: max_frame_seconds of 16-bit stereo
+        """
+        return int(self.max_frame_seconds * sample_rate) * 4
+
+# Create a singleton instance
+live_analysis_service = LiveAnalysisService()
+
+# Export functions for use in routers and benchmarks
+def create_live_analyzer(sample_rate: int, agent_channel: Optional[int] = None) -> LiveCallAnalyzer:
+    return live_analysis_service.create_analyzer(sample_rate, agent_channel)
@@ -0,0 +1,301 @@
+import os
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server
+)
+
+try:
+    import resource
+except ImportError:
+    # Windows has no getrusage; peak RSS is not recorded there
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Stages range from milliseconds (overtalk) to many minutes (Whisper on CPU)
+STAGE_SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+AUDIO_SECONDS_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+REALTIME_FACTOR_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+RSS_BYTES_BUCKETS = tuple(mb * 1024 * 1024 for mb in (128, 256, 512, 1024, 2048, 4096, 8192, 16384))
+QUEUE_WAIT_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600)
+
+STAGE_WALL_SECONDS = Histogram(
+    "call_stage_wall_seconds", "Wall time of a call processing stage",
+    ["stage"], buckets=STAGE_SECONDS_BUCKETS
+)
+STAGE_CPU_SECONDS = Histogram(
+    "call_stage_cpu_seconds", "CPU time of the thread that ran a call processing stage",
+    ["stage"], buckets=STAGE_SECONDS_BUCKETS
+)
+STAGE_AUDIO_SECONDS = Histogram(
+    "call_stage_audio_seconds", "Seconds of audio a call processing stage ran on",
+    ["stage"], buckets=AUDIO_SECONDS_BUCKETS
+)
+STAGE_REALTIME_FACTOR = Histogram(
+    "call_stage_realtime_factor", "Stage wall time divided by the audio duration",
+    ["stage"], buckets=REALTIME_FACTOR_BUCKETS
+)
+STAGE_RSS_GROWTH_BYTES = Histogram(
+    "call_stage_rss_growth_bytes", "Growth of the worker's resident memory while a stage ran",
+    ["stage"], buckets=RSS_BYTES_BUCKETS
+)
+WORKER_PEAK_RSS_BYTES = Histogram(
+    "worker_peak_rss_bytes", "Peak resident memory of the worker process after a call",
+    buckets=RSS_BYTES_BUCKETS
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "call_queue_wait_seconds", "Time from enqueueing a call until a worker starts it",
+    buckets=QUEUE_WAIT_BUCKETS
+)
+CALL_PROCESSING_SECONDS = Histogram(
+    "call_processing_seconds", "Wall time of a whole process_call run",
+    ["status"], buckets=STAGE_SECONDS_BUCKETS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "API request latency",
+    ["method", "route", "status"]
+)
+# One counter per ResultCache counter, labelled with the cache's namespace
+CACHE_EVENTS = {
+    "hits": Counter(
+        "result_cache_hits", "Cache lookups answered by the local tier", ["namespace"]
+    ),
+    "shared_hits": Counter(
+        "result_cache_shared_hits", "Cache lookups answered by the shared tier", ["namespace"]
+    ),
+    "misses": Counter(
+        "result_cache_misses", "Cache lookups found in neither tier", ["namespace"]
+    ),
+    "evictions": Counter(
+        "result_cache_evictions", "Entries evicted from the local tier", ["namespace"]
+    ),
+    "shared_errors": Counter(
+        "result_cache_shared_errors", "Failed reads and writes of the shared tier", ["namespace"]
+    )
+}
+CACHE_ENTRIES = Gauge(
+    "result_cache_entries", "Entries in the local cache tier",
+    ["namespace"], multiprocess_mode="livesum"
+)
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Resident memory of this process right now; None where /proc is missing
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    High-water mark of this process's resident memory since it started
+    A process-wide figure, so it is recorded per call, never per stage
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class StageTimer:
+    """
+    Collects the cost of each stage of one pipeline run
+    measure() runs on the thread executing the stage, so thread CPU time
+    covers that stage alone; native threads a library starts (e.g. torch
+    intra-op threads) are not included. Memory is the current RSS sampled
+    before and after the stage; stages running concurrently share the
+    process, so their growth overlaps
+    """
+    def __init__(self):
+        self.records: Dict[str, Dict[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, stage: str):
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        rss_started = current_rss_bytes()
+        try:
+            yield
+        finally:
+            rss_finished = current_rss_bytes()
+            record = {
+                "wall_seconds": time.perf_counter() - wall_started,
+                "cpu_seconds": time.thread_time() - cpu_started,
+                "rss_growth_bytes": (
+                    None if rss_started is None or rss_finished is None
+                    else max(0, rss_finished - rss_started)
+                )
+            }
+            with self._lock:
+                self.records[stage] = record
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template
+    Latency runs until the response starts, so long-lived streams (SSE)
+    count their time to first byte; paths no route matches share one label
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        recorded = False
+
+        async def send_and_record(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                observe_request(
+                    scope["method"],
+                    _route_template(scope),
+                    message["status"],
+                    time.perf_counter() - started
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        except Exception:
+            if not recorded:
+                observe_request(scope["method"], _route_template(scope), 500, time.perf_counter() - started)
+            raise
+
+def _route_template(scope) -> str:
+    """
+    Path template of the matching route, e.g. /calls/{call_id}, to keep label cardinality bounded
+    """
+    from starlette.routing import Match
+
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+class MetricsService:
+    def __init__(self):
+        # Set for multi-process servers (uvicorn workers, Celery prefork); see prometheus_client docs
+        self.multiprocess_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+        self.worker_port = int(os.getenv("WORKER_METRICS_PORT", "0"))  # 0 disables the worker server
+
+    def observe_stages(self, timer: StageTimer, audio_seconds: Optional[float] = None):
+        """
+        Record every stage the timer measured, and the worker's peak memory once
+        Audio-relative metrics need audio_seconds
+        """
+        for stage, record in timer.records.items():
+            STAGE_WALL_SECONDS.labels(stage).observe(record["wall_seconds"])
+            STAGE_CPU_SECONDS.labels(stage).observe(record["cpu_seconds"])
+            if record["rss_growth_bytes"] is not None:
+                STAGE_RSS_GROWTH_BYTES.labels(stage).observe(record["rss_growth_bytes"])
+            if audio_seconds:
+                STAGE_AUDIO_SECONDS.labels(stage).observe(audio_seconds)
+                STAGE_REALTIME_FACTOR.labels(stage).observe(record["wall_seconds"] / audio_seconds)
+
+        peak = peak_rss_bytes()
+        if peak is not None:
+            WORKER_PEAK_RSS_BYTES.observe(peak)
+
+    def observe_queue_wait(self, enqueued_at: float):
+        # Clocks of the API and worker hosts may disagree slightly; never record a negative wait
+        QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - enqueued_at))
+
+    def observe_call(self, status: str, seconds: float):
+        CALL_PROCESSING_SECONDS.labels(status).observe(seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+    def count_cache_event(self, namespace: str, event: str, amount: int = 1):
+        """
+        Add to a result cache counter: hits, shared_hits, misses, evictions or shared_errors
+        """
+        CACHE_EVENTS[event].labels(namespace).inc(amount)
+
+    def set_cache_entries(self, namespace: str, size: int):
+        CACHE_ENTRIES.labels(namespace).set(size)
+
+    def registry(self) -> CollectorRegistry:
+        """
+        Registry to expose: every process's samples in multiprocess mode, this process's otherwise
+        """
+        if not self.multiprocess_dir:
+            return REGISTRY
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+
+    def render(self) -> Tuple[bytes, str]:
+        """
+        Current metrics in the Prometheus text format, with its content type
+        """
+        return generate_latest(self.registry()), CONTENT_TYPE_LATEST
+
+    def start_worker_server(self):
+        """
+        Serve /metrics for a Celery worker on WORKER_METRICS_PORT
+        """
+        if not self.worker_port:
+            return
+        if not self.multiprocess_dir:
+            logger.warning(
+                "PROMETHEUS_MULTIPROC_DIR is not set; the worker metrics server "
+                "only sees stages run in its own process"
+            )
+        start_http_server(self.worker_port, registry=self.registry())
+        logger.info(f"Worker metrics served on port {self.worker_port}")
+
+    def mark_process_dead(self, pid: int):
+        """
+        Drop a finished process's live gauges from the multiprocess directory
+        """
+        if self.multiprocess_dir:
+            multiprocess.mark_process_dead(pid)
+
+# Create a singleton instance
+metrics_service = MetricsService()
+
+# Export functions for use in tasks, routers and the worker
+def observe_stages(timer: StageTimer, audio_seconds: Optional[float] = None):
+    metrics_service.observe_stages(timer, audio_seconds)
+
+def observe_queue_wait(enqueued_at: float):
+    metrics_service.observe_queue_wait(enqueued_at)
+
+def observe_call(status: str, seconds: float):
+    metrics_service.observe_call(status, seconds)
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    metrics_service.observe_request(method, route, status, seconds)
+
+def count_cache_event(namespace: str, event: str, amount: int = 1):
+    metrics_service.count_cache_event(namespace, event, amount)
+
+def set_cache_entries(namespace: str, size: int):
+    metrics_service.set_cache_entries(namespace, size)
+
+def render_metrics() -> Tuple[bytes, str]:
+    return metrics_service.render()
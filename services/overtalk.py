@@ -1,82 +1,254 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional
 import numpy as np
 
+from .silence_analysis import RunTracker
+
 logger = logging.getLogger(__name__)
 
+class OvertalkTracker:
+    """
+    Incremental overtalk detector for live audio, fed per-frame voice activity
+    of each speaker block by block. State is the open overlap (if any) and
+    each speaker's current turn start, so it stays bounded on any call length
+    """
+    def __init__(
+        self,
+        frame_seconds: float,
+        min_overlap_duration: float,
+        labels: Tuple[str, ...] = ("agent", "customer")
+    ):
+        self.frame_seconds = frame_seconds
+        self.min_overlap_duration = min_overlap_duration
+        self.labels = labels
+        self._runs = RunTracker()
+        self._was_active = np.zeros(len(labels), dtype=bool)
+        self._turn_start = np.zeros(len(labels), dtype=np.int64)
+        self._open_interrupter = None
+
+    def feed(self, active: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Consume the next block of activity, shape (speakers, frames)
+        Returns the overtalk intervals at least min_overlap_duration long that closed within it
+        """
+        if not active.shape[1]:
+            return []
+
+        base = self._runs.frames_seen
+        frames = base + np.arange(active.shape[1])
+
+        # Frame index where each speaker's current turn began
+        previous = np.concatenate([self._was_active[:, None], active[:, :-1]], axis=1)
+        rising = active & ~previous
+        turn_start = np.maximum.accumulate(
+            np.where(rising, frames, self._turn_start[:, None]),
+            axis=1
+        )
+        self._was_active = active[:, -1].copy()
+        self._turn_start = turn_start[:, -1].copy()
+
+        # Overtalk runs wherever two or more speakers are active
+        overlapping = active.sum(axis=0) >= 2
+        closed = self._runs.feed(overlapping)
+
+        # The speaker whose turn started last is the one who interrupted;
+        # on a tie the later label, as in analyze_overtalk
+        def interrupter(start: int) -> str:
+            if start < base:
+                return self._open_interrupter
+            latest = turn_start[::-1, start - base]
+            return self.labels[len(self.labels) - 1 - int(np.argmax(latest))]
+
+        results = []
+        for start, end in closed:
+            if (end - start) * self.frame_seconds >= self.min_overlap_duration:
+                results.append(self._interval(start, end, interrupter(start)))
+
+        if self._runs.run_start is not None:
+            self._open_interrupter = interrupter(self._runs.run_start)
+        return results
+
+    @property
+    def open_since(self) -> Optional[float]:
+        """
+        Start in seconds of the overtalk still in progress, if any
+        """
+        if self._runs.run_start is None:
+            return None
+        return self._runs.run_start * self.frame_seconds
+
+    @property
+    def open_interrupter(self) -> Optional[str]:
+        return self._open_interrupter if self._runs.run_start is not None else None
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        Close an overtalk still in progress at the end of the stream
+        """
+        interrupter = self.open_interrupter
+        return [
+            self._interval(start, end, interrupter)
+            for start, end in self._runs.flush()
+            if (end - start) * self.frame_seconds >= self.min_overlap_duration
+        ]
+
+    def _interval(self, start: int, end: int, interrupter: str) -> Dict[str, Any]:
+        return {
+            "start": start * self.frame_seconds,
+            "end": end * self.frame_seconds,
+            "interrupter": interrupter
+        }
+
 class OvertalkService:
     def __init__(self):
         self.min_overlap_duration = 0.5  # seconds
         self.confidence_threshold = 0.7
 
-    def detect_overtalk(
+    def analyze_overtalk(
         self,
         segments: List[Dict[str, Any]]
-    ) -> int:
+    ) -> Dict[str, Any]:
         """
-        Detect overlapping speech segments
-        Returns the count of overtalk instances
+        Find every interval where two or more speakers talk at once
+        Uses a vectorized sweep-line over all turn boundaries, O(n log n)
+        Returns the overlap intervals, total overtalk duration and
+        per-speaker interruption counts from a single pass
         """
         try:
-            # Sort segments by start time
-            sorted_segments = sorted(segments, key=lambda x: x["start_time"])
-            
-            # Initialize overtalk count
-            overtalk_count = 0
-            
-            # Compare each segment with the next one
-            for i in range(len(sorted_segments) - 1):
-                current_seg = sorted_segments[i]
-                next_seg = sorted_segments[i + 1]
-                
-                # Check if segments overlap
-                if self._is_overlapping(current_seg, next_seg):
-                    # Check if speakers are different
-                    if current_seg["speaker"] != next_seg["speaker"]:
-                        # Check if overlap duration is significant
-                        overlap_duration = self._get_overlap_duration(
-                            current_seg,
-                            next_seg
-                        )
-                        if overlap_duration >= self.min_overlap_duration:
-                            overtalk_count += 1
-            
-            return overtalk_count
+            # A zero-length turn would end and restart the count in the middle of an overlap
+            segments = [seg for seg in segments if seg["end_time"] > seg["start_time"]]
+            if not segments:
+                return {
+                    "overtalk_count": 0,
+                    "overtalk_segments": [],
+                    "total_overtalk_duration": 0.0,
+                    "interruptions": {},
+                    "total_duration": 0.0,
+                    "overtalk_percentage": 0.0,
+                    "min_overlap_duration": self.min_overlap_duration
+                }
+
+            total_duration = max(seg["end_time"] for seg in segments)
+            labels, codes = np.unique(
+                [str(seg["speaker"]) for seg in segments],
+                return_inverse=True
+            )
+            starts = np.array([seg["start_time"] for seg in segments], dtype=float)
+            ends = np.array([seg["end_time"] for seg in segments], dtype=float)
+
+            # Merge each speaker's own turns so self-overlap never counts as overtalk
+            merged = [
+                self._merge_intervals(starts[codes == code], ends[codes == code])
+                for code in range(len(labels))
+            ]
+            turn_starts = np.concatenate([m[0] for m in merged])
+            turn_ends = np.concatenate([m[1] for m in merged])
+            turn_speakers = np.concatenate([
+                np.full(len(m[0]), code) for code, m in enumerate(merged)
+            ])
+
+            # One +1 event per turn start and one -1 event per turn end;
+            # at equal times ends sort first so touching turns do not overlap
+            times = np.concatenate([turn_starts, turn_ends])
+            deltas = np.concatenate([
+                np.ones(len(turn_starts), dtype=int),
+                -np.ones(len(turn_ends), dtype=int)
+            ])
+            who = np.concatenate([turn_speakers, turn_speakers])
+            order = np.lexsort((deltas, times))
+            times, deltas, who = times[order], deltas[order], who[order]
+
+            # Overtalk runs wherever two or more speakers are active
+            overlapping = np.cumsum(deltas) >= 2
+            previous = np.concatenate([[False], overlapping[:-1]])
+            entering = overlapping & ~previous
+            leaving = ~overlapping & previous
+
+            interval_starts = times[entering]
+            interval_ends = times[leaving]
+            # The speaker whose turn start pushed the count to two is the interrupter
+            interrupters = who[entering]
+
+            keep = (interval_ends - interval_starts) >= self.min_overlap_duration
+            interval_starts = interval_starts[keep]
+            interval_ends = interval_ends[keep]
+            interrupters = interrupters[keep]
+
+            counts = np.bincount(interrupters, minlength=len(labels))
+            total_overtalk = float(np.sum(interval_ends - interval_starts))
+
+            return {
+                "overtalk_count": int(len(interval_starts)),
+                "overtalk_segments": [
+                    {
+                        "start": float(start),
+                        "end": float(end),
+                        "interrupter": str(labels[speaker])
+                    }
+                    for start, end, speaker in zip(interval_starts, interval_ends, interrupters)
+                ],
+                "total_overtalk_duration": total_overtalk,
+                "interruptions": {
+                    str(label): int(count) for label, count in zip(labels, counts)
+                },
+                "total_duration": total_duration,
+                "overtalk_percentage": (
+                    total_overtalk / total_duration * 100
+                    if total_duration > 0 else 0.0
+                ),
+                "min_overlap_duration": self.min_overlap_duration
+            }
 
         except Exception as e:
-            logger.error(f"Error detecting overtalk: {str(e)}")
+            logger.error(f"Error analyzing overtalk: {str(e)}")
             raise
 
-    def _is_overlapping(
+    def _merge_intervals(
         self,
-        seg1: Dict[str, Any],
-        seg2: Dict[str, Any]
-    ) -> bool:
+        starts: np.ndarray,
+        ends: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Check if two segments overlap in time
+        Merge overlapping intervals into their disjoint union
         """
-        try:
-            return seg1["end_time"] > seg2["start_time"]
-        except Exception as e:
-            logger.error(f"Error checking segment overlap: {str(e)}")
-            raise
+        if len(starts) == 0:
+            return starts, ends
+
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], ends[order]
 
-    def _get_overlap_duration(
+        # A new group starts wherever a turn begins after everything before it ended
+        reach = np.maximum.accumulate(ends)
+        new_group = np.concatenate([[True], starts[1:] > reach[:-1]])
+        group_starts = np.flatnonzero(new_group)
+
+        return starts[group_starts], np.maximum.reduceat(ends, group_starts)
+
+    def detect_overtalk(
         self,
-        seg1: Dict[str, Any],
-        seg2: Dict[str, Any]
-    ) -> float:
+        segments: List[Dict[str, Any]]
+    ) -> int:
         """
-        Calculate the duration of overlap between two segments
+        Detect overlapping speech segments
+        Returns the count of overtalk instances
         """
         try:
-            overlap_start = max(seg1["start_time"], seg2["start_time"])
-            overlap_end = min(seg1["end_time"], seg2["end_time"])
-            return max(0, overlap_end - overlap_start)
+            return self.analyze_overtalk(segments)["overtalk_count"]
+
         except Exception as e:
-            logger.error(f"Error calculating overlap duration: {str(e)}")
+            logger.error(f"Error detecting overtalk: {str(e)}")
             raise
 
+    def create_tracker(
+        self,
+        frame_seconds: float,
+        labels: Tuple[str, ...] = ("agent", "customer")
+    ) -> OvertalkTracker:
+        """
+        New incremental detector using this service's minimum overlap
+        """
+        return OvertalkTracker(frame_seconds, self.min_overlap_duration, labels)
+
     def get_overtalk_summary(
         self,
         segments: List[Dict[str, Any]]
@@ -85,26 +257,7 @@ class OvertalkService:
         Generate a summary of overtalk analysis
         """
         try:
-            overtalk_count = self.detect_overtalk(segments)
-            
-            # Calculate total call duration
-            if segments:
-                total_duration = max(seg["end_time"] for seg in segments)
-            else:
-                total_duration = 0.0
-            
-            # Calculate overtalk percentage
-            overtalk_percentage = (
-                (overtalk_count * self.min_overlap_duration / total_duration * 100)
-                if total_duration > 0 else 0.0
-            )
-            
-            return {
-                "overtalk_count": overtalk_count,
-                "total_duration": total_duration,
-                "overtalk_percentage": overtalk_percentage,
-                "min_overlap_duration": self.min_overlap_duration
-            }
+            return self.analyze_overtalk(segments)
 
         except Exception as e:
             logger.error(f"Error generating overtalk summary: {str(e)}")
@@ -114,8 +267,11 @@ class OvertalkService:
 overtalk_service = OvertalkService()
 
 # Export functions for use in tasks
+def analyze_overtalk(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return overtalk_service.analyze_overtalk(segments)
+
 def detect_overtalk(segments: List[Dict[str, Any]]) -> int:
     return overtalk_service.detect_overtalk(segments)
 
 def get_overtalk_summary(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
-    return overtalk_service.get_overtalk_summary(segments) 
\ No newline at end of file
+    return overtalk_service.get_overtalk_summary(segments)
@@ -0,0 +1,246 @@
+import os
+import io
+import csv
+import uuid
+import base64
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import insert, delete, and_, or_
+from sqlalchemy.orm import Session
+
+from models import Call, Segment
+from .analytics import analytics_service
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_COLUMNS = [
+    "id",
+    "call_id",
+    "speaker",
+    "speaker_type",
+    "start_time",
+    "end_time",
+    "text",
+    "sentiment",
+    "confidence"
+]
+
+# Call listings page newest first; id breaks ties between calls created together
+CALL_PAGE_ORDER = (Call.created_at.desc(), Call.id.desc())
+
+class PersistenceService:
+    def __init__(self):
+        # COPY is only used on PostgreSQL through psycopg2
+        self.use_copy = os.getenv("SEGMENT_COPY", "true").lower() == "true"
+
+    def _segment_rows(
+        self,
+        call_id: uuid.UUID,
+        segments: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Flatten pipeline segments into column dicts for a bulk insert
+        """
+        return [
+            {
+                "id": uuid.uuid4(),
+                "call_id": call_id,
+                "speaker": segment["speaker"],
+                "speaker_type": segment.get("speaker_type"),
+                "start_time": segment["start_time"],
+                "end_time": segment["end_time"],
+                "text": segment.get("text") or "",
+                "sentiment": segment.get("sentiment"),
+                "confidence": segment.get("confidence")
+            }
+            for segment in segments
+        ]
+
+    def replace_segments(
+        self,
+        db: Session,
+        call_id: uuid.UUID,
+        segments: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Replace a call's segments in the current transaction
+        Rows are written in one round trip: COPY on PostgreSQL, otherwise a
+        single executemany-style INSERT; nothing is committed here
+        Returns the number of rows written
+        """
+        try:
+            # Makes retries and reprocessing idempotent
+            db.execute(delete(Segment).where(Segment.call_id == call_id))
+
+            rows = self._segment_rows(call_id, segments)
+            if not rows:
+                return 0
+
+            if self._can_copy(db):
+                self._copy_rows(db, rows)
+            else:
+                db.execute(insert(Segment), rows)
+
+            logger.info(f"Wrote {len(rows)} segments for call {call_id}")
+            return len(rows)
+
+        except Exception as e:
+            logger.error(f"Error writing segments for call {call_id}: {str(e)}")
+            raise
+
+    def _can_copy(self, db: Session) -> bool:
+        dialect = db.get_bind().dialect
+        return self.use_copy and dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+    def _copy_rows(self, db: Session, rows: List[Dict[str, Any]]):
+        """
+        Stream rows through PostgreSQL COPY on the session's own connection
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                "" if row[column] is None else str(row[column])
+                for column in SEGMENT_COLUMNS
+            ])
+        buffer.seek(0)
+
+        # Unquoted empty fields are NULL, except for text which is never NULL
+        sql = (
+            f"COPY {Segment.__tablename__} ({', '.join(SEGMENT_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (text))"
+        )
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(sql, buffer)
+        finally:
+            cursor.close()
+
+    def find_analyzed_duplicate(
+        self,
+        db: Session,
+        content_hash: str,
+        exclude_id: Optional[uuid.UUID] = None
+    ) -> Optional[Call]:
+        """
+        Most recent completed, non-deleted call with the same audio content
+        """
+        query = db.query(Call).filter(
+            Call.content_hash == content_hash,
+            Call.processing_status == "completed",
+            Call.is_deleted == False
+        )
+        if exclude_id is not None:
+            query = query.filter(Call.id != exclude_id)
+        return query.order_by(Call.created_at.desc()).first()
+
+    def find_analyzed_duplicates(
+        self,
+        db: Session,
+        content_hashes: List[str]
+    ) -> Dict[str, Call]:
+        """
+        Batch form of find_analyzed_duplicate: one IN query for many hashes
+        Returns the most recent completed, non-deleted call per matching hash
+        """
+        hashes = list(set(content_hashes))
+        if not hashes:
+            return {}
+
+        calls = db.query(Call).filter(
+            Call.content_hash.in_(hashes),
+            Call.processing_status == "completed",
+            Call.is_deleted == False
+        ).order_by(Call.created_at.desc()).all()
+
+        duplicates = {}
+        for call in calls:
+            duplicates.setdefault(call.content_hash, call)
+        return duplicates
+
+    def link_duplicate(self, db: Session, call: Call, source: Call) -> int:
+        """
+        Give a call the analysis of an identical recording instead of reprocessing it
+        Copies the call-level results and the segments in the current transaction
+        Returns the number of segments copied
+        """
+        try:
+            call.duplicate_of = source.id
+            call.audio_path = source.audio_path
+            call.transcription = source.transcription
+            call.duration = source.duration
+            call.hold_time = source.hold_time
+            call.dead_air_time = source.dead_air_time
+            call.silence_segments = source.silence_segments
+            call.overtalk_count = source.overtalk_count
+            call.overtalk_segments = source.overtalk_segments
+            call.sentiment_summary = source.sentiment_summary
+            call.processing_status = "completed"
+            analytics_service.record_call(db, call)
+
+            rows = db.query(
+                Segment.speaker,
+                Segment.speaker_type,
+                Segment.start_time,
+                Segment.end_time,
+                Segment.text,
+                Segment.sentiment,
+                Segment.confidence
+            ).filter(Segment.call_id == source.id).all()
+
+            return self.replace_segments(db, call.id, [row._asdict() for row in rows])
+
+        except Exception as e:
+            logger.error(f"Error linking call {call.id} to {source.id}: {str(e)}")
+            raise
+
+    def encode_cursor(self, created_at: datetime, call_id: uuid.UUID) -> str:
+        """
+        Opaque keyset cursor for the last call of a page in CALL_PAGE_ORDER
+        """
+        raw = f"{created_at.isoformat()}|{call_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, cursor: str) -> Tuple[datetime, uuid.UUID]:
+        """
+        Inverse of encode_cursor; raises ValueError for anything it did not produce
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            created_at, call_id = raw.split("|")
+            return datetime.fromisoformat(created_at), uuid.UUID(call_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def after_cursor(self, cursor: str):
+        """
+        Filter for the calls that follow a cursor in CALL_PAGE_ORDER
+        """
+        created_at, call_id = self.decode_cursor(cursor)
+        return or_(
+            Call.created_at < created_at,
+            and_(Call.created_at == created_at, Call.id < call_id)
+        )
+
+# Create a singleton instance
+persistence_service = PersistenceService()
+
+# Export functions for use in tasks and routers
+def replace_segments(db: Session, call_id: uuid.UUID, segments: List[Dict[str, Any]]) -> int:
+    return persistence_service.replace_segments(db, call_id, segments)
+
+def find_analyzed_duplicate(db: Session, content_hash: str, exclude_id: Optional[uuid.UUID] = None) -> Optional[Call]:
+    return persistence_service.find_analyzed_duplicate(db, content_hash, exclude_id)
+
+def find_analyzed_duplicates(db: Session, content_hashes: List[str]) -> Dict[str, Call]:
+    return persistence_service.find_analyzed_duplicates(db, content_hashes)
+
+def link_duplicate(db: Session, call: Call, source: Call) -> int:
+    return persistence_service.link_duplicate(db, call, source)
+
+def encode_cursor(created_at: datetime, call_id: uuid.UUID) -> str:
+    return persistence_service.encode_cursor(created_at, call_id)
+
+def calls_after_cursor(cursor: str):
+    return persistence_service.after_cursor(cursor)
@@ -0,0 +1,212 @@
+import os
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        depends_on: Iterable[str] = (),
+        version: Optional[str] = None
+    ):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.version = version  # None for intermediate stages that are never checkpointed
+
+class StageGraph:
+    """
+    Dependency graph of processing stages run on a thread pool
+    A stage starts as soon as every stage it depends on has finished, so
+    independent branches run concurrently and a call takes roughly as long
+    as its longest branch
+
+    With a checkpoint store, versioned stages save their output and a later
+    run restores it instead of recomputing; intermediate stages only run
+    when a stage that still has to run needs them
+
+    An optional listener is called as listener(event, stage, done, total)
+    with event "started", "finished" or "failed"; done counts the stages
+    that are finished, restored or skipped. An optional timer's
+    measure(stage) context manager wraps each stage on its worker thread
+    """
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        checkpoint=None,
+        listener: Optional[Callable[[str, str, int, int], None]] = None,
+        timer=None
+    ):
+        self.max_workers = max_workers or int(os.getenv("PIPELINE_MAX_WORKERS", "3"))
+        self.checkpoint = checkpoint
+        self.listener = listener
+        self.timer = timer
+        self.stages: Dict[str, Stage] = {}
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        depends_on: Iterable[str] = (),
+        version: Optional[str] = None
+    ) -> "StageGraph":
+        """
+        Register a stage; func receives each dependency's result as a keyword argument
+        Dependencies must be added first, which keeps the graph acyclic
+        Versioned stages must return JSON-serializable results
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage {name} is already defined")
+        stage = Stage(name, func, depends_on, version)
+        missing = [dep for dep in stage.depends_on if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+        self.stages[name] = stage
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every stage in dependency order
+        Returns the result of each stage by name; the first failure is re-raised
+        without waiting for stages still running, which are abandoned
+        """
+        results = self._restore()
+        required = self._required(results)
+        pending = {
+            name: stage for name, stage in self.stages.items()
+            if name in required
+        }
+        running = {}
+        total = len(self.stages)
+        finished = total - len(pending)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or running:
+                ready = [
+                    stage for stage in pending.values()
+                    if all(dep in results for dep in stage.depends_on)
+                ]
+                for stage in ready:
+                    del pending[stage.name]
+                    kwargs = {dep: results[dep] for dep in stage.depends_on}
+                    running[executor.submit(self._run_stage, stage, kwargs)] = stage.name
+                    self._notify("started", stage.name, finished, total)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        self._notify("failed", name, finished, total)
+                        raise
+                    finished += 1
+                    self._notify("finished", name, finished, total)
+
+        except BaseException:
+            # Return at once, e.g. on a Celery soft time limit: queued stages are
+            # cancelled and running ones abandoned. Their threads finish in the
+            # background and still save checkpoints; their results are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        executor.shutdown()
+        return results
+
+    def _notify(self, event: str, stage: str, done: int, total: int):
+        """
+        Report progress to the listener; listener errors never fail the run
+        """
+        if self.listener is None:
+            return
+        try:
+            self.listener(event, stage, done, total)
+        except Exception as e:
+            logger.warning(f"Progress listener failed on {event} of stage {stage}: {str(e)}")
+
+    def stage_version(self, name: str) -> Optional[str]:
+        """
+        Version of a stage's output: its own version combined with those of
+        every stage it reads, so upgrading a model invalidates everything downstream
+        """
+        stage = self.stages[name]
+        if stage.version is None:
+            return None
+        parts = [f"{stage.name}={stage.version}"]
+        parts.extend(
+            f"{dep}={self.stage_version(dep)}"
+            for dep in stage.depends_on
+            if self.stages[dep].version is not None
+        )
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+
+    def _restore(self) -> Dict[str, Any]:
+        """
+        Load every versioned stage output already in the checkpoint store
+        """
+        restored = {}
+        if self.checkpoint is None:
+            return restored
+
+        for name, stage in self.stages.items():
+            if stage.version is None:
+                continue
+            try:
+                found, payload = self.checkpoint.load(name, self.stage_version(name))
+            except Exception as e:
+                logger.warning(f"Could not load checkpoint for stage {name}: {str(e)}")
+                continue
+            if found:
+                logger.info(f"Restored stage {name} from checkpoint")
+                restored[name] = payload
+
+        return restored
+
+    def _required(self, restored: Dict[str, Any]) -> set:
+        """
+        Stages that still have to run: everything not restored, except
+        intermediate stages whose dependents are all restored
+        """
+        required = set()
+        # Dependencies are added first, so reversed order visits dependents first
+        for name in reversed(list(self.stages)):
+            if name in restored:
+                continue
+            stage = self.stages[name]
+            dependents = [other.name for other in self.stages.values() if name in other.depends_on]
+            if (
+                stage.version is not None
+                or not dependents
+                or any(dependent in required for dependent in dependents)
+            ):
+                required.add(name)
+        return required
+
+    def _run_stage(self, stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        """
+        Run a single stage, logging failures with the stage name
+        """
+        try:
+            logger.info(f"Starting stage {stage.name}")
+            with self.timer.measure(stage.name) if self.timer is not None else nullcontext():
+                result = stage.func(**kwargs)
+            logger.info(f"Finished stage {stage.name}")
+        except Exception as e:
+            logger.error(f"Error in stage {stage.name}: {str(e)}")
+            raise
+
+        if self.checkpoint is not None and stage.version is not None:
+            try:
+                self.checkpoint.save(stage.name, self.stage_version(stage.name), result)
+            except Exception as e:
+                # A missing checkpoint only costs recomputation on retry
+                logger.warning(f"Could not save checkpoint for stage {stage.name}: {str(e)}")
+
+        return result
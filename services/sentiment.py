@@ -1,17 +1,29 @@
 import os
+import re
+import hashlib
 import logging
-from typing import List, Dict, Any
-import torch
-from transformers import pipeline
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from typing import List, Dict, Any, Optional
+
+from .cache import ResultCache
+from .device import resolve_device
 
 logger = logging.getLogger(__name__)
 
 class SentimentService:
     def __init__(self):
         self.pipeline = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Using device: {self.device}")
+        self.batch_size = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))  # segments per forward pass
+        self.model_name = "distilbert-base-uncased-fine-tuned-sst-2-english"
+        self.cache = ResultCache(
+            "sentiment",
+            max_size=int(os.getenv("SENTIMENT_CACHE_SIZE", "10000")),
+            redis_url=os.getenv("SENTIMENT_CACHE_REDIS_URL") or None
+        )
+
+    @property
+    def device(self) -> str:
+        """Device the classifier runs on"""
+        return resolve_device()
 
     def load_pipeline(self, model_name: str = "distilbert-base-uncased-fine-tuned-sst-2-english"):
         """
@@ -19,7 +31,11 @@ class SentimentService:
         """
         try:
             if not self.pipeline:
+                # Deferred: importing transformers costs seconds
+                from transformers import pipeline
+
                 logger.info(f"Loading sentiment analysis model: {model_name}")
+                self.model_name = model_name
                 self.pipeline = pipeline(
                     "sentiment-analysis",
                     model=model_name,
@@ -30,6 +46,18 @@ class SentimentService:
             logger.error(f"Error loading model: {str(e)}")
             raise
 
+    def warm_up(self):
+        """
+        Load the model and run one inference, bypassing the result cache
+        """
+        try:
+            self.load_pipeline()
+            self._infer_batch(["Thank you for calling."])
+            logger.info("Sentiment model warmed up")
+        except Exception as e:
+            logger.error(f"Error warming up sentiment model: {str(e)}")
+            raise
+
     def analyze_sentiment(
         self,
         text: str,
@@ -40,41 +68,140 @@ class SentimentService:
         Returns sentiment label and score
         """
         try:
+            key = self._cache_key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
             if not self.pipeline:
                 self.load_pipeline()
 
             # Process the text
-            result = self.pipeline(text)[0]
-            
-            return {
+            result = self.pipeline(text, truncation=True)[0]
+            sentiment_result = {
                 "sentiment": result["label"].lower(),
                 "confidence": result["score"]
             }
+            self.cache.set(key, sentiment_result)
+            
+            return sentiment_result
 
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {str(e)}")
             raise
 
+    def _cache_key(self, text: str) -> str:
+        """
+        Content hash of the normalized text plus the model name
+        Case is folded only for uncased models, where it cannot change the result
+        """
+        normalized = re.sub(r"\s+", " ", text).strip()
+        if "uncased" in self.model_name:
+            normalized = normalized.lower()
+        digest = hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def analyze_batch(
+        self,
+        texts: List[str],
+        language: str = "en",
+        batch_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze sentiment of many texts in length-bucketed batches
+        Cached and repeated texts are answered without running the model
+        """
+        try:
+            keys = [self._cache_key(text) for text in texts]
+            found = self.cache.get_many(set(keys))
+
+            # Run the model once per distinct uncached text
+            pending = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in pending:
+                    pending[key] = text
+
+            if pending:
+                computed = dict(zip(
+                    pending.keys(),
+                    self._infer_batch(list(pending.values()), batch_size)
+                ))
+                self.cache.set_many(computed)
+                found.update(computed)
+
+            return [found[key] for key in keys]
+
+        except Exception as e:
+            logger.error(f"Error analyzing sentiment batch: {str(e)}")
+            raise
+
+    def _infer_batch(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the model over texts in length-bucketed batches
+        Texts are sorted by length so each batch pads only to its own longest
+        member, then results are scattered back to the input order. Character
+        length stands in for token length, so the pipeline's own (truncating)
+        tokenization is the only one
+        """
+        try:
+            if not texts:
+                return []
+
+            if not self.pipeline:
+                self.load_pipeline()
+
+            batch_size = batch_size or self.batch_size
+
+            # Sort by length so similar lengths share a batch
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+            results = [None] * len(texts)
+            for start in range(0, len(order), batch_size):
+                bucket = order[start:start + batch_size]
+                outputs = self.pipeline(
+                    [texts[i] for i in bucket],
+                    batch_size=len(bucket),
+                    truncation=True
+                )
+                for i, output in zip(bucket, outputs):
+                    results[i] = {
+                        "sentiment": output["label"].lower(),
+                        "confidence": output["score"]
+                    }
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Error running sentiment model: {str(e)}")
+            raise
+
     def analyze_segments(
         self,
         segments: List[Dict[str, Any]],
         language: str = "en"
     ) -> List[Dict[str, Any]]:
         """
-        Analyze sentiment for a list of segments
+        Analyze sentiment for a list of segments in batches
         """
         try:
+            # Only analyze segments that have text
+            indices = [i for i, segment in enumerate(segments) if segment["text"]]
+            results = self.analyze_batch(
+                [segments[i]["text"] for i in indices],
+                language
+            )
+
             for segment in segments:
-                if segment["text"]:  # Only analyze if there's text
-                    sentiment_result = self.analyze_sentiment(
-                        segment["text"],
-                        language
-                    )
-                    segment["sentiment"] = sentiment_result["sentiment"]
-                    segment["confidence"] = sentiment_result["confidence"]
-                else:
-                    segment["sentiment"] = "neutral"
-                    segment["confidence"] = 0.0
+                segment["sentiment"] = "neutral"
+                segment["confidence"] = 0.0
+
+            for i, sentiment_result in zip(indices, results):
+                segments[i]["sentiment"] = sentiment_result["sentiment"]
+                segments[i]["confidence"] = sentiment_result["confidence"]
 
             return segments
 
@@ -126,8 +253,14 @@ sentiment_service = SentimentService()
 def analyze_sentiment(text: str, language: str = "en") -> Dict[str, Any]:
     return sentiment_service.analyze_sentiment(text, language)
 
+def analyze_batch(texts: List[str], language: str = "en") -> List[Dict[str, Any]]:
+    return sentiment_service.analyze_batch(texts, language)
+
 def analyze_segments(segments: List[Dict[str, Any]], language: str = "en") -> List[Dict[str, Any]]:
     return sentiment_service.analyze_segments(segments, language)
 
 def get_sentiment_summary(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
-    return sentiment_service.get_sentiment_summary(segments) 
\ No newline at end of file
+    return sentiment_service.get_sentiment_summary(segments)
+
+def get_cache_stats() -> Dict[str, Any]:
+    return sentiment_service.cache.stats() 
\ No newline at end of file
@@ -1,124 +1,429 @@
 import os
 import logging
-from typing import Tuple
-import librosa
+from typing import Tuple, Union, List, Dict, Any, Iterator, Optional
 import numpy as np
-from pydub import AudioSegment
-import tempfile
+
+from .audio import DecodedAudio, ensure_audio
 
 logger = logging.getLogger(__name__)
 
+def frame_rms_db(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """
+    RMS level of consecutive non-overlapping frames, in dB relative to full scale
+    A trailing partial frame is ignored
+    """
+    n_frames = len(samples) // frame_length
+    frames = np.asarray(
+        samples[:n_frames * frame_length],
+        dtype=np.float32
+    ).reshape(n_frames, frame_length)
+
+    # einsum sums the squares without materializing a squared copy
+    mean_square = np.einsum("ij,ij->i", frames, frames) / frame_length
+    return 10 * np.log10(np.maximum(mean_square, 1e-20))
+
+def find_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start (inclusive) and end (exclusive) indices of each run of True values
+    """
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+def _running_argmax(values: np.ndarray) -> np.ndarray:
+    """
+    Index of the largest value so far at each position (the latest on ties)
+    """
+    positions = np.arange(len(values))
+    at_max = values == np.maximum.accumulate(values)
+    return np.maximum.accumulate(np.where(at_max, positions, 0))
+
+class RunTracker:
+    """
+    Incremental detector of runs of True in a frame mask fed block by block
+    Only the start of a run still open at the block edge is carried over,
+    so state stays constant however long the stream runs
+    """
+    def __init__(self):
+        self.frames_seen = 0
+        self.run_start = None  # frame index where the open run began
+
+    def feed(self, mask: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Consume the next block of the mask
+        Returns the runs, as absolute frame indices [start, end), that closed within it
+        """
+        if not len(mask):
+            return []
+
+        base = self.frames_seen
+        self.frames_seen += len(mask)
+        starts, ends = find_runs(mask)
+        starts = starts + base
+        ends = ends + base
+
+        closed = []
+        if self.run_start is not None:
+            if len(starts) and starts[0] == base:
+                # The open run continues into this block
+                starts[0] = self.run_start
+            else:
+                closed.append((self.run_start, base))
+            self.run_start = None
+
+        if len(ends) and ends[-1] == self.frames_seen:
+            # The last run reaches the block edge and may continue
+            self.run_start = int(starts[-1])
+            starts, ends = starts[:-1], ends[:-1]
+
+        closed.extend((int(start), int(end)) for start, end in zip(starts, ends))
+        return closed
+
+    def flush(self) -> List[Tuple[int, int]]:
+        """
+        Close a run that is still open at the end of the stream
+        """
+        if self.run_start is None:
+            return []
+        closed = [(self.run_start, self.frames_seen)]
+        self.run_start = None
+        return closed
+
+class SilenceTracker:
+    """
+    Incremental silent-run detector fed with consecutive blocks of mono samples
+    The partial frame and any still-open silent run are carried across block
+    boundaries, so the result does not depend on how the audio is split
+    """
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_duration: float,
+        silence_threshold: float,
+        min_silence_len: float
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(round(frame_duration * sample_rate)))
+        self.frame_seconds = self.frame_length / sample_rate
+        self.silence_threshold = silence_threshold  # dBFS
+        self.min_silence_len = min_silence_len  # ms
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._runs = RunTracker()
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[float, float]]:
+        """
+        Consume the next block of samples
+        Returns the silent intervals (in seconds) that closed within it
+        """
+        if len(self._remainder):
+            samples = np.concatenate([self._remainder, samples])
+        usable = len(samples) - len(samples) % self.frame_length
+        self._remainder = np.array(samples[usable:], dtype=np.float32)
+
+        silent = frame_rms_db(samples[:usable], self.frame_length) < self.silence_threshold
+        return self.feed_frames(silent)
+
+    def feed_frames(self, silent: np.ndarray) -> List[Tuple[float, float]]:
+        """
+        Consume a per-frame silence mask computed by the caller, e.g. across channels
+        """
+        return self._to_seconds(self._runs.feed(silent))
+
+    @property
+    def frames_seen(self) -> int:
+        return self._runs.frames_seen
+
+    @property
+    def open_since(self) -> Optional[float]:
+        """
+        Start in seconds of the silent run still in progress, if any
+        """
+        if self._runs.run_start is None:
+            return None
+        return self._runs.run_start * self.frame_seconds
+
+    def flush(self) -> List[Tuple[float, float]]:
+        """
+        Close a silent run that is still open at the end of the audio
+        """
+        return self._to_seconds(self._runs.flush())
+
+    def _to_seconds(self, runs: List[Tuple[int, int]]) -> List[Tuple[float, float]]:
+        """
+        Convert frame runs to seconds, dropping runs shorter than min_silence_len
+        """
+        intervals = []
+        for start, end in runs:
+            if (end - start) * self.frame_seconds * 1000 >= self.min_silence_len:
+                intervals.append((start * self.frame_seconds, end * self.frame_seconds))
+        return intervals
+
 class SilenceAnalysisService:
     def __init__(self):
-        self.silence_threshold = -40  # dB
+        self.silence_threshold = -40  # dBFS
         self.min_silence_len = 1000  # ms
         self.hold_time_threshold = 2000  # ms
+        self.frame_duration = 0.032  # seconds per RMS frame
+        self.block_duration = 10.0  # seconds read per block when streaming
+        self.streaming = os.getenv("SILENCE_STREAMING", "false").lower() == "true"
 
     def detect_silence(
         self,
-        file_path: str,
+        audio: Union[str, DecodedAudio],
         segments: list
     ) -> Tuple[float, float]:
         """
-        Detect silence periods in the audio file
+        Detect silence periods in an audio file or already decoded audio
         Returns total hold time and dead air time in seconds
         """
         try:
-            # Load audio file
-            audio = AudioSegment.from_file(file_path)
-            
-            # Convert to mono if stereo
-            if audio.channels > 1:
-                audio = audio.set_channels(1)
-            
-            # Detect silent chunks
-            silent_chunks = self._detect_silent_chunks(audio)
-            
-            # Calculate hold time and dead air time
-            hold_time, dead_air_time = self._analyze_silence(
-                silent_chunks,
+            summary = self.analyze_silence(audio, segments)
+            return summary["hold_time"], summary["dead_air_time"]
+
+        except Exception as e:
+            logger.error(f"Error detecting silence: {str(e)}")
+            raise
+
+    def analyze_silence(
+        self,
+        audio: Union[str, DecodedAudio],
+        segments: list
+    ) -> Dict[str, Any]:
+        """
+        Detect silence periods and classify them against the diarization segments
+        Returns hold time, dead air time and the silence intervals themselves
+        """
+        try:
+            # Read a file path in blocks instead of decoding it whole (SILENCE_STREAMING);
+            # process_call does the same in its silence_detection stage
+            if self.streaming and isinstance(audio, str):
+                return self.analyze_silence_streaming(audio, segments)
+
+            # Reuse the shared decoded (already mono) audio
+            audio = ensure_audio(audio)
+
+            silence_starts, silence_ends = self.detect_silent_intervals(audio)
+
+            return self.classify_silence(
+                silence_starts,
+                silence_ends,
                 segments,
-                audio.duration_seconds
+                audio.duration
             )
-            
-            return hold_time, dead_air_time
 
         except Exception as e:
-            logger.error(f"Error detecting silence: {str(e)}")
+            logger.error(f"Error analyzing silence: {str(e)}")
+            raise
+
+    def detect_silent_intervals(
+        self,
+        audio: Union[str, DecodedAudio]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find runs of frames whose RMS level is below the silence threshold
+        Returns start and end times in seconds of every run at least
+        min_silence_len long
+        """
+        try:
+            audio = ensure_audio(audio)
+
+            # The whole buffer is a single block
+            tracker = self.create_tracker(audio.sample_rate)
+            intervals = tracker.feed(audio.samples) + tracker.flush()
+
+            starts = np.array([start for start, _ in intervals], dtype=float)
+            ends = np.array([end for _, end in intervals], dtype=float)
+            return starts, ends
+
+        except Exception as e:
+            logger.error(f"Error detecting silent intervals: {str(e)}")
             raise
 
-    def _detect_silent_chunks(self, audio: AudioSegment) -> list:
+    def detect_silent_intervals_streaming(self, file_path: str) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Detect silent chunks in the audio
+        detect_silent_intervals reading the file in blocks, in constant memory
         """
         try:
-            # Split audio into chunks
-            chunks = librosa.effects.split(
-                np.array(audio.get_array_of_samples()),
-                top_db=-self.silence_threshold,
-                frame_length=1024,
-                hop_length=512
+            intervals = list(self.iter_silent_intervals(file_path))
+            starts = np.array([start for start, _ in intervals], dtype=float)
+            ends = np.array([end for _, end in intervals], dtype=float)
+            return starts, ends
+
+        except Exception as e:
+            logger.error(f"Error detecting silent intervals in streaming mode: {str(e)}")
+            raise
+
+    def create_tracker(self, sample_rate: int) -> SilenceTracker:
+        """
+        New incremental detector using this service's thresholds
+        """
+        return SilenceTracker(
+            sample_rate,
+            self.frame_duration,
+            self.silence_threshold,
+            self.min_silence_len
+        )
+
+    def iter_silent_intervals(self, file_path: str) -> Iterator[Tuple[float, float]]:
+        """
+        Read an audio file in fixed-size blocks and yield silent intervals as they close
+        Peak memory is one block regardless of the recording's length
+        """
+        import soundfile as sf
+
+        info = sf.info(file_path)
+        tracker = self.create_tracker(info.samplerate)
+        blocksize = int(self.block_duration * info.samplerate)
+
+        for block in sf.blocks(file_path, blocksize=blocksize, dtype="float32", always_2d=True):
+            # Downmix to mono
+            for interval in tracker.feed(block.mean(axis=1)):
+                yield interval
+
+        for interval in tracker.flush():
+            yield interval
+
+    def analyze_silence_streaming(
+        self,
+        file_path: str,
+        segments: list
+    ) -> Dict[str, Any]:
+        """
+        Streaming variant of analyze_silence that never holds the whole recording
+        """
+        try:
+            import soundfile as sf
+
+            silence_starts, silence_ends = self.detect_silent_intervals_streaming(file_path)
+            duration = sf.info(file_path).duration
+
+            return self.classify_silence(
+                silence_starts,
+                silence_ends,
+                segments,
+                duration
             )
-            
-            # Convert chunks to milliseconds
-            silent_chunks = []
-            for start, end in chunks:
-                start_ms = start * 1000 / audio.frame_rate
-                end_ms = end * 1000 / audio.frame_rate
-                if end_ms - start_ms >= self.min_silence_len:
-                    silent_chunks.append((start_ms, end_ms))
-            
-            return silent_chunks
 
         except Exception as e:
-            logger.error(f"Error detecting silent chunks: {str(e)}")
+            logger.error(f"Error analyzing silence in streaming mode: {str(e)}")
             raise
 
-    def _analyze_silence(
+    def classify_silence(
         self,
-        silent_chunks: list,
+        silence_starts: np.ndarray,
+        silence_ends: np.ndarray,
         segments: list,
         total_duration: float
-    ) -> Tuple[float, float]:
+    ) -> Dict[str, Any]:
         """
-        Analyze silence periods to determine hold time and dead air time
+        Classify silences as dead air or hold
+        Dead air is a pause inside a speaker turn or with the same speaker on
+        both sides of it; any other silence (between different speakers, or
+        before the first and after the last turn) is hold. The second test
+        matters for channel diarization, whose turns end at every pause.
+        Uses sorted indexes of the turns and binary search, O((S+N) log N)
         """
         try:
-            hold_time = 0.0
-            dead_air_time = 0.0
-            
-            # Convert segments to time ranges
-            segment_ranges = [
-                (seg["start_time"] * 1000, seg["end_time"] * 1000)
-                for seg in segments
-            ]
-            
-            for start_ms, end_ms in silent_chunks:
-                duration_ms = end_ms - start_ms
-                
-                # Check if silence is during a segment
-                is_during_segment = False
-                for seg_start, seg_end in segment_ranges:
-                    if start_ms >= seg_start and end_ms <= seg_end:
-                        is_during_segment = True
-                        break
-                
-                if is_during_segment:
-                    # If silence is during a segment, it's dead air
-                    dead_air_time += duration_ms / 1000
-                else:
-                    # If silence is between segments, it's hold time
-                    hold_time += duration_ms / 1000
-            
-            return hold_time, dead_air_time
+            silence_starts = np.asarray(silence_starts, dtype=float)
+            silence_ends = np.asarray(silence_ends, dtype=float)
+            turn_starts, turn_ends = self._merged_turns(segments)
+
+            # The only turn that can contain a silence is the last one starting before it
+            idx = np.searchsorted(turn_starts, silence_starts, side="right") - 1
+            if len(turn_starts):
+                inside_turn = (idx >= 0) & (turn_ends[np.maximum(idx, 0)] >= silence_ends)
+            else:
+                inside_turn = np.zeros(len(silence_starts), dtype=bool)
+            dead_air = inside_turn | self._same_speaker_around(segments, silence_starts, silence_ends)
+
+            durations = silence_ends - silence_starts
+            dead_air_time = float(np.sum(durations[dead_air]))
+            hold_time = float(np.sum(durations[~dead_air]))
+            total_silence = hold_time + dead_air_time
+
+            return {
+                "hold_time": hold_time,
+                "dead_air_time": dead_air_time,
+                "total_silence_duration": total_silence,
+                "silence_percentage": (
+                    total_silence / total_duration * 100
+                    if total_duration > 0 else 0.0
+                ),
+                "silence_segments": [
+                    {
+                        "start": float(start),
+                        "end": float(end),
+                        "type": "dead_air" if is_dead_air else "hold"
+                    }
+                    for start, end, is_dead_air in zip(silence_starts, silence_ends, dead_air)
+                ]
+            }
 
         except Exception as e:
-            logger.error(f"Error analyzing silence: {str(e)}")
+            logger.error(f"Error classifying silence: {str(e)}")
             raise
 
+    def _same_speaker_around(
+        self,
+        segments: list,
+        silence_starts: np.ndarray,
+        silence_ends: np.ndarray
+    ) -> np.ndarray:
+        """
+        Whether the speaker heard last before each silence is the first heard after it
+        """
+        same = np.zeros(len(silence_starts), dtype=bool)
+        if not segments or not len(silence_starts):
+            return same
+
+        _, speakers = np.unique([str(seg["speaker"]) for seg in segments], return_inverse=True)
+        starts = np.array([seg["start_time"] for seg in segments], dtype=float)
+        ends = np.array([seg["end_time"] for seg in segments], dtype=float)
+
+        # Before: of the segments begun by the silence's start, the one reaching furthest
+        by_start = np.argsort(starts, kind="stable")
+        furthest = by_start[_running_argmax(ends[by_start])]
+        before = np.searchsorted(starts[by_start], silence_starts, side="right") - 1
+
+        # After: of the segments still going at the silence's end, the one that began first
+        count = len(segments)
+        by_end = np.argsort(ends, kind="stable")
+        from_last = _running_argmax(-starts[by_end][::-1])[::-1]
+        earliest = by_end[count - 1 - from_last]
+        after = np.searchsorted(ends[by_end], silence_ends, side="right")
+
+        known = (before >= 0) & (after < count)
+        same[known] = (
+            speakers[furthest[before[known]]] == speakers[earliest[after[known]]]
+        )
+        return same
+
+    def _merged_turns(self, segments: list) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sorted, disjoint union of the segment time ranges
+        """
+        if not segments:
+            return np.zeros(0), np.zeros(0)
+
+        starts = np.array([seg["start_time"] for seg in segments], dtype=float)
+        ends = np.array([seg["end_time"] for seg in segments], dtype=float)
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], ends[order]
+
+        reach = np.maximum.accumulate(ends)
+        group_starts = np.flatnonzero(np.concatenate([[True], starts[1:] > reach[:-1]]))
+
+        return starts[group_starts], np.maximum.reduceat(ends, group_starts)
+
 # Create a singleton instance
 silence_analysis_service = SilenceAnalysisService()
 
-# Export the detect_silence function for use in tasks
-def detect_silence(file_path: str, segments: list) -> Tuple[float, float]:
-    return silence_analysis_service.detect_silence(file_path, segments) 
\ No newline at end of file
+# Export functions for use in tasks
+def detect_silence(audio: Union[str, DecodedAudio], segments: list) -> Tuple[float, float]:
+    return silence_analysis_service.detect_silence(audio, segments)
+
+def analyze_silence(audio: Union[str, DecodedAudio], segments: list) -> Dict[str, Any]:
+    return silence_analysis_service.analyze_silence(audio, segments)
+
+def analyze_silence_streaming(file_path: str, segments: list) -> Dict[str, Any]:
+    return silence_analysis_service.analyze_silence_streaming(file_path, segments)
@@ -1,44 +1,226 @@
 import os
+import re
 import shutil
+import hashlib
 import logging
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 import uuid
-from typing import Optional
+from typing import Optional, Tuple, AsyncIterator, BinaryIO
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File exceeds the maximum upload size of {max_size} bytes")
+
 class StorageService:
     def __init__(self, base_path: str = "data/audio"):
         self.base_path = base_path
+        self.chunk_size = 1 << 20  # bytes copied at a time
+        self.max_upload_size = int(os.getenv("MAX_UPLOAD_BYTES", str(2 << 30)))  # 2 GB
         self._ensure_directory_exists()
 
     def _ensure_directory_exists(self):
         """Ensure the base directory exists"""
         Path(self.base_path).mkdir(parents=True, exist_ok=True)
 
-    async def save_audio_file(self, file: UploadFile, call_id: uuid.UUID) -> str:
+    async def save_audio_file(self, file: UploadFile, call_id: uuid.UUID) -> Tuple[str, str]:
         """
         Save an uploaded audio file to the storage directory
-        Returns the relative path to the saved file
+        The file is streamed in fixed-size chunks with all blocking I/O and
+        hashing off the event loop; the size limit is enforced as it streams
+        Returns the relative path to the saved file and its sha256 hex digest
         """
+        file_path = None
         try:
             # Generate unique filename
             file_extension = file.filename.split('.')[-1]
             filename = f"{call_id}.{file_extension}"
             file_path = os.path.join(self.base_path, filename)
 
-            # Save the file
+            digest = hashlib.sha256()
+            size = 0
+            buffer = await run_in_threadpool(open, file_path, "wb")
+            try:
+                while True:
+                    chunk = await file.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_upload_size:
+                        raise UploadTooLargeError(self.max_upload_size)
+                    await run_in_threadpool(self._write_chunk, buffer, digest, chunk)
+            finally:
+                await run_in_threadpool(buffer.close)
+
+            logger.info(f"File saved successfully: {file_path} ({size} bytes)")
+            return file_path, digest.hexdigest()
+
+        except Exception as e:
+            logger.error(f"Error saving file: {str(e)}")
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+    def _write_chunk(self, buffer, digest, chunk: bytes):
+        """
+        Hash and write one chunk; runs in a worker thread (hashlib releases the GIL)
+        """
+        digest.update(chunk)
+        buffer.write(chunk)
+
+    def save_stream(self, source: BinaryIO, call_id: uuid.UUID, extension: str) -> Tuple[str, str, int]:
+        """
+        Copy a readable binary stream (e.g. an archive member) into storage
+        Blocking; callers on the event loop should run it in the threadpool
+        Returns the path, its sha256 hex digest and the number of bytes written
+        """
+        file_path = os.path.join(self.base_path, f"{call_id}.{extension}")
+        try:
+            digest = hashlib.sha256()
+            size = 0
             with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+                for chunk in iter(lambda: source.read(self.chunk_size), b""):
+                    size += len(chunk)
+                    if size > self.max_upload_size:
+                        raise UploadTooLargeError(self.max_upload_size)
+                    self._write_chunk(buffer, digest, chunk)
+
+            return file_path, digest.hexdigest(), size
+
+        except Exception as e:
+            logger.error(f"Error saving stream: {str(e)}")
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+    def create_upload_target(self, session_id: uuid.UUID, extension: str, total_size: int) -> str:
+        """
+        Preallocate the file that the parts of a resumable upload are written into
+        Returns the path of the (sparse) partial file
+        """
+        try:
+            if total_size > self.max_upload_size:
+                raise UploadTooLargeError(self.max_upload_size)
+
+            partial_dir = os.path.join(self.base_path, "partial")
+            Path(partial_dir).mkdir(parents=True, exist_ok=True)
+            file_path = os.path.join(partial_dir, f"{session_id}.{extension}.part")
+
+            with open(file_path, "wb") as f:
+                f.truncate(total_size)
 
-            logger.info(f"File saved successfully: {file_path}")
             return file_path
 
         except Exception as e:
-            logger.error(f"Error saving file: {str(e)}")
+            logger.error(f"Error creating upload target: {str(e)}")
+            raise
+
+    async def write_range(
+        self,
+        file_path: str,
+        offset: int,
+        length: int,
+        stream: AsyncIterator[bytes]
+    ) -> int:
+        """
+        Write one byte range of a resumable upload in place
+        Each request writes through its own handle, so ranges can arrive in parallel
+        Returns the number of bytes written; raises ValueError on a length mismatch
+        """
+        try:
+            written = 0
+            buffer = await run_in_threadpool(open, file_path, "r+b")
+            try:
+                await run_in_threadpool(buffer.seek, offset)
+                async for chunk in stream:
+                    if not chunk:
+                        continue
+                    written += len(chunk)
+                    if written > length:
+                        raise ValueError(f"Body is longer than the declared range of {length} bytes")
+                    await run_in_threadpool(buffer.write, chunk)
+            finally:
+                await run_in_threadpool(buffer.close)
+
+            if written != length:
+                raise ValueError(f"Received {written} bytes for a range of {length} bytes")
+
+            return written
+
+        except Exception as e:
+            logger.error(f"Error writing upload range: {str(e)}")
+            raise
+
+    async def finalize_upload(
+        self,
+        partial_path: str,
+        call_id: uuid.UUID,
+        extension: str
+    ) -> Tuple[str, str]:
+        """
+        Promote a completed resumable upload to a regular audio file
+        The file is renamed, not copied; one read pass computes the content hash.
+        If an earlier attempt for the same call already moved it, it is taken from there
+        Returns the final path and its sha256 hex digest
+        """
+        try:
+            file_path = os.path.join(self.base_path, f"{call_id}.{extension}")
+            if not os.path.exists(partial_path) and os.path.exists(file_path):
+                return file_path, await run_in_threadpool(self._hash_file, file_path)
+
+            content_hash = await run_in_threadpool(self._hash_file, partial_path)
+            await run_in_threadpool(os.replace, partial_path, file_path)
+
+            logger.info(f"Resumable upload finalized: {file_path}")
+            return file_path, content_hash
+
+        except Exception as e:
+            logger.error(f"Error finalizing upload: {str(e)}")
+            raise
+
+    async def reopen_upload(self, file_path: str, partial_path: str):
+        """
+        Undo finalize_upload: move the file back so the upload can be finalized again
+        """
+        try:
+            await run_in_threadpool(os.replace, file_path, partial_path)
+            logger.info(f"Resumable upload reopened: {partial_path}")
+
+        except Exception as e:
+            logger.error(f"Error reopening upload: {str(e)}")
             raise
 
+    def parse_content_range(self, header: str, total_size: int) -> Tuple[int, int]:
+        """
+        Parse "bytes <start>-<end>/<total>" (end inclusive, total may be *)
+        Returns the start offset and length; raises ValueError if malformed or outside the upload
+        """
+        match = CONTENT_RANGE.match(header.strip())
+        if not match:
+            raise ValueError("Malformed Content-Range header")
+        start, last = int(match.group(1)), int(match.group(2))
+        total = match.group(3)
+        if last < start or last >= total_size or (total != "*" and int(total) != total_size):
+            raise ValueError("Content-Range is outside the upload")
+        return start, last - start + 1
+
+    def _hash_file(self, file_path: str) -> str:
+        """
+        sha256 hex digest of a file read in chunks
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
     def get_file_path(self, call_id: uuid.UUID) -> Optional[str]:
         """
         Get the path to a stored audio file
@@ -77,6 +259,9 @@ class StorageService:
 # Create a singleton instance
 storage_service = StorageService()
 
-# Export the save_audio_file function for use in routers
-async def save_audio_file(file: UploadFile, call_id: uuid.UUID) -> str:
-    return await storage_service.save_audio_file(file, call_id) 
\ No newline at end of file
+# Export functions for use in routers
+async def save_audio_file(file: UploadFile, call_id: uuid.UUID) -> Tuple[str, str]:
+    return await storage_service.save_audio_file(file, call_id) 
+
+def parse_content_range(header: str, total_size: int) -> Tuple[int, int]:
+    return storage_service.parse_content_range(header, total_size)
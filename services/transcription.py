@@ -1,16 +1,29 @@
 import os
+import time
 import logging
-import whisper
-from typing import Tuple, Optional
-import torch
+from typing import Tuple, Optional, Union, List, Dict, Any, TYPE_CHECKING
+import numpy as np
+
+from .audio import DecodedAudio, SAMPLE_RATE, ensure_audio
+from .device import resolve_device
+
+if TYPE_CHECKING:
+    import torch
 
 logger = logging.getLogger(__name__)
 
 class TranscriptionService:
     def __init__(self):
         self.model = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Using device: {self.device}")
+        self.model_name = "medium"
+        self.window_seconds = 30  # Whisper's fixed context length
+        self.time_precision = 0.02  # seconds per timestamp token
+        self.batch_size = int(os.getenv("WHISPER_BATCH_SIZE", "4"))  # mel windows per forward pass
+
+    @property
+    def device(self) -> str:
+        """Device Whisper is loaded on; resolving it imports torch"""
+        return resolve_device()
 
     def load_model(self, model_name: str = "medium"):
         """
@@ -18,7 +31,11 @@ class TranscriptionService:
         """
         try:
             if not self.model:
+                # Kept out of module scope so importing tasks stays cheap
+                import whisper
+
                 logger.info(f"Loading Whisper model: {model_name}")
+                self.model_name = model_name
                 self.model = whisper.load_model(
                     model_name,
                     device=self.device,
@@ -29,21 +46,42 @@ class TranscriptionService:
             logger.error(f"Error loading model: {str(e)}")
             raise
 
+    def warm_up(self):
+        """
+        Load the model and run one short inference so the first real call is fast
+        """
+        try:
+            self.load_model()
+            silence = DecodedAudio(np.zeros(SAMPLE_RATE, dtype=np.float32))
+            self.transcribe_long_form(silence, language="en")
+            logger.info("Transcription model warmed up")
+        except Exception as e:
+            logger.error(f"Error warming up transcription model: {str(e)}")
+            raise
+
     def transcribe_audio(
         self,
-        file_path: str,
-        language: Optional[str] = None
+        audio: Union[str, DecodedAudio],
+        language: Optional[str] = None,
+        long_form: bool = True
     ) -> Tuple[str, float]:
         """
-        Transcribe an audio file using Whisper
+        Transcribe an audio file or already decoded audio using Whisper
+        With long_form=False only the first 30 seconds are transcribed
         Returns the transcription text and duration
         """
         try:
+            if long_form:
+                result = self.transcribe_long_form(audio, language)
+                return result["text"], result["duration"]
+
+            import whisper
+
             if not self.model:
                 self.load_model()
 
-            # Load audio and pad/trim it to fit 30 seconds
-            audio = whisper.load_audio(file_path)
+            # Reuse the shared decoded audio and pad/trim it to fit 30 seconds
+            audio = ensure_audio(audio).samples
             audio = whisper.pad_or_trim(audio)
 
             # Make log-Mel spectrogram and move to the same device as the model
@@ -68,9 +106,204 @@ class TranscriptionService:
             logger.error(f"Error transcribing audio: {str(e)}")
             raise
 
+    def transcribe_long_form(
+        self,
+        audio: Union[str, DecodedAudio],
+        language: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe the whole recording in consecutive 30 second windows
+        Several mel windows are decoded per forward pass
+        Returns the stitched text, timestamped segments and words, real duration and throughput
+        """
+        try:
+            import torch
+            import whisper
+
+            if not self.model:
+                self.load_model()
+
+            started = time.perf_counter()
+            audio = ensure_audio(audio)
+            batch_size = batch_size or self.batch_size
+            window = self.window_seconds * audio.sample_rate
+            offsets = list(range(0, max(len(audio.samples), 1), window))
+
+            # Detect the spoken language on the first window
+            if not language:
+                mel = self._window_mel(audio, 0, window)
+                _, probs = self.model.detect_language(mel)
+                language = max(probs, key=probs.get)
+                logger.info(f"Detected language: {language}")
+
+            options = whisper.DecodingOptions(
+                language=language,
+                without_timestamps=False,
+                fp16=False if self.device == "cpu" else True
+            )
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                self.model.is_multilingual,
+                language=language,
+                task="transcribe"
+            )
+
+            segments = []
+            # End of the last word so far; word timing uses it to bound the next pause
+            last_speech_timestamp = 0.0
+            for i in range(0, len(offsets), batch_size):
+                batch_offsets = offsets[i:i + batch_size]
+                mel = torch.stack([
+                    self._window_mel(audio, offset, window)
+                    for offset in batch_offsets
+                ])
+                results = whisper.decode(self.model, mel, options)
+
+                for index, (offset, result) in enumerate(zip(batch_offsets, results)):
+                    window_start = offset / audio.sample_rate
+                    window_end = min(window_start + self.window_seconds, audio.duration)
+                    window_segments = self._split_segments(
+                        result.tokens,
+                        tokenizer,
+                        window_start,
+                        window_end
+                    )
+                    last_speech_timestamp = self._add_word_timestamps(
+                        window_segments,
+                        tokenizer,
+                        mel[index],
+                        offset,
+                        min(window, len(audio.samples) - offset),
+                        last_speech_timestamp
+                    )
+                    segments.extend(window_segments)
+
+            elapsed = time.perf_counter() - started
+            throughput = audio.duration / elapsed if elapsed > 0 else 0.0
+            logger.info(
+                f"Transcribed {audio.duration:.1f}s of audio in {elapsed:.1f}s "
+                f"({throughput:.2f} audio-seconds per second)"
+            )
+
+            return {
+                "text": " ".join(seg["text"] for seg in segments),
+                "segments": segments,
+                "words": [word for seg in segments for word in seg.pop("words")],
+                "language": language,
+                "duration": audio.duration,
+                "processing_time": elapsed,
+                "audio_seconds_per_second": throughput
+            }
+
+        except Exception as e:
+            logger.error(f"Error transcribing long-form audio: {str(e)}")
+            raise
+
+    def _window_mel(self, audio: DecodedAudio, offset: int, window: int) -> "torch.Tensor":
+        """
+        Log-Mel spectrogram of one 30 second window, on the model's device
+        """
+        import whisper
+
+        samples = whisper.pad_or_trim(audio.samples[offset:offset + window])
+        return whisper.log_mel_spectrogram(samples).to(self.model.device)
+
+    def _split_segments(
+        self,
+        tokens: List[int],
+        tokenizer,
+        window_start: float,
+        window_end: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Split a window's decoded tokens into segments at timestamp tokens
+        Timestamps are shifted by the window start into call time
+        """
+        segments = []
+        text_tokens = []
+        segment_start = window_start
+
+        for token in tokens:
+            if token >= tokenizer.timestamp_begin:
+                timestamp = window_start + (token - tokenizer.timestamp_begin) * self.time_precision
+                if text_tokens:
+                    segments.append(self._make_segment(
+                        tokenizer, text_tokens, segment_start, min(timestamp, window_end)
+                    ))
+                    text_tokens = []
+                segment_start = timestamp
+            else:
+                text_tokens.append(token)
+
+        # Text without a closing timestamp runs to the end of the window
+        if text_tokens:
+            segments.append(self._make_segment(
+                tokenizer, text_tokens, segment_start, window_end
+            ))
+
+        return [seg for seg in segments if seg["text"]]
+
+    def _make_segment(self, tokenizer, tokens: List[int], start: float, end: float) -> Dict[str, Any]:
+        """
+        Build a transcript segment from a run of text tokens
+        """
+        return {
+            "start": start,
+            "end": max(start, end),
+            "text": tokenizer.decode(tokens).strip(),
+            "tokens": tokens
+        }
+
+    def _add_word_timestamps(
+        self,
+        segments: List[Dict[str, Any]],
+        tokenizer,
+        mel: "torch.Tensor",
+        offset: int,
+        num_samples: int,
+        last_speech_timestamp: float
+    ) -> float:
+        """
+        Time each word of a window's segments the way Whisper's word_timestamps does
+        Aligns the decoded tokens against the window with the decoder's
+        cross-attention: one extra forward pass per window, no extra decoding.
+        Replaces each segment's tokens with its "words" and returns the end
+        of the last word, to pass on with the next window as whisper.transcribe does
+        """
+        from whisper.audio import HOP_LENGTH
+        from whisper.timing import add_word_timestamps
+
+        if segments:
+            # seek is where the window starts, in mel frames; word times are shifted by it
+            for segment in segments:
+                segment["seek"] = offset // HOP_LENGTH
+            add_word_timestamps(
+                segments=segments,
+                model=self.model,
+                tokenizer=tokenizer,
+                mel=mel,
+                num_frames=num_samples // HOP_LENGTH,
+                last_speech_timestamp=last_speech_timestamp
+            )
+
+        for segment in segments:
+            del segment["tokens"], segment["seek"]
+            segment["words"] = [
+                {"word": word["word"].strip(), "start": word["start"], "end": word["end"]}
+                for word in segment.get("words", [])
+                if word["word"].strip()
+            ]
+            if segment["words"]:
+                last_speech_timestamp = segment["words"][-1]["end"]
+
+        return last_speech_timestamp
+
 # Create a singleton instance
 transcription_service = TranscriptionService()
 
 # Export the transcribe_audio function for use in tasks
-def transcribe_audio(file_path: str, language: Optional[str] = None) -> Tuple[str, float]:
-    return transcription_service.transcribe_audio(file_path, language) 
\ No newline at end of file
+def transcribe_audio(audio: Union[str, DecodedAudio], language: Optional[str] = None) -> Tuple[str, float]:
+    return transcription_service.transcribe_audio(audio, language)
+
+def transcribe_long_form(audio: Union[str, DecodedAudio], language: Optional[str] = None) -> Dict[str, Any]:
+    return transcription_service.transcribe_long_form(audio, language) 
\ No newline at end of file
@@ -0,0 +1,223 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import UploadSession, UploadPart
+
+logger = logging.getLogger(__name__)
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class UploadSessionService:
+    """
+    Bookkeeping of resumable uploads
+    A part is recorded before its bytes are written and marked written after,
+    so finalize can tell parts in flight from parts that are done. Parts only
+    start while the session is open and finalize claims the session with a
+    conditional update, so no part can start writing once finalize has begun
+    """
+    def __init__(self):
+        self.finalize_timeout = float(os.getenv("UPLOAD_FINALIZE_TIMEOUT_SECONDS", "600"))  # a claim older than this can be reclaimed
+        self.part_timeout = float(os.getenv("UPLOAD_PART_TIMEOUT_SECONDS", "3600"))  # an unwritten part older than this was abandoned
+        self.finalize_wait = float(os.getenv("UPLOAD_FINALIZE_WAIT_SECONDS", "30"))  # how long finalize waits for parts in flight
+        self.poll_interval = 0.2  # seconds
+
+    def received_ranges(
+        self,
+        db: Session,
+        session_id: uuid.UUID,
+        include_in_flight: bool = False
+    ) -> List[List[int]]:
+        """
+        Merge the written parts of a session into disjoint [start, end) ranges
+        With include_in_flight, parts still being written count as well
+        """
+        query = select(UploadPart.start, UploadPart.end).where(UploadPart.session_id == session_id)
+        if not include_in_flight:
+            query = query.where(UploadPart.written_at.is_not(None))
+        parts = db.execute(query.order_by(UploadPart.start)).all()
+
+        ranges = []
+        for start, end in parts:
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    def start_part(self, db: Session, session_id: uuid.UUID, start: int, end: int) -> Optional[UploadPart]:
+        """
+        Record a part about to be written, if the session is still open
+        The conditional update re-checks the status and locks the session row
+        until the caller commits, so it serializes with claim_finalize.
+        Returns the part, or None if the session is no longer open
+        """
+        now = _now()
+        opened = db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == session_id, UploadSession.status == "open")
+            .values(updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if opened.rowcount != 1:
+            return None
+
+        part = UploadPart(session_id=session_id, start=start, end=end, created_at=now)
+        db.add(part)
+        db.flush()
+        return part
+
+    def finish_part(self, db: Session, part: UploadPart):
+        """
+        Mark a part's bytes as all on disk
+        """
+        part.written_at = _now()
+
+    def abandon_part(self, db: Session, part: UploadPart):
+        """
+        Drop a part whose write failed, so finalize does not wait for it
+        """
+        db.delete(part)
+
+    def parts_in_flight(self, db: Session, session_id: uuid.UUID) -> int:
+        """
+        Number of parts still being written, ignoring those older than part_timeout
+        """
+        cutoff = _now() - timedelta(seconds=self.part_timeout)
+        return db.execute(
+            select(func.count())
+            .select_from(UploadPart)
+            .where(
+                UploadPart.session_id == session_id,
+                UploadPart.written_at.is_(None),
+                UploadPart.created_at > cutoff
+            )
+        ).scalar_one()
+
+    def claim_finalize(self, db: Session, session_id: uuid.UUID) -> Optional[Tuple[datetime, uuid.UUID]]:
+        """
+        Move an open session to finalizing, or take over a finalize stuck longer than finalize_timeout
+        A takeover reuses the stuck attempt's call id, so a file it already
+        moved is found under that id. Returns the claim time, which identifies
+        this attempt, and the call id to create; None if the session cannot be claimed
+        """
+        claimed_at = _now()
+        stale = claimed_at - timedelta(seconds=self.finalize_timeout)
+        claimed = db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == session_id,
+                or_(
+                    UploadSession.status == "open",
+                    and_(
+                        UploadSession.status == "finalizing",
+                        # Claims made before claim times were recorded count as stale
+                        or_(UploadSession.finalizing_at.is_(None), UploadSession.finalizing_at < stale)
+                    )
+                )
+            )
+            .values(
+                status="finalizing",
+                finalizing_at=claimed_at,
+                claimed_call_id=func.coalesce(UploadSession.claimed_call_id, uuid.uuid4()),
+                updated_at=claimed_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount != 1:
+            return None
+
+        call_id = db.execute(
+            select(UploadSession.claimed_call_id).where(UploadSession.id == session_id)
+        ).scalar_one()
+        return claimed_at, call_id
+
+    def complete_finalize(
+        self,
+        db: Session,
+        session_id: uuid.UUID,
+        claimed_at: datetime,
+        call_id: uuid.UUID
+    ) -> bool:
+        """
+        Mark the session finalized with its call, if this attempt still holds the claim
+        Returns False if another attempt took the session over
+        """
+        finalized = db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == session_id,
+                UploadSession.status == "finalizing",
+                UploadSession.finalizing_at == claimed_at
+            )
+            .values(status="finalized", call_id=call_id, updated_at=_now())
+            .execution_options(synchronize_session=False)
+        )
+        return finalized.rowcount == 1
+
+    def release_finalize(self, db: Session, session_id: uuid.UUID, claimed_at: datetime) -> bool:
+        """
+        Reopen a session this attempt claimed, e.g. after a failed finalize
+        Returns False if another attempt took the session over meanwhile
+        """
+        released = db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == session_id,
+                UploadSession.status == "finalizing",
+                UploadSession.finalizing_at == claimed_at
+            )
+            .values(status="open", finalizing_at=None, updated_at=_now())
+            .execution_options(synchronize_session=False)
+        )
+        return released.rowcount == 1
+
+    async def wait_for_parts(self, db: AsyncSession, session_id: uuid.UUID) -> bool:
+        """
+        Wait up to finalize_wait seconds for the session's parts in flight to be written
+        Returns False if some are still being written
+        """
+        deadline = time.monotonic() + self.finalize_wait
+        while await db.run_sync(self.parts_in_flight, session_id):
+            if time.monotonic() >= deadline:
+                return False
+            # End the read transaction so the next check sees parts committed meanwhile
+            await db.commit()
+            await asyncio.sleep(self.poll_interval)
+        return True
+
+# Create a singleton instance
+upload_session_service = UploadSessionService()
+
+# Export functions for use in routers
+def received_ranges(db: Session, session_id: uuid.UUID, include_in_flight: bool = False) -> List[List[int]]:
+    return upload_session_service.received_ranges(db, session_id, include_in_flight)
+
+def start_part(db: Session, session_id: uuid.UUID, start: int, end: int) -> Optional[UploadPart]:
+    return upload_session_service.start_part(db, session_id, start, end)
+
+def finish_part(db: Session, part: UploadPart):
+    upload_session_service.finish_part(db, part)
+
+def abandon_part(db: Session, part: UploadPart):
+    upload_session_service.abandon_part(db, part)
+
+def claim_finalize(db: Session, session_id: uuid.UUID) -> Optional[Tuple[datetime, uuid.UUID]]:
+    return upload_session_service.claim_finalize(db, session_id)
+
+def complete_finalize(db: Session, session_id: uuid.UUID, claimed_at: datetime, call_id: uuid.UUID) -> bool:
+    return upload_session_service.complete_finalize(db, session_id, claimed_at, call_id)
+
+def release_finalize(db: Session, session_id: uuid.UUID, claimed_at: datetime) -> bool:
+    return upload_session_service.release_finalize(db, session_id, claimed_at)
+
+async def wait_for_parts(db: AsyncSession, session_id: uuid.UUID) -> bool:
+    return await upload_session_service.wait_for_parts(db, session_id)
@@ -1,27 +1,43 @@
 import os
 import logging
-from celery import Celery
 from sqlalchemy.orm import Session
 import uuid
 import time
 
+from celery_worker import celery
 from database import SessionLocal
 from models import Call, Segment
-from services.transcription import transcribe_audio
-from services.diarization import diarize_audio, assign_speaker_types
-from services.sentiment import analyze_segments, get_sentiment_summary
-from services.silence_analysis import detect_silence
-from services.overtalk import detect_overtalk, get_overtalk_summary
+from services.audio import load_audio
+from services.transcription import transcribe_long_form, transcription_service
+from services.diarization import diarize_audio, assign_speaker_types, diarization_service
+from services.alignment import align_words
+from services.sentiment import analyze_segments, get_sentiment_summary, sentiment_service
+from services.silence_analysis import silence_analysis_service
+from services.overtalk import analyze_overtalk
+from services.pipeline import StageGraph
+from services.persistence import replace_segments
+from services.checkpoints import CheckpointStore
+from services.analytics import add_call_to_rollups, remove_call_from_rollups
+from services.events import publish_progress
+from services.metrics import StageTimer, observe_stages, observe_queue_wait, observe_call
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Celery
-celery = Celery(
-    "tasks",
-    broker=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
-    backend=os.getenv("REDIS_URL", "redis://localhost:6379/0")
-)
+# Bump when stage logic changes so stale checkpoints are not reused
+PIPELINE_VERSION = "2"
+
+# Status published to progress subscribers while each stage runs
+STAGE_STATUS = {
+    "audio": "decoding",
+    "transcription": "transcribing",
+    "diarization": "diarizing",
+    "silence_detection": "detecting_silence",
+    "alignment": "aligning",
+    "sentiment": "analyzing_sentiment",
+    "silence": "classifying_silence",
+    "overtalk": "detecting_overtalk",
+}
 
 @celery.task
 def test_task(message: str):
@@ -30,12 +46,113 @@ def test_task(message: str):
     time.sleep(2)  # Simulate some work
     return f"Processed message: {message}"
 
+def build_pipeline(
+    audio_path: str,
+    language: str,
+    agent_id: str,
+    checkpoint: CheckpointStore = None,
+    listener=None,
+    timer: StageTimer = None
+) -> StageGraph:
+    """
+    Describe call processing as a stage graph
+    Transcription, diarization and silence detection only need the decoded
+    audio and run concurrently; the rest waits for the stages it reads.
+    Every stage but decoding is versioned and checkpointed, so a retry
+    resumes after the last stage that finished
+    """
+    graph = StageGraph(checkpoint=checkpoint, listener=listener, timer=timer)
+    silence = silence_analysis_service
+
+    # Decode the recording once and share it across every stage
+    # Stereo keeps its channels when diarization splits them
+    graph.add_stage(
+        "audio",
+        lambda: load_audio(audio_path, keep_channels=diarization_service.splits_channels)
+    )
+
+    graph.add_stage(
+        "transcription",
+        lambda audio: transcribe_long_form(audio, language),
+        depends_on=["audio"],
+        version=f"{PIPELINE_VERSION}:whisper-{transcription_service.model_name}:{language}"
+    )
+    graph.add_stage(
+        "diarization",
+        lambda audio: assign_speaker_types(diarize_audio(audio), agent_id),
+        depends_on=["audio"],
+        version=f"{PIPELINE_VERSION}:{diarization_service.version}"
+    )
+    silence_version = f"{PIPELINE_VERSION}:{silence.silence_threshold}dB:{silence.min_silence_len}ms"
+    if silence.streaming:
+        # SILENCE_STREAMING: read the file in blocks in constant memory instead
+        # of the decoded buffer; needs no decode, so it starts right away
+        graph.add_stage(
+            "silence_detection",
+            lambda: [
+                interval.tolist()
+                for interval in silence.detect_silent_intervals_streaming(audio_path)
+            ],
+            version=f"{silence_version}:streaming"
+        )
+    else:
+        graph.add_stage(
+            "silence_detection",
+            lambda audio: [
+                interval.tolist() for interval in silence.detect_silent_intervals(audio)
+            ],
+            depends_on=["audio"],
+            version=silence_version
+        )
+
+    graph.add_stage(
+        "alignment",
+        lambda transcription, diarization: align_words(
+            transcription["words"],
+            diarization
+        ),
+        depends_on=["transcription", "diarization"],
+        version=PIPELINE_VERSION
+    )
+    graph.add_stage(
+        "sentiment",
+        lambda alignment: analyze_segments(alignment, language),
+        depends_on=["alignment"],
+        version=f"{PIPELINE_VERSION}:{sentiment_service.model_name}"
+    )
+    graph.add_stage(
+        "silence",
+        lambda transcription, silence_detection, diarization: silence.classify_silence(
+            silence_detection[0],
+            silence_detection[1],
+            diarization,
+            transcription["duration"]
+        ),
+        depends_on=["transcription", "silence_detection", "diarization"],
+        version=PIPELINE_VERSION
+    )
+    graph.add_stage(
+        "overtalk",
+        lambda diarization: analyze_overtalk(diarization),
+        depends_on=["diarization"],
+        version=PIPELINE_VERSION
+    )
+
+    return graph
+
 @celery.task(bind=True, max_retries=3)
-def process_call(self, call_id: str):
+def process_call(self, call_id: str, enqueued_at: float = None):
     """
     Process a call recording in the background
+    enqueued_at is the time.time() at which the API queued the call
     """
+    started = time.perf_counter()
+    if enqueued_at is not None:
+        observe_queue_wait(enqueued_at)
+
     db = SessionLocal()
+    timer = StageTimer()
+    audio_seconds = None
     try:
         # Get call record
         call = db.query(Call).filter(Call.id == uuid.UUID(call_id)).first()
@@ -45,52 +162,62 @@ def process_call(self, call_id: str):
         # Update status to processing
         call.processing_status = "processing"
         db.commit()
+        agent_id = call.agent_id
+        publish_progress(call_id, agent_id, "processing")
+
+        def on_stage(event, stage, done, total):
+            if event == "started":
+                publish_progress(call_id, agent_id, STAGE_STATUS.get(stage, stage), stage, done, total)
 
         try:
-            # 1. Transcribe audio
-            transcription, duration = transcribe_audio(
+            # Run the independent stages concurrently, resuming from checkpoints
+            checkpoint = CheckpointStore(call.id)
+            results = build_pipeline(
                 call.audio_path,
-                call.language
-            )
-            call.transcription = transcription
-            call.duration = duration
-            db.commit()
+                call.language,
+                call.agent_id,
+                checkpoint,
+                listener=on_stage,
+                timer=timer
+            ).run()
 
-            # 2. Perform speaker diarization
-            segments = diarize_audio(call.audio_path)
-            segments = assign_speaker_types(segments, call.agent_id)
-
-            # 3. Analyze sentiment
-            segments = analyze_segments(segments, call.language)
-            sentiment_summary = get_sentiment_summary(segments)
-
-            # 4. Detect silence
-            hold_time, dead_air_time = detect_silence(call.audio_path, segments)
-            call.hold_time = hold_time
-            call.dead_air_time = dead_air_time
-
-            # 5. Detect overtalk
-            overtalk_count = detect_overtalk(segments)
-            call.overtalk_count = overtalk_count
-
-            # Save segments to database
-            for segment in segments:
-                db_segment = Segment(
-                    id=uuid.uuid4(),
-                    call_id=call.id,
-                    speaker=segment["speaker"],
-                    start_time=segment["start_time"],
-                    end_time=segment["end_time"],
-                    text=segment["text"],
-                    sentiment=segment.get("sentiment"),
-                    confidence=segment.get("confidence"),
-                    speaker_type=segment.get("speaker_type")
-                )
-                db.add(db_segment)
-
-            # Update call status to completed
-            call.processing_status = "completed"
-            db.commit()
+            # Reprocessing replaces the call's earlier contribution to the rollups
+            remove_call_from_rollups(db, call)
+
+            # 1. Full transcription
+            transcript = results["transcription"]
+            call.transcription = transcript["text"]
+            call.duration = transcript["duration"]
+            audio_seconds = transcript["duration"]
+
+            # 2-3. Diarized segments with aligned text and sentiment
+            segments = results["sentiment"]
+            call.sentiment_summary = get_sentiment_summary(segments)
+
+            # 4. Silence classified as hold or dead air, with each interval
+            silence = results["silence"]
+            call.hold_time = silence["hold_time"]
+            call.dead_air_time = silence["dead_air_time"]
+            call.silence_segments = silence["silence_segments"]
+
+            # 5. Overtalk intervals, kept for the timeline view
+            overtalk = results["overtalk"]
+            call.overtalk_count = overtalk["overtalk_count"]
+            call.overtalk_segments = overtalk["overtalk_segments"]
+
+            with timer.measure("persist"):
+                # Save all segments in a single bulk write
+                replace_segments(db, call.id, segments)
+
+                # Checkpoints are only needed until the call completes
+                checkpoint.clear(db)
+
+                # Update call status to completed and count it in the daily rollups
+                call.processing_status = "completed"
+                add_call_to_rollups(db, call)
+                db.commit()
+            publish_progress(call_id, agent_id, "completed")
+            observe_call("completed", time.perf_counter() - started)
 
             logger.info(f"Successfully processed call {call_id}")
 
@@ -99,6 +226,8 @@ def process_call(self, call_id: str):
             call.processing_status = "failed"
             call.error_message = str(e)
             db.commit()
+            publish_progress(call_id, agent_id, "failed", message=str(e))
+            observe_call("failed", time.perf_counter() - started)
             logger.error(f"Error processing call {call_id}: {str(e)}")
             raise
 
@@ -107,6 +236,8 @@ def process_call(self, call_id: str):
         raise
 
     finally:
+        # Stages that ran are recorded even when a later one failed
+        observe_stages(timer, audio_seconds)
         db.close()
 
 @celery.task
@@ -127,12 +258,19 @@ def cleanup_old_calls(days: int = 30):
 
         for call in old_calls:
             try:
-                # Mark call as deleted
+                # Mark call as deleted; rollups count only calls that are not
+                # deleted, the same as rebuild_rollups
+                remove_call_from_rollups(db, call)
                 call.is_deleted = True
                 db.commit()
                 
-                # Delete associated files
-                if os.path.exists(call.audio_path):
+                # Delete associated files, unless a linked duplicate still uses them
+                shared = db.query(Call).filter(
+                    Call.audio_path == call.audio_path,
+                    Call.id != call.id,
+                    Call.is_deleted == False
+                ).first()
+                if not shared and os.path.exists(call.audio_path):
                     os.remove(call.audio_path)
                 
                 logger.info(f"Cleaned up call {call.id}")
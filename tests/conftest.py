@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Services and tasks import each other from the repository root, as the worker does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,77 @@
+import copy
+
+from services.alignment import align_words, get_speaker_text
+
+def _word(word: str, start: float, end: float):
+    return {"word": word, "start": start, "end": end}
+
+def _turn(speaker: str, start: float, end: float):
+    return {"speaker": speaker, "start_time": start, "end_time": end}
+
+def _texts(aligned):
+    return [(seg["speaker"], seg["text"]) for seg in aligned]
+
+def test_words_inside_turns():
+    words = [_word("hello", 0.1, 0.5), _word("there", 0.6, 1.0), _word("hi", 2.1, 2.4)]
+    turns = [_turn("agent", 0.0, 1.5), _turn("customer", 2.0, 3.0)]
+
+    assert _texts(align_words(words, turns)) == [("agent", "hello there"), ("customer", "hi")]
+
+def test_gap_words_go_to_the_nearer_turn():
+    words = [_word("early", 2.5, 2.9), _word("late", 4.0, 4.4)]
+    turns = [_turn("agent", 0.0, 2.0), _turn("customer", 5.0, 8.0)]
+
+    assert _texts(align_words(words, turns)) == [("agent", "early"), ("customer", "late")]
+
+def test_interjection_words_go_to_the_inner_turn():
+    words = [
+        _word("so", 1.0, 1.4),
+        _word("right", 4.5, 5.0),
+        _word("anyway", 8.0, 8.5)
+    ]
+    turns = [_turn("agent", 0.0, 10.0), _turn("customer", 4.0, 6.0)]
+
+    assert _texts(align_words(words, turns)) == [("agent", "so anyway"), ("customer", "right")]
+
+def test_words_outside_all_turns():
+    words = [_word("before", 0.0, 0.4), _word("during", 2.0, 2.5), _word("after", 9.0, 9.5)]
+    turns = [_turn("agent", 1.0, 3.0), _turn("customer", 4.0, 6.0)]
+
+    assert _texts(align_words(words, turns)) == [("agent", "before during"), ("customer", "after")]
+
+def test_unsorted_words_keep_time_order():
+    words = [_word("world", 0.6, 1.0), _word("hello", 0.1, 0.5)]
+    turns = [_turn("agent", 0.0, 2.0)]
+
+    assert _texts(align_words(words, turns)) == [("agent", "hello world")]
+
+def test_no_words():
+    turns = [_turn("agent", 0.0, 2.0), _turn("customer", 2.0, 4.0)]
+
+    assert _texts(align_words([], turns)) == [("agent", ""), ("customer", "")]
+
+def test_no_turns():
+    assert align_words([_word("hello", 0.1, 0.5)], []) == []
+
+def test_inputs_are_left_unmodified():
+    words = [_word("hello", 0.1, 0.5), _word("hi", 2.1, 2.4)]
+    # Turns out of time order, so sorting in place would show as well
+    turns = [_turn("customer", 2.0, 3.0), _turn("agent", 0.0, 1.5)]
+    original_words = copy.deepcopy(words)
+    original_turns = copy.deepcopy(turns)
+
+    aligned = align_words(words, turns)
+
+    assert words == original_words
+    assert turns == original_turns
+    assert all("text" not in turn for turn in turns)
+    assert _texts(aligned) == [("customer", "hi"), ("agent", "hello")]
+
+def test_speaker_text_in_time_order():
+    words = [_word("one", 0.1, 0.5), _word("two", 1.1, 1.5), _word("three", 2.1, 2.5)]
+    turns = [_turn("agent", 2.0, 3.0), _turn("customer", 1.0, 2.0), _turn("agent", 0.0, 1.0)]
+
+    assert get_speaker_text(align_words(words, turns)) == {
+        "agent": "one three",
+        "customer": "two"
+    }
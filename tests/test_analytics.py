@@ -0,0 +1,160 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import AgentDailyStats, Call
+from services.analytics import (
+    TOTAL_COLUMNS,
+    add_call_to_rollups,
+    get_agent_summary,
+    get_daily_stats,
+    rebuild_rollups,
+    remove_call_from_rollups
+)
+
+DAY = date(2024, 3, 1)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+def _call(agent_id: str = "agent-1", day: date = DAY, **results) -> Call:
+    return Call(
+        id=uuid.uuid4(),
+        agent_id=agent_id,
+        audio_path="audio/call.wav",
+        processing_status="pending",
+        created_at=datetime(day.year, day.month, day.day, 10, 0),
+        **results
+    )
+
+def _complete(db: Session, call: Call, **results):
+    """
+    What process_call does with a call's results: replace its contribution, then count it
+    """
+    remove_call_from_rollups(db, call)
+    for field, value in results.items():
+        setattr(call, field, value)
+    call.processing_status = "completed"
+    add_call_to_rollups(db, call)
+    db.commit()
+
+def _results(duration: float, overtalk: list, positive: int = 0, negative: int = 0) -> dict:
+    return {
+        "duration": duration,
+        "hold_time": duration / 10,
+        "dead_air_time": duration / 20,
+        "overtalk_count": len(overtalk),
+        "overtalk_segments": [
+            {"start": start, "end": end, "interrupter": "customer"} for start, end in overtalk
+        ],
+        "sentiment_summary": {
+            "sentiment_distribution": {"positive": positive, "negative": negative, "neutral": 1}
+        }
+    }
+
+def _rows(db: Session) -> dict:
+    db.expire_all()
+    return {
+        (row.agent_id, row.day): {column: getattr(row, column) for column in TOTAL_COLUMNS}
+        for row in db.query(AgentDailyStats).all()
+    }
+
+def test_add_reprocess_and_delete_update_the_daily_row(db):
+    call = _call()
+    db.add(call)
+    db.commit()
+
+    _complete(db, call, **_results(100.0, [(1.0, 2.5), (10.0, 11.0)], positive=3))
+    row = _rows(db)[("agent-1", DAY)]
+    assert row["call_count"] == 1
+    assert row["total_duration"] == 100.0
+    assert row["total_overtalk_count"] == 2
+    assert row["total_overtalk_duration"] == pytest.approx(2.5)
+    assert row["positive_segments"] == 3
+
+    # Reprocessing replaces the earlier numbers instead of adding to them
+    _complete(db, call, **_results(80.0, [(5.0, 5.5)], negative=2))
+    row = _rows(db)[("agent-1", DAY)]
+    assert row["call_count"] == 1
+    assert row["total_duration"] == 80.0
+    assert row["total_overtalk_count"] == 1
+    assert row["total_overtalk_duration"] == pytest.approx(0.5)
+    assert (row["positive_segments"], row["negative_segments"]) == (0, 2)
+
+    # Deleting takes the call out; a second removal is a no-op
+    remove_call_from_rollups(db, call)
+    call.is_deleted = True
+    remove_call_from_rollups(db, call)
+    db.commit()
+    row = _rows(db)[("agent-1", DAY)]
+    assert row["call_count"] == 0
+    assert row["total_duration"] == 0.0
+    assert row["total_overtalk_duration"] == pytest.approx(0.0)
+    assert get_daily_stats(db) == []
+
+def test_adding_a_counted_call_again_is_a_no_op(db):
+    call = _call()
+    db.add(call)
+    _complete(db, call, **_results(60.0, []))
+    add_call_to_rollups(db, call)
+    db.commit()
+
+    assert _rows(db)[("agent-1", DAY)]["call_count"] == 1
+
+def test_rebuild_matches_incremental_rollups(db):
+    calls = []
+    for i in range(12):
+        call = _call(agent_id=f"agent-{i % 3}", day=date(2024, 3, 1 + i % 2))
+        db.add(call)
+        calls.append(call)
+    db.commit()
+
+    for i, call in enumerate(calls):
+        _complete(db, call, **_results(30.0 + i, [(i, i + 0.75)] * (i % 3), positive=i))
+    # One call reprocessed, one deleted and one that never completed
+    _complete(db, calls[4], **_results(45.0, [(0.0, 2.0)]))
+    remove_call_from_rollups(db, calls[7])
+    calls[7].is_deleted = True
+    db.add(_call(agent_id="agent-0"))
+    db.commit()
+
+    incremental = _rows(db)
+    assert rebuild_rollups(db) == 6
+    db.commit()
+    rebuilt = _rows(db)
+
+    # Rebuild drops the rows that only hold zeros
+    assert rebuilt.keys() <= incremental.keys()
+    for key, totals in incremental.items():
+        expected = rebuilt.get(key, {column: 0 for column in TOTAL_COLUMNS})
+        assert totals == pytest.approx(expected), key
+
+    # Calls counted by the rebuild are not added twice afterwards
+    add_call_to_rollups(db, calls[0])
+    db.commit()
+    assert _rows(db) == rebuilt
+
+def test_summary_averages_overtalk_duration(db):
+    for overtalk in ([(0.0, 1.0), (5.0, 7.0)], [(3.0, 4.0)], []):
+        call = _call()
+        db.add(call)
+        _complete(db, call, **_results(60.0, overtalk))
+
+    [summary] = get_agent_summary(db, agent_id="agent-1")
+    assert summary["call_count"] == 3
+    assert summary["total_overtalk_count"] == 3
+    assert summary["total_overtalk_duration"] == pytest.approx(4.0)
+    assert summary["average_overtalk_duration"] == pytest.approx(4.0 / 3)
+
+    [daily] = get_daily_stats(db, start_date=DAY, end_date=DAY)
+    assert daily["day"] == DAY
+    assert daily["average_overtalk_duration"] == pytest.approx(4.0 / 3)
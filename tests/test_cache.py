@@ -0,0 +1,105 @@
+import itertools
+
+import pytest
+from prometheus_client import REGISTRY
+
+from services.cache import ResultCache
+from services.metrics import render_metrics
+from services.sentiment import SentimentService
+
+_namespaces = itertools.count()
+
+def _cache(**kwargs) -> ResultCache:
+    # Prometheus counters live for the whole run, so each test gets its own label
+    return ResultCache(f"test-{next(_namespaces)}", **kwargs)
+
+def _exported(cache: ResultCache, event: str) -> float:
+    return REGISTRY.get_sample_value(f"result_cache_{event}_total", {"namespace": cache.namespace}) or 0.0
+
+class FailingRedis:
+    def mget(self, keys):
+        raise ConnectionError("shared tier down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("shared tier down")
+
+def test_lru_evicts_least_recently_used():
+    cache = _cache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert cache.evictions == 1
+
+def test_local_tier_stays_within_max_size():
+    cache = _cache(max_size=3)
+    cache.set_many({str(i): i for i in range(10)})
+
+    assert cache.stats()["size"] == 3
+    assert cache.get_many([str(i) for i in range(10)]) == {"7": 7, "8": 8, "9": 9}
+    assert cache.evictions == 7
+
+def test_stats_count_hits_and_misses():
+    cache = _cache()
+    cache.set("a", 1)
+    cache.get_many(["a", "b", "c"])
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+def test_shared_tier_errors_fall_back_to_local_tier():
+    cache = _cache(redis_url="redis://unused")
+    cache._redis = FailingRedis()
+
+    # The failed write still lands in the local tier
+    cache.set("a", 1)
+    assert cache.get_many(["a", "b"]) == {"a": 1}
+
+    stats = cache.stats()
+    assert stats["shared_errors"] == 2
+    assert (stats["hits"], stats["shared_hits"], stats["misses"]) == (1, 0, 1)
+
+def test_counters_are_exported_to_prometheus():
+    cache = _cache(max_size=1, redis_url="redis://unused")
+    cache._redis = FailingRedis()
+    cache.set_many({"a": 1, "b": 2})
+    cache.get_many(["b", "c"])
+
+    assert _exported(cache, "hits") == 1
+    assert _exported(cache, "misses") == 1
+    assert _exported(cache, "evictions") == 1
+    assert _exported(cache, "shared_errors") == 2
+    assert REGISTRY.get_sample_value("result_cache_entries", {"namespace": cache.namespace}) == 1
+
+    body, _ = render_metrics()
+    assert f'result_cache_hits_total{{namespace="{cache.namespace}"}} 1.0' in body.decode()
+
+def test_case_folded_only_for_uncased_models():
+    service = SentimentService()
+
+    service.model_name = "distilbert-base-uncased-fine-tuned-sst-2-english"
+    assert service._cache_key("Great  service") == service._cache_key("great service")
+
+    service.model_name = "cardiffnlp/twitter-roberta-base-sentiment"
+    assert service._cache_key("Great service") != service._cache_key("great service")
+    assert service._cache_key("great  service ") == service._cache_key("great service")
+
+def test_batch_runs_model_once_per_distinct_uncached_text():
+    service = SentimentService()
+    service.cache = _cache()
+    calls = []
+
+    def infer(texts, batch_size=None):
+        calls.append(list(texts))
+        return [{"sentiment": "positive", "score": 0.9} for _ in texts]
+
+    service._infer_batch = infer
+    service.analyze_batch(["Hello", "hello", "bye"])
+    service.analyze_batch(["HELLO", "bye"])
+
+    assert calls == [["Hello", "bye"]]
+    assert service.cache.stats()["hits"] == 2
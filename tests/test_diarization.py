@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from services.audio import DecodedAudio, SAMPLE_RATE
+from services.diarization import diarize_audio, diarization_service
+from services.silence_analysis import silence_analysis_service
+
+# (channel, start, end) in seconds; channel 0 is the agent
+SCRIPT = [
+    (0, 0.0, 3.0),
+    (1, 5.0, 8.0),    # 2 s between different speakers: hold
+    (1, 10.0, 12.0),  # 2 s with the customer on both sides: dead air
+    (0, 15.0, 17.0),  # 3 s back to the agent: hold
+]
+DURATION = 19.0
+
+def _stereo_call(bleed_db: float = -25.0) -> DecodedAudio:
+    """
+    Speech as noise on its own channel, leaking into the other one bleed_db
+    lower, as on a real line with echo
+    """
+    rng = np.random.default_rng(0)
+    channels = np.zeros((int(DURATION * SAMPLE_RATE), 2), dtype=np.float32)
+    for channel, start, end in SCRIPT:
+        span = slice(int(start * SAMPLE_RATE), int(end * SAMPLE_RATE))
+        speech = rng.normal(0, 0.1, span.stop - span.start).astype(np.float32)
+        channels[span, channel] += speech
+        channels[span, 1 - channel] += speech * 10 ** (bleed_db / 20)
+
+    pcm = (np.clip(channels, -1, 1) * 32767).astype(np.int16)
+    return DecodedAudio(pcm.mean(axis=1) / 32768.0, SAMPLE_RATE, channels=pcm)
+
+def test_channel_turns_follow_each_party_and_ignore_bleed():
+    segments = diarize_audio(_stereo_call())
+
+    turns = [
+        (segment["speaker_type"], segment["start_time"], segment["end_time"])
+        for segment in segments
+    ]
+    expected = [
+        ("agent" if channel == diarization_service.agent_channel else "customer", start, end)
+        for channel, start, end in SCRIPT
+    ]
+    assert len(turns) == len(expected)
+    for (kind, start, end), (expected_kind, expected_start, expected_end) in zip(turns, expected):
+        assert kind == expected_kind
+        assert start == pytest.approx(expected_start, abs=0.05)
+        assert end == pytest.approx(expected_end, abs=0.05)
+
+def test_channel_turns_classify_silence_between_and_within_a_party():
+    audio = _stereo_call()
+    segments = diarization_service.diarize_channels(audio)
+
+    starts, ends = silence_analysis_service.detect_silent_intervals(audio)
+    result = silence_analysis_service.classify_silence(starts, ends, segments, audio.duration)
+
+    kinds = [(segment["type"], round(segment["start"]), round(segment["end"])) for segment in result["silence_segments"]]
+    assert kinds == [
+        ("hold", 3, 5),
+        ("dead_air", 8, 10),
+        ("hold", 12, 15),
+        ("hold", 17, 19),  # after the last turn
+    ]
+    assert result["dead_air_time"] == pytest.approx(2.0, abs=0.1)
+    assert result["hold_time"] == pytest.approx(7.0, abs=0.2)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+
+from services.events import (
+    KEEPALIVE,
+    InMemoryBroker,
+    ProgressService,
+    agent_channel,
+    call_channel
+)
+
+def _service(heartbeat_interval: float = 1.0) -> ProgressService:
+    service = ProgressService()
+    service.set_broker(InMemoryBroker())
+    service.heartbeat_interval = heartbeat_interval
+    return service
+
+async def _drain(subscription, timeout: float = 0.05):
+    events = []
+    while True:
+        event = await subscription.get(timeout)
+        if event is None:
+            return events
+        events.append(event)
+
+async def _never_disconnected() -> bool:
+    return False
+
+def test_call_and_agent_subscribers_receive_events_in_order():
+    service = _service()
+
+    async def scenario():
+        async with service.broker.subscribe([call_channel("c1")]) as by_call, \
+                service.broker.subscribe([agent_channel("a1")]) as by_agent:
+            service.publish_progress("c1", "a1", "processing", "transcription", 1, 4)
+            service.publish_progress("c1", "a1", "processing", "diarization", 2, 4)
+            service.publish_progress("c1", "a1", "completed", stages_done=4, stages_total=4)
+            return await _drain(by_call), await _drain(by_agent)
+
+    by_call, by_agent = asyncio.run(scenario())
+
+    assert [(e["stage"], e["percent"]) for e in by_call] == [
+        ("transcription", 25.0),
+        ("diarization", 50.0),
+        (None, 100.0)
+    ]
+    assert by_agent == by_call
+
+def test_events_published_from_another_thread_arrive_in_order():
+    service = _service()
+
+    async def scenario():
+        async with service.broker.subscribe([call_channel("c1")]) as subscription:
+            worker = threading.Thread(target=lambda: [
+                service.publish_progress("c1", None, "processing", stages_done=i, stages_total=10)
+                for i in range(10)
+            ])
+            worker.start()
+            await asyncio.get_running_loop().run_in_executor(None, worker.join)
+            return await _drain(subscription)
+
+    assert [e["stages_done"] for e in asyncio.run(scenario())] == list(range(10))
+
+def test_agent_events_skip_other_channels():
+    service = _service()
+
+    async def scenario():
+        async with service.broker.subscribe([agent_channel("a1")]) as subscription:
+            service.publish_progress("c1", "a2", "processing")
+            service.publish_progress("c2", None, "processing")
+            service.publish_progress("c3", "a1", "processing")
+            return await _drain(subscription)
+
+    assert [e["call_id"] for e in asyncio.run(scenario())] == ["c3"]
+
+def test_unsubscribe_stops_delivery():
+    service = _service()
+    broker = service.broker
+
+    async def scenario():
+        async with broker.subscribe([call_channel("c1")]) as first:
+            async with broker.subscribe([call_channel("c1")]) as second:
+                service.publish_progress("c1", None, "processing", "transcription")
+                assert len(await _drain(second)) == 1
+            # second has left; first still receives
+            service.publish_progress("c1", None, "processing", "diarization")
+            return await _drain(first)
+
+    assert [e["stage"] for e in asyncio.run(scenario())] == ["transcription", "diarization"]
+    assert not broker._subscribers
+
+def test_format_event_is_one_sse_message():
+    service = _service()
+    event = service.publish_progress("c1", "a1", "processing", "transcription", 1, 4)
+
+    message = service.format_event(event)
+
+    assert message.startswith("event: progress\ndata: ")
+    assert message.endswith("\n\n")
+    assert message.count("\n\n") == 1
+    assert json.loads(message.split("data: ", 1)[1]) == event
+
+def test_relay_sends_keepalives_and_stops_on_terminal_status():
+    service = _service(heartbeat_interval=0.02)
+
+    async def scenario():
+        async with service.broker.subscribe([call_channel("c1")]) as subscription:
+            messages = []
+            async for message in service.relay(subscription, _never_disconnected, stop_on_terminal=True):
+                messages.append(message)
+                if message == KEEPALIVE and len(messages) == 1:
+                    service.publish_progress("c1", None, "processing", "transcription")
+                    service.publish_progress("c1", None, "failed", message="boom")
+                    service.publish_progress("c1", None, "processing", "ignored")
+            return messages
+
+    messages = asyncio.run(scenario())
+
+    assert messages[0] == KEEPALIVE
+    assert [json.loads(m.split("data: ", 1)[1])["status"] for m in messages[1:]] == [
+        "processing",
+        "failed"
+    ]
+
+def test_relay_ends_when_client_disconnects():
+    service = _service(heartbeat_interval=0.02)
+    checks = []
+
+    async def disconnected_after_two() -> bool:
+        checks.append(True)
+        return len(checks) > 2
+
+    async def scenario():
+        async with service.broker.subscribe([agent_channel("a1")]) as subscription:
+            return [message async for message in service.relay(subscription, disconnected_after_two)]
+
+    assert asyncio.run(scenario()) == [KEEPALIVE, KEEPALIVE]
@@ -0,0 +1,180 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from services.ingest import batch_ingest_service, extract_archive, parse_manifest, plan_calls
+from services.storage import storage_service
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    monkeypatch.setattr(storage_service, "base_path", str(audio))
+    return audio
+
+def _zip(members) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+def _tar(members) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+def _agents(plans):
+    return {
+        plan["filename"]: plan["call"]["agent_id"] if plan["call"] else plan["status"]
+        for plan in plans
+    }
+
+def test_json_manifest_list_and_object_keyed_by_member_path():
+    as_list = parse_manifest(json.dumps([
+        {"filename": "./east/a.wav", "agent_id": "A1", "language": "es"},
+        {"filename": "west\\a.wav", "agent_id": "A2", "customer_id": ""}
+    ]).encode(), "manifest.json")
+    as_object = parse_manifest(json.dumps({
+        "east/a.wav": {"agent_id": "A1", "language": "es"},
+        "/west/a.wav": {"agent_id": "A2", "customer_id": ""}
+    }).encode(), "manifest.json")
+
+    expected = {
+        "east/a.wav": {"agent_id": "A1", "language": "es"},
+        "west/a.wav": {"agent_id": "A2"}
+    }
+    assert as_list == expected
+    assert as_object == expected
+
+def test_csv_manifest_keyed_by_member_path():
+    # Excel writes a byte order mark at the start
+    content = "\ufefffilename,agent_id,customer_id,notes\neast/a.wav,A1,C1,x\nwest/a.wav,A2,,y\n"
+
+    assert parse_manifest(content.encode("utf-8"), "manifest.csv") == {
+        "east/a.wav": {"agent_id": "A1", "customer_id": "C1"},
+        "west/a.wav": {"agent_id": "A2"}
+    }
+
+@pytest.mark.parametrize("content, name", [
+    (b"filename,agent_id\na.wav,A1\n./a.wav,A2\n", "manifest.csv"),
+    (b'[{"agent_id": "A1"}]', "manifest.json"),
+    (b"not json", "manifest.json"),
+])
+def test_invalid_manifests_raise_value_error(content, name):
+    with pytest.raises(ValueError, match="Invalid manifest"):
+        parse_manifest(content, name)
+
+def test_manifest_matches_by_path_then_bare_name():
+    entries = [
+        {"filename": "east/a.wav", "call_id": 1, "file_path": "1.wav", "content_hash": "h1"},
+        {"filename": "west/a.wav", "call_id": 2, "file_path": "2.wav", "content_hash": "h2"},
+        {"filename": "west/b.wav", "call_id": 3, "file_path": "3.wav", "content_hash": "h3"},
+        {"filename": "north/a.wav", "call_id": 4, "file_path": "4.wav", "content_hash": "h4"}
+    ]
+    metadata = {"east/a.wav": {"agent_id": "A1"}, "a.wav": {"agent_id": "BAD"}, "b.wav": {"agent_id": "B"}}
+
+    assert _agents(plan_calls(entries, metadata)) == {
+        "east/a.wav": "A1",
+        # a.wav is in several folders, so the bare name is ambiguous
+        "west/a.wav": "rejected",
+        "west/b.wav": "B",
+        "north/a.wav": "rejected"
+    }
+
+def test_missing_manifest_entry_falls_back_to_form_fields():
+    entries = [
+        {"filename": "a.wav", "call_id": 1, "file_path": "1.wav", "content_hash": "h1"},
+        {"filename": "b.wav", "call_id": 2, "file_path": "2.wav", "content_hash": "h2"}
+    ]
+    metadata = {"a.wav": {"agent_id": "A1", "language": "fr"}}
+
+    plans = plan_calls(entries, metadata, agent_id="FORM", customer_id="C", language="de")
+    assert [(p["call"]["agent_id"], p["call"]["customer_id"], p["call"]["language"]) for p in plans] == [
+        ("A1", "C", "fr"),
+        ("FORM", "C", "de")
+    ]
+
+    # Without a form agent_id the unlisted file is rejected
+    plans = plan_calls(entries, metadata)
+    assert _agents(plans) == {"a.wav": "A1", "b.wav": "rejected"}
+    assert "No agent_id" in plans[1]["message"]
+
+def test_extra_manifest_entries_are_ignored():
+    entries = [{"filename": "a.wav", "call_id": 1, "file_path": "1.wav", "content_hash": "h1"}]
+    metadata = {"a.wav": {"agent_id": "A1"}, "missing.wav": {"agent_id": "A2"}}
+
+    assert _agents(plan_calls(entries, metadata)) == {"a.wav": "A1"}
+
+def test_identical_files_share_the_first_accepted_call():
+    entries = [
+        {"filename": "rejected.wav", "call_id": 1, "file_path": "1.wav", "content_hash": "same"},
+        {"filename": "first.wav", "call_id": 2, "file_path": "2.wav", "content_hash": "same"},
+        {"filename": "other.wav", "call_id": 3, "file_path": "3.wav", "content_hash": "other"},
+        {"filename": "copy.wav", "call_id": 4, "file_path": "4.wav", "content_hash": "same"}
+    ]
+    metadata = {name: {"agent_id": "A1"} for name in ("first.wav", "other.wav", "copy.wav")}
+
+    plans = plan_calls(entries, metadata)
+
+    assert [p["status"] for p in plans] == ["rejected", "pending", "pending", "pending"]
+    assert [p["call"]["id"] if p["call"] else None for p in plans] == [None, 2, 3, None]
+    assert plans[3]["same_as"] == 2
+    assert "first.wav" in plans[3]["message"]
+
+def test_archive_manifest_and_non_audio_members(storage):
+    archive = _zip({
+        "calls/a.wav": b"aaaa",
+        "calls/notes.txt": b"not audio",
+        "__MACOSX/calls/._a.wav": b"resource fork",
+        "calls/manifest.csv": b"filename,agent_id\ncalls/a.wav,A1\n"
+    })
+
+    result = extract_archive(archive, "batch.zip")
+
+    assert result["manifest"] == {"calls/a.wav": {"agent_id": "A1"}}
+    [audio, text] = result["entries"]
+    assert audio["filename"] == "calls/a.wav"
+    assert audio["size"] == 4
+    assert open(audio["file_path"], "rb").read() == b"aaaa"
+    assert text == {"filename": "calls/notes.txt", "error": text["error"]}
+    assert "Invalid file type" in text["error"]
+    assert os.listdir(storage) == [os.path.basename(audio["file_path"])]
+
+@pytest.mark.parametrize("pack, name", [(_zip, "batch.zip"), (_tar, "batch.tar.gz")])
+def test_member_paths_never_reach_the_filesystem(storage, pack, name):
+    archive = pack({
+        "../../escaped.wav": b"one",
+        "/etc/absolute.wav": b"two",
+        "nested/../../up.wav": b"three"
+    })
+
+    entries = extract_archive(archive, name)["entries"]
+
+    assert [entry["filename"] for entry in entries] == ["../../escaped.wav", "etc/absolute.wav", "../up.wav"]
+    # Stored files are named by call id inside storage, never by the member name
+    assert sorted(os.listdir(storage)) == sorted(f"{entry['call_id']}.wav" for entry in entries)
+    assert not os.path.exists(storage.parent.parent / "escaped.wav")
+    assert not os.path.exists(storage.parent / "up.wav")
+
+def test_item_limit_discards_stored_files(storage, monkeypatch):
+    monkeypatch.setattr(batch_ingest_service, "max_items", 2)
+    archive = _tar({"a.wav": b"a", "b.wav": b"b", "c.wav": b"c"})
+
+    with pytest.raises(ValueError, match="maximum of 2 items"):
+        extract_archive(archive, "batch.tar.gz")
+    assert os.listdir(storage) == []
+
+def test_unsupported_archive_type(storage):
+    with pytest.raises(ValueError, match="Unsupported archive type"):
+        extract_archive(io.BytesIO(b"x"), "batch.rar")
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from services.live import LiveCallAnalyzer
+
+SAMPLE_RATE = 8000
+
+def _conversation(seed: int) -> bytes:
+    """
+    Interleaved s16le stereo: each channel alternates speech and silence,
+    so there are shared silences as well as overlaps
+    """
+    rng = np.random.default_rng(seed)
+    total = 40 * SAMPLE_RATE
+    channels = np.zeros((total, 2), dtype=np.float32)
+    for channel in range(2):
+        position = int(rng.integers(0, SAMPLE_RATE))
+        while position < total:
+            length = int(rng.uniform(0.5, 4.0) * SAMPLE_RATE)
+            channels[position:position + length, channel] = rng.normal(0, 0.2, len(channels[position:position + length]))
+            position += length + int(rng.uniform(0.5, 5.0) * SAMPLE_RATE)
+    return (np.clip(channels, -1, 1) * 32767).astype(np.int16).tobytes()
+
+def _events(pcm: bytes, chunk_bytes: int):
+    analyzer = LiveCallAnalyzer(
+        SAMPLE_RATE,
+        agent_channel=0,
+        frame_duration=0.032,
+        silence_threshold=-40,
+        min_silence_len=1000,
+        min_overlap_duration=0.5,
+        hangover=0.3,
+        silence_alert=5
+    )
+    events = []
+    for offset in range(0, len(pcm), chunk_bytes):
+        events.extend(analyzer.feed(pcm[offset:offset + chunk_bytes]))
+    events.extend(analyzer.close())
+    # Alerts, "position" and the order of events closed by the same frame
+    # depend on when frames arrive, not on the audio
+    return sorted(
+        (
+            {key: value for key, value in event.items() if key != "position"}
+            for event in events
+            if not event["type"].endswith("_alert")
+        ),
+        key=lambda event: (event["type"], event.get("start", 0.0))
+    )
+
+@pytest.mark.parametrize("chunk_bytes", [3, 1001, 4096, 32000])
+def test_live_events_do_not_depend_on_frame_size(chunk_bytes):
+    pcm = _conversation(seed=3)
+    whole = _events(pcm, len(pcm))
+    types = {event["type"] for event in whole}
+    assert {"silence", "overtalk", "summary"} <= types
+
+    assert _events(pcm, chunk_bytes) == whole
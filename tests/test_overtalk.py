@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from services.overtalk import OvertalkTracker, analyze_overtalk, overtalk_service
+
+def _turn(speaker, start, end):
+    return {"speaker": speaker, "start_time": start, "end_time": end}
+
+def _intervals(result):
+    return [
+        (pytest.approx(segment["start"]), pytest.approx(segment["end"]), segment["interrupter"])
+        for segment in result["overtalk_segments"]
+    ]
+
+def test_interjection_inside_a_longer_turn():
+    result = analyze_overtalk([_turn("agent", 0, 10), _turn("customer", 3, 5)])
+
+    assert _intervals(result) == [(3, 5, "customer")]
+    assert result["total_overtalk_duration"] == pytest.approx(2)
+
+def test_three_speakers_overlapping_form_one_interval():
+    result = analyze_overtalk([
+        _turn("A", 0, 10),
+        _turn("B", 2, 8),
+        _turn("C", 4, 6),
+    ])
+
+    # Two or more people talk from 2 to 8; B is the one who broke in
+    assert _intervals(result) == [(2, 8, "B")]
+    assert result["interruptions"] == {"A": 0, "B": 1, "C": 0}
+
+def test_touching_turns_do_not_overlap():
+    result = analyze_overtalk([
+        _turn("agent", 0, 5),
+        _turn("customer", 5, 9),
+        _turn("agent", 9, 12),
+    ])
+
+    assert result["overtalk_count"] == 0
+    assert result["total_overtalk_duration"] == 0.0
+
+def test_a_speakers_own_overlapping_turns_are_merged():
+    result = analyze_overtalk([
+        _turn("agent", 0, 6),
+        _turn("agent", 4, 10),
+        _turn("customer", 8, 12),
+    ])
+
+    assert _intervals(result) == [(8, 10, "customer")]
+
+def test_zero_length_turns_are_ignored():
+    segments = [_turn("A", 0, 10), _turn("B", 2, 8)]
+    expected = analyze_overtalk(segments)
+
+    result = analyze_overtalk(segments + [_turn("C", 5, 5), _turn("A", 20, 20)])
+    assert _intervals(result) == _intervals(expected)
+    assert analyze_overtalk([_turn("A", 3, 3)])["overtalk_count"] == 0
+
+def test_short_overlaps_are_dropped():
+    result = analyze_overtalk([_turn("agent", 0, 5), _turn("customer", 4.8, 9)])
+    assert result["overtalk_count"] == 0
+
+def test_interruption_counts_and_percentage():
+    result = analyze_overtalk([
+        _turn("agent", 0, 10),
+        _turn("customer", 2, 4),     # customer interrupts for 2 s
+        _turn("customer", 12, 20),
+        _turn("agent", 18, 19),      # agent interrupts for 1 s
+        _turn("customer", 22, 25),
+        _turn("agent", 24, 30),      # agent interrupts for 1 s
+    ])
+
+    assert result["overtalk_count"] == 3
+    assert result["interruptions"] == {"agent": 2, "customer": 1}
+    assert result["total_overtalk_duration"] == pytest.approx(4)
+    assert result["total_duration"] == 30
+    assert result["overtalk_percentage"] == pytest.approx(4 / 30 * 100)
+
+def test_no_segments():
+    result = analyze_overtalk([])
+    assert result["overtalk_count"] == 0
+    assert result["overtalk_segments"] == []
+
+@pytest.mark.parametrize("seed", range(10))
+def test_live_tracker_matches_batch_analysis(seed):
+    frame_seconds = 0.1
+    labels = ("agent", "customer")
+    rng = np.random.default_rng(seed)
+    n_frames = 600
+
+    # Alternating talk and pauses per speaker, on the frame grid
+    active = np.zeros((2, n_frames), dtype=bool)
+    segments = []
+    for speaker in range(2):
+        frame = int(rng.integers(0, 20))
+        while frame < n_frames:
+            length = int(rng.integers(3, 60))
+            active[speaker, frame:frame + length] = True
+            segments.append(_turn(labels[speaker], frame * frame_seconds, min(frame + length, n_frames) * frame_seconds))
+            frame += length + int(rng.integers(1, 40))
+
+    tracker = OvertalkTracker(frame_seconds, overtalk_service.min_overlap_duration, labels)
+    live = []
+    for block in np.array_split(active, rng.integers(1, 30), axis=1):
+        live.extend(tracker.feed(block))
+    live.extend(tracker.flush())
+
+    batch = analyze_overtalk(segments)["overtalk_segments"]
+    assert len(live) == len(batch)
+    for live_interval, batch_interval in zip(live, batch):
+        assert live_interval["start"] == pytest.approx(batch_interval["start"])
+        assert live_interval["end"] == pytest.approx(batch_interval["end"])
+        assert live_interval["interrupter"] == batch_interval["interrupter"]
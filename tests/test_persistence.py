@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import Call
+from services.persistence import (
+    CALL_PAGE_ORDER,
+    calls_after_cursor,
+    encode_cursor,
+    persistence_service
+)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 3, 1, 12, 30, 5, 123456),
+    datetime(2024, 3, 1, 12, 30, 5, tzinfo=timezone.utc),
+    datetime(2024, 3, 1, 7, 30, tzinfo=timezone(timedelta(hours=-5))),
+])
+def test_cursor_round_trip(created_at):
+    call_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, call_id)
+    assert persistence_service.decode_cursor(cursor) == (created_at, call_id)
+    # Safe to pass in a query string as is
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "bm8gc2VwYXJhdG9y", encode_cursor(datetime(2024, 1, 1), uuid.uuid4())[:-4]])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        persistence_service.decode_cursor(cursor)
+
+def test_paging_with_cursors_visits_every_call_once(db):
+    start = datetime(2024, 3, 1, 9, 0)
+    # Groups of calls created at the same instant must not be split or repeated across pages
+    for i in range(23):
+        db.add(Call(
+            id=uuid.uuid4(),
+            agent_id="agent",
+            audio_path=f"audio/{i}.wav",
+            created_at=start + timedelta(seconds=i // 4)
+        ))
+    db.commit()
+
+    expected = db.execute(select(Call.id).order_by(*CALL_PAGE_ORDER)).scalars().all()
+
+    seen, cursor = [], None
+    while True:
+        query = select(Call.id, Call.created_at)
+        if cursor:
+            query = query.where(calls_after_cursor(cursor))
+        rows = db.execute(query.order_by(*CALL_PAGE_ORDER).limit(5)).all()
+        if not rows:
+            break
+        seen.extend(row.id for row in rows)
+        cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    assert seen == expected
+    assert len(seen) == 23
@@ -0,0 +1,99 @@
+import json
+from collections import Counter
+
+import pytest
+
+from services.pipeline import StageGraph
+
+class MemoryCheckpoints:
+    """CheckpointStore stand-in keeping JSON payloads in a dict"""
+    def __init__(self):
+        self.artifacts = {}
+
+    def load(self, stage, version):
+        if (stage, version) not in self.artifacts:
+            return False, None
+        return True, json.loads(self.artifacts[(stage, version)])
+
+    def save(self, stage, version, payload):
+        self.artifacts.setdefault((stage, version), json.dumps(payload))
+
+def _graph(checkpoint, runs, versions=None, fail=()):
+    """
+    audio (unversioned) feeds transcription and silence; words reads transcription
+    """
+    versions = {"transcription": "1", "silence": "1", "words": "1", **(versions or {})}
+
+    def stage(name, value):
+        def run(**kwargs):
+            runs[name] += 1
+            if name in fail:
+                raise RuntimeError(f"{name} failed")
+            return value(**kwargs)
+        return run
+
+    graph = StageGraph(max_workers=2, checkpoint=checkpoint)
+    graph.add_stage("audio", stage("audio", lambda: [0.0, 0.5, 0.0]))
+    graph.add_stage(
+        "transcription",
+        stage("transcription", lambda audio: {"text": "hi", "samples": len(audio)}),
+        depends_on=["audio"],
+        version=versions["transcription"]
+    )
+    graph.add_stage(
+        "silence",
+        stage("silence", lambda audio: [[0, 1]]),
+        depends_on=["audio"],
+        version=versions["silence"]
+    )
+    graph.add_stage(
+        "words",
+        stage("words", lambda transcription: transcription["text"].split()),
+        depends_on=["transcription"],
+        version=versions["words"]
+    )
+    return graph
+
+def test_second_run_restores_every_stage_without_decoding():
+    checkpoint = MemoryCheckpoints()
+    first_runs, second_runs = Counter(), Counter()
+
+    first = _graph(checkpoint, first_runs).run()
+    second = _graph(checkpoint, second_runs).run()
+
+    assert first_runs == {"audio": 1, "transcription": 1, "silence": 1, "words": 1}
+    # The unversioned audio stage is skipped since nothing left to run reads it
+    assert second_runs == {}
+    assert {name: second[name] for name in ("transcription", "silence", "words")} == {
+        name: first[name] for name in ("transcription", "silence", "words")
+    }
+
+def test_retry_resumes_after_the_failed_stage():
+    checkpoint = MemoryCheckpoints()
+
+    with pytest.raises(RuntimeError, match="words failed"):
+        _graph(checkpoint, Counter(), fail={"words"}).run()
+
+    runs = Counter()
+    results = _graph(checkpoint, runs).run()
+    assert runs == {"words": 1}
+    assert results["words"] == ["hi"]
+
+def test_version_change_invalidates_the_stage_and_its_dependents():
+    checkpoint = MemoryCheckpoints()
+    _graph(checkpoint, Counter()).run()
+
+    runs = Counter()
+    _graph(checkpoint, runs, versions={"transcription": "2"}).run()
+    # words reads transcription, so its version changes too; silence is untouched
+    assert runs == {"audio": 1, "transcription": 1, "words": 1}
+
+def test_unreadable_checkpoint_is_recomputed():
+    class BrokenLoads(MemoryCheckpoints):
+        def load(self, stage, version):
+            raise OSError("database unavailable")
+
+    runs = Counter()
+    results = _graph(BrokenLoads(), runs).run()
+    assert runs == {"audio": 1, "transcription": 1, "silence": 1, "words": 1}
+    assert results["words"] == ["hi"]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from services.silence_analysis import RunTracker, SilenceTracker, find_runs
+
+SAMPLE_RATE = 8000
+
+def _speech_and_pauses(seed: int, seconds: float = 20.0) -> np.ndarray:
+    """
+    Noise bursts separated by near-silent pauses of random length, at
+    sample (not frame) granularity so runs straddle frame edges
+    """
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = 0
+    loud = True
+    while total < seconds * SAMPLE_RATE:
+        length = int(rng.uniform(0.2, 3.0) * SAMPLE_RATE)
+        level = 0.2 if loud else 0.0005
+        parts.append(rng.normal(0, level, length).astype(np.float32))
+        total += length
+        loud = not loud
+    return np.concatenate(parts)
+
+def _feed(tracker: SilenceTracker, samples: np.ndarray, block_sizes):
+    intervals = []
+    position = 0
+    for size in block_sizes:
+        intervals.extend(tracker.feed(samples[position:position + size]))
+        position += size
+    intervals.extend(tracker.feed(samples[position:]))
+    return intervals + tracker.flush()
+
+def _tracker() -> SilenceTracker:
+    return SilenceTracker(SAMPLE_RATE, frame_duration=0.032, silence_threshold=-40, min_silence_len=1000)
+
+@pytest.mark.parametrize("block_size", [7, 255, 256, 257, 4000, SAMPLE_RATE * 10])
+def test_silence_tracker_does_not_depend_on_block_size(block_size):
+    samples = _speech_and_pauses(seed=0)
+    whole = _feed(_tracker(), samples, [])
+    assert whole
+
+    blocks = [block_size] * (len(samples) // block_size)
+    assert _feed(_tracker(), samples, blocks) == whole
+
+def test_silence_tracker_random_blocks_match_one_block():
+    samples = _speech_and_pauses(seed=1)
+    whole = _feed(_tracker(), samples, [])
+
+    rng = np.random.default_rng(2)
+    # Empty blocks included: they must not close an open silence
+    blocks = rng.integers(0, 3 * SAMPLE_RATE, size=200)
+    assert _feed(_tracker(), samples, blocks) == whole
+
+def test_silence_tracker_drops_short_silences_and_closes_trailing_one():
+    tracker = _tracker()
+    frame = tracker.frame_length
+    loud = np.full(10 * frame, 0.5, dtype=np.float32)
+    short_pause = np.zeros(5 * frame, dtype=np.float32)
+    long_pause = np.zeros(40 * frame, dtype=np.float32)
+
+    intervals = tracker.feed(np.concatenate([loud, short_pause, loud, long_pause]))
+    assert intervals == []
+    assert tracker.open_since == pytest.approx(25 * tracker.frame_seconds)
+
+    assert tracker.flush() == [
+        pytest.approx((25 * tracker.frame_seconds, 65 * tracker.frame_seconds))
+    ]
+    assert tracker.open_since is None
+
+@pytest.mark.parametrize("seed", range(20))
+def test_run_tracker_matches_whole_mask_for_any_split(seed):
+    rng = np.random.default_rng(seed)
+    # Long runs of both values, so runs regularly cross block edges
+    mask = np.repeat(rng.random(60) < 0.5, rng.integers(1, 30, size=60))
+    starts, ends = find_runs(mask)
+    expected = list(zip(starts.tolist(), ends.tolist()))
+
+    cuts = np.sort(rng.integers(0, len(mask) + 1, size=rng.integers(0, 15)))
+    tracker = RunTracker()
+    runs = []
+    for block in np.split(mask, cuts):
+        runs.extend(tracker.feed(block))
+    runs.extend(tracker.flush())
+
+    assert runs == expected
+    assert tracker.frames_seen == len(mask)
+
+def test_run_tracker_carries_an_open_run_across_blocks():
+    tracker = RunTracker()
+    assert tracker.feed(np.array([False, True, True])) == []
+    assert tracker.run_start == 1
+    assert tracker.feed(np.array([True, True])) == []
+    assert tracker.feed(np.array([], dtype=bool)) == []
+    assert tracker.feed(np.array([False, True])) == [(1, 5)]
+    assert tracker.flush() == [(6, 7)]
+    assert tracker.flush() == []
@@ -0,0 +1,81 @@
+import asyncio
+import uuid
+
+import pytest
+
+from services.storage import StorageService, parse_content_range
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes 0-0/10", (0, 1)),
+    ("bytes 0-9/10", (0, 10)),
+    ("bytes 9-9/10", (9, 1)),
+    ("bytes 3-6/*", (3, 4)),
+    ("  bytes 2-5/10 ", (2, 4)),
+])
+def test_parse_content_range(header, expected):
+    assert parse_content_range(header, 10) == expected
+
+@pytest.mark.parametrize("header", [
+    "bytes 0-9",
+    "bytes=0-9/10",
+    "bytes -9/10",
+    "bytes 0--1/10",
+    "items 0-9/10",
+    "",
+])
+def test_parse_content_range_rejects_malformed_headers(header):
+    with pytest.raises(ValueError, match="Malformed"):
+        parse_content_range(header, 10)
+
+@pytest.mark.parametrize("header", [
+    "bytes 5-4/10",   # end before start
+    "bytes 0-10/10",  # end is inclusive, so 10 is past the last byte
+    "bytes 10-10/10",
+    "bytes 0-9/11",   # declared total differs from the session's
+])
+def test_parse_content_range_rejects_ranges_outside_the_upload(header):
+    with pytest.raises(ValueError, match="outside the upload"):
+        parse_content_range(header, 10)
+
+def _body(*chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return stream()
+
+def test_ranges_in_any_order_assemble_the_file(tmp_path):
+    storage = StorageService(str(tmp_path))
+    path = storage.create_upload_target(uuid.uuid4(), "wav", 10)
+
+    for header, body in [("bytes 6-9/10", b"ghij"), ("bytes 0-2/10", b"abc"), ("bytes 3-5/*", b"def")]:
+        start, length = storage.parse_content_range(header, 10)
+        asyncio.run(storage.write_range(path, start, length, _body(body[:1], b"", body[1:])))
+
+    with open(path, "rb") as f:
+        assert f.read() == b"abcdefghij"
+
+@pytest.mark.parametrize("body, message", [
+    (b"ab", "Received 2 bytes"),
+    (b"abcde", "longer than the declared range"),
+])
+def test_body_must_match_the_range_length(tmp_path, body, message):
+    storage = StorageService(str(tmp_path))
+    path = storage.create_upload_target(uuid.uuid4(), "wav", 10)
+
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(storage.write_range(path, 0, 4, _body(body)))
+
+def test_finalize_again_after_the_file_was_moved(tmp_path):
+    storage = StorageService(str(tmp_path))
+    path = storage.create_upload_target(uuid.uuid4(), "wav", 4)
+    asyncio.run(storage.write_range(path, 0, 4, _body(b"abcd")))
+    call_id = uuid.uuid4()
+
+    first = asyncio.run(storage.finalize_upload(path, call_id, "wav"))
+    # A finalize that took over from one that died after moving the file
+    second = asyncio.run(storage.finalize_upload(path, call_id, "wav"))
+
+    assert first == second
+    assert first[0] == str(tmp_path / f"{call_id}.wav")
+    with open(first[0], "rb") as f:
+        assert f.read() == b"abcd"
@@ -0,0 +1,84 @@
+import sys
+import types
+
+import pytest
+
+from services.transcription import TranscriptionService
+
+HOP_LENGTH = 160
+
+@pytest.fixture
+def whisper_timing(monkeypatch):
+    """
+    Stand-in for whisper.audio and whisper.timing with the signature of
+    openai-whisper 20231117: keyword-only, last_speech_timestamp required
+    """
+    calls = []
+
+    def add_word_timestamps(
+        *,
+        segments,
+        model,
+        tokenizer,
+        mel,
+        num_frames,
+        prepend_punctuations="\"'“¿([{-",
+        append_punctuations="\"'.。,，!！?？:：”)]}、",
+        last_speech_timestamp,
+        **kwargs
+    ):
+        calls.append({"last_speech_timestamp": last_speech_timestamp, "num_frames": num_frames})
+        time_offset = segments[0]["seek"] * HOP_LENGTH / 16000
+        for segment in segments:
+            words = segment["text"].split()
+            step = (segment["end"] - segment["start"]) / len(words)
+            # Whisper returns words with their leading space, in absolute time
+            segment["words"] = [
+                {
+                    "word": f" {word}",
+                    "start": segment["start"] + i * step,
+                    "end": segment["start"] + (i + 1) * step,
+                    "probability": 0.9
+                }
+                for i, word in enumerate(words)
+            ]
+            assert segment["start"] >= time_offset
+
+    whisper = types.ModuleType("whisper")
+    audio = types.ModuleType("whisper.audio")
+    audio.HOP_LENGTH = HOP_LENGTH
+    timing = types.ModuleType("whisper.timing")
+    timing.add_word_timestamps = add_word_timestamps
+    whisper.audio, whisper.timing = audio, timing
+    monkeypatch.setitem(sys.modules, "whisper", whisper)
+    monkeypatch.setitem(sys.modules, "whisper.audio", audio)
+    monkeypatch.setitem(sys.modules, "whisper.timing", timing)
+    return calls
+
+def _segment(text, start, end):
+    return {"text": text, "start": start, "end": end, "tokens": [1, 2, 3]}
+
+def test_word_timestamps_carry_the_last_speech_end_across_windows(whisper_timing):
+    service = TranscriptionService()
+
+    first = [_segment("hello there", 0.0, 2.0), _segment("how are you", 4.0, 7.0)]
+    last_speech = service._add_word_timestamps(first, None, None, 0, 30 * 16000, 0.0)
+    assert last_speech == pytest.approx(7.0)
+
+    second = [_segment("fine thanks", 31.0, 33.0)]
+    last_speech = service._add_word_timestamps(second, None, None, 30 * 16000, 10 * 16000, last_speech)
+
+    assert [call["last_speech_timestamp"] for call in whisper_timing] == [0.0, pytest.approx(7.0)]
+    assert [call["num_frames"] for call in whisper_timing] == [3000, 1000]
+    assert last_speech == pytest.approx(33.0)
+
+    assert [word["word"] for word in first[1]["words"]] == ["how", "are", "you"]
+    assert second[0]["words"][0] == {"word": "fine", "start": 31.0, "end": 32.0}
+    # The working keys are dropped so segments stay JSON-sized for checkpoints
+    assert set(second[0]) == {"text", "start", "end", "words"}
+
+def test_window_without_speech_keeps_the_last_speech_end(whisper_timing):
+    service = TranscriptionService()
+
+    assert service._add_word_timestamps([], None, None, 0, 16000, 12.5) == 12.5
+    assert whisper_timing == []
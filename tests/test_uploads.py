@@ -0,0 +1,199 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import UploadPart, UploadSession
+from services.uploads import UploadSessionService
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "uploads.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return path
+
+@pytest.fixture
+def db(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+    engine.dispose()
+
+@pytest.fixture
+def service():
+    service = UploadSessionService()
+    service.finalize_timeout = 600
+    service.part_timeout = 3600
+    return service
+
+def _session(db: Session, total_size: int = 100, **fields) -> uuid.UUID:
+    session = UploadSession(
+        id=uuid.uuid4(),
+        filename="call.wav",
+        total_size=total_size,
+        file_path="partial/call.wav.part",
+        agent_id="agent-1",
+        **fields
+    )
+    db.add(session)
+    db.commit()
+    return session.id
+
+def _write(service: UploadSessionService, db: Session, session_id: uuid.UUID, start: int, end: int) -> UploadPart:
+    part = service.start_part(db, session_id, start, end)
+    db.commit()
+    service.finish_part(db, part)
+    db.commit()
+    return part
+
+def test_parts_count_once_written(service, db):
+    session_id = _session(db)
+    _write(service, db, session_id, 0, 40)
+    service.start_part(db, session_id, 40, 100)
+    db.commit()
+
+    assert service.received_ranges(db, session_id) == [[0, 40]]
+    assert service.received_ranges(db, session_id, include_in_flight=True) == [[0, 100]]
+    assert service.parts_in_flight(db, session_id) == 1
+
+def test_received_ranges_merge_overlapping_and_touching_parts(service, db):
+    session_id = _session(db)
+    for start, end in [(50, 60), (0, 10), (10, 20), (15, 30), (70, 80)]:
+        _write(service, db, session_id, start, end)
+
+    assert service.received_ranges(db, session_id) == [[0, 30], [50, 60], [70, 80]]
+
+def test_abandoned_parts_are_not_waited_for(service, db):
+    session_id = _session(db)
+    failed = service.start_part(db, session_id, 0, 50)
+    db.commit()
+    service.abandon_part(db, failed)
+    db.commit()
+    # A part whose writer died long ago
+    db.add(UploadPart(
+        session_id=session_id, start=50, end=100,
+        created_at=datetime.now(timezone.utc) - timedelta(hours=2)
+    ))
+    db.commit()
+
+    assert service.parts_in_flight(db, session_id) == 0
+    assert service.received_ranges(db, session_id, include_in_flight=True) == [[50, 100]]
+
+def test_no_part_starts_once_finalize_claimed_the_session(service, db):
+    session_id = _session(db)
+    claimed_at, call_id = service.claim_finalize(db, session_id)
+    db.commit()
+
+    assert service.start_part(db, session_id, 0, 10) is None
+    db.commit()
+    assert db.query(UploadPart).count() == 0
+
+    # Released after a failed finalize, the session takes parts again
+    assert service.release_finalize(db, session_id, claimed_at)
+    db.commit()
+    assert service.start_part(db, session_id, 0, 10) is not None
+
+def test_only_one_finalize_claims_a_session(service, db):
+    session_id = _session(db)
+
+    first = service.claim_finalize(db, session_id)
+    db.commit()
+    second = service.claim_finalize(db, session_id)
+    db.commit()
+
+    assert first is not None
+    assert second is None
+    db.expire_all()
+    session = db.get(UploadSession, session_id)
+    assert session.status == "finalizing"
+    assert session.claimed_call_id == first[1]
+    assert session.finalizing_at is not None
+
+def test_stale_claim_is_taken_over_with_the_same_call_id(service, db):
+    session_id = _session(db)
+    stuck_at, call_id = service.claim_finalize(db, session_id)
+    db.commit()
+
+    service.finalize_timeout = 0
+    takeover = service.claim_finalize(db, session_id)
+    db.commit()
+
+    assert takeover is not None
+    claimed_at, takeover_call_id = takeover
+    assert takeover_call_id == call_id
+    assert claimed_at != stuck_at
+
+    # The stuck attempt no longer holds the claim
+    assert not service.complete_finalize(db, session_id, stuck_at, call_id)
+    assert not service.release_finalize(db, session_id, stuck_at)
+    assert service.complete_finalize(db, session_id, claimed_at, call_id)
+    db.commit()
+
+    db.expire_all()
+    session = db.get(UploadSession, session_id)
+    assert (session.status, session.call_id) == ("finalized", call_id)
+    # A finalized session is never claimed again
+    assert service.claim_finalize(db, session_id) is None
+
+def test_claim_without_a_recorded_time_is_stale(service, db):
+    session_id = _session(db, status="finalizing")
+
+    assert service.claim_finalize(db, session_id) is not None
+
+def test_finalize_waits_for_parts_in_flight(service, db, db_path):
+    service.finalize_wait = 5
+    service.poll_interval = 0.05
+    session_id = _session(db)
+    part = service.start_part(db, session_id, 0, 100)
+    db.commit()
+    service.claim_finalize(db, session_id)
+    db.commit()
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as finalizing:
+                async def finish_later():
+                    await asyncio.sleep(0.3)
+                    # The writer finishes from its own request
+                    service.finish_part(db, part)
+                    db.commit()
+
+                writer = asyncio.create_task(finish_later())
+                started = asyncio.get_running_loop().time()
+                done = await service.wait_for_parts(finalizing, session_id)
+                waited = asyncio.get_running_loop().time() - started
+                await writer
+                return done, waited
+        finally:
+            await engine.dispose()
+
+    done, waited = asyncio.run(scenario())
+
+    assert done
+    assert waited >= 0.25
+    assert service.received_ranges(db, session_id) == [[0, 100]]
+
+def test_finalize_gives_up_on_parts_that_do_not_finish(service, db, db_path):
+    service.finalize_wait = 0.2
+    service.poll_interval = 0.05
+    session_id = _session(db)
+    service.start_part(db, session_id, 0, 100)
+    db.commit()
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as finalizing:
+                return await service.wait_for_parts(finalizing, session_id)
+        finally:
+            await engine.dispose()
+
+    assert not asyncio.run(scenario())